@@ -0,0 +1,70 @@
+"""Microbenchmark of path validation as the number of allowed roots grows.
+
+Usage:
+    python -m benchmarks.path_validation --roots 1 --roots 10 --roots 100 --roots 1000
+
+Compares PathValidator with resolving every root on every call, which is
+what validation cost before roots were resolved once into a trie.
+"""
+
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import click
+
+from mcp_server_code_assist.path_validator import PathValidator
+
+DEFAULT_ROOT_COUNTS = (1, 10, 100, 1000)
+
+
+def naive_validate(roots: list[str], path: str | Path) -> Path:
+    path = Path(path).resolve()
+    if any(path.is_relative_to(Path(root).resolve()) for root in roots):
+        return path
+    raise ValueError(f"Path {path} is outside allowed directories")
+
+
+def per_call_seconds(validate, path: Path, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        validate(path)
+    return (time.perf_counter() - start) / calls
+
+
+def measure(workdir: Path, root_counts: tuple[int, ...] = DEFAULT_ROOT_COUNTS, calls: int = 2000) -> list[dict[str, Any]]:
+    """Time validation of a path below the last root for each number of roots.
+
+    Returns:
+        Per root count, the microseconds per call of PathValidator and of the naive check
+    """
+    results = []
+    for count in root_counts:
+        roots = [workdir / f"root{i:05d}" for i in range(count)]
+        for root in roots:
+            (root / "src" / "pkg").mkdir(parents=True, exist_ok=True)
+        target = roots[-1] / "src" / "pkg" / "module.py"
+        validator = PathValidator([str(root) for root in roots])
+        # The naive check resolves every root on every call, so it gets fewer calls
+        naive_calls = max(1, calls // count)
+        results.append({
+            "roots": count,
+            "validator_us": per_call_seconds(validator.validate, target, calls) * 1e6,
+            "naive_us": per_call_seconds(lambda path, roots=[str(root) for root in roots]: naive_validate(roots, path), target, naive_calls) * 1e6,
+        })
+    return results
+
+
+@click.command()
+@click.option("--roots", "root_counts", type=click.IntRange(min=1), multiple=True, help="Numbers of allowed roots to measure")
+@click.option("--calls", type=click.IntRange(min=1), default=2000, show_default=True)
+def main(root_counts: tuple[int, ...], calls: int) -> None:
+    """Time path validation against growing numbers of allowed roots"""
+    with tempfile.TemporaryDirectory() as workdir:
+        click.echo(json.dumps(measure(Path(workdir), root_counts or DEFAULT_ROOT_COUNTS, calls), indent=2))
+
+
+if __name__ == "__main__":
+    main()
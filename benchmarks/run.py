@@ -0,0 +1,213 @@
+"""Time every tool against synthetic repositories.
+
+Usage:
+    python -m benchmarks.run --scale small --output results.json
+    python -m benchmarks.run --scale small --baseline results.json --threshold 1.5
+
+Results are written as JSON. With --baseline, cases whose median time grew
+by more than the threshold factor are reported and the exit status is 1.
+The startup case also fails the run if importing the server pulled in a
+module that should only load on first use.
+"""
+
+import asyncio
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import click
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from benchmarks.startup import time_startup
+from benchmarks.synthetic import LARGE_FILE, LAYOUTS, SCALES, Scale, file_path, make_repo, source_lines
+from mcp_server_code_assist.server import create_server
+from mcp_server_code_assist.tools import file_tools as file_tools_module
+from mcp_server_code_assist.tools.dir_tools import DirTools
+from mcp_server_code_assist.tools.file_tools import FileTools
+from mcp_server_code_assist.tools.git_tools import GitTools
+
+RESULTS_VERSION = 1
+STARTUP_CASE = "startup.import_to_ready"
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    # Runs untimed before every repetition, e.g. to restore a modified file
+    setup: Callable[[], Any] | None = None
+
+
+async def time_case(case: Case, repeat: int) -> dict[str, Any]:
+    """Run a case repeat times and summarize the wall clock durations."""
+    timings = []
+    for _ in range(repeat):
+        if case.setup is not None:
+            case.setup()
+        start = time.perf_counter()
+        await case.run()
+        timings.append(time.perf_counter() - start)
+    return {"median": statistics.median(timings), "min": min(timings), "max": max(timings), "runs": len(timings)}
+
+
+def build_cases(repo: Path, scratch: Path, scale: Scale, layout: str, seed: int = 0) -> list[Case]:
+    """Cases for the FileTools, DirTools and GitTools methods of one repository."""
+    file_tools = FileTools([str(repo.parent)])
+    dir_tools = DirTools([str(repo.parent)])
+    git_tools = GitTools([str(repo)])
+    small_file = repo / file_path(layout, 0)
+    large_file = repo / LARGE_FILE
+    some_files = [str(repo / file_path(layout, i)) for i in range(0, min(scale.files, 1000), 10)]
+    package_dir = small_file.parent
+
+    large_original = large_file.read_text()
+    large_rewritten = "".join(source_lines(random.Random(seed + 1), large_original.count("\n")))
+    scratch_large = scratch / "large.py"
+    replacements = {line.strip(): line.strip().upper() for line in large_original.splitlines()[1:2000:10] if line.strip()}
+
+    def restore_large() -> None:
+        scratch_large.write_text(large_original)
+
+    def clear_scratch() -> None:
+        shutil.rmtree(scratch / "edits", ignore_errors=True)
+
+    def cold_tree() -> None:
+        file_tools_module._tree_cache.invalidate()
+
+    edits = [{"op": "create", "path": str(scratch / "edits" / f"file_{i}.py"), "content": "x = 1\n" * 50} for i in range(50)]
+
+    return [
+        Case("file_tools.read_file.small", lambda: file_tools.read_file(str(small_file))),
+        Case("file_tools.read_file.large", lambda: file_tools.read_file(str(large_file))),
+        Case("file_tools.read_file_range.large_tail", lambda: file_tools.read_file_range(str(large_file), start_line=max(1, large_original.count("\n") - 100))),
+        Case("file_tools.read_multiple_files", lambda: file_tools.read_multiple_files(some_files)),
+        Case("file_tools.write_file.large", lambda: file_tools.write_file(str(scratch_large), large_original)),
+        Case("file_tools.create_file", lambda: file_tools.create_file(str(scratch / "created.py"), "x = 1\n")),
+        Case("file_tools.delete_file", lambda: file_tools.delete_file(str(scratch / "created.py")), setup=lambda: (scratch / "created.py").write_text("x = 1\n")),
+        Case("file_tools.modify_file.large", lambda: file_tools.modify_file(str(scratch_large), replacements), setup=restore_large),
+        Case("file_tools.rewrite_file.large", lambda: file_tools.rewrite_file(str(scratch_large), large_rewritten), setup=restore_large),
+        Case("file_tools.apply_edits", lambda: file_tools.apply_edits(edits), setup=clear_scratch),
+        Case("file_tools.file_tree.cold", lambda: file_tools.file_tree(str(repo)), setup=cold_tree),
+        Case("file_tools.file_tree.warm", lambda: file_tools.file_tree(str(repo))),
+        Case("file_tools.search_code.scan", lambda: file_tools.search_code(str(repo), "handler_1(", use_index=False)),
+        Case("file_tools.search_code.indexed", lambda: file_tools.search_code(str(repo), "handler_1(", use_index=True)),
+        Case("dir_tools.list_directory", lambda: dir_tools.list_directory(str(repo))),
+        Case("dir_tools.scan_directory.by_mtime", lambda: dir_tools.scan_directory(str(package_dir), sort_by="mtime")),
+        Case("dir_tools.create_directory", lambda: dir_tools.create_directory(str(scratch / "a" / "b" / "c"))),
+        Case("git_tools.status", lambda: git_tools.status(str(repo))),
+        Case("git_tools.diff.history", lambda: git_tools.diff(str(repo), "HEAD~3")),
+        Case("git_tools.log", lambda: git_tools.log(str(repo), 100)),
+        Case("git_tools.show", lambda: git_tools.show(str(repo), "HEAD")),
+    ]
+
+
+async def run_dispatch_cases(repo: Path, layout: str, repeat: int) -> dict[str, Any]:
+    """Time tool calls end to end through an in-memory MCP client session."""
+    server = create_server(repo)
+    small_file = str(repo / file_path(layout, 0))
+    calls = {
+        "call_tool.read_file": ("read_file", {"path": small_file}),
+        "call_tool.file_tree": ("file_tree", {"path": str(repo)}),
+        "call_tool.list_directory": ("list_directory", {"path": str(repo)}),
+        "call_tool.git_status": ("git_status", {"repo_path": str(repo)}),
+    }
+    results = {}
+    async with create_connected_server_and_client_session(server) as client:
+        results["call_tool.list_tools"] = await time_case(Case("list_tools", client.list_tools), repeat)
+        for name, (tool, arguments) in calls.items():
+            results[name] = await time_case(Case(name, lambda tool=tool, arguments=arguments: client.call_tool(tool, arguments)), repeat)
+    return results
+
+
+async def run_suite(scale_name: str, workdir: Path, layouts: tuple[str, ...] = LAYOUTS, repeat: int = 5, only: str | None = None) -> dict[str, Any]:
+    """Generate (or reuse) the repositories of a scale and time every case.
+
+    Returns:
+        Results keyed by "<layout>/<case>" plus metadata about the run
+    """
+    scale = SCALES[scale_name]
+    results: dict[str, Any] = {}
+    if only is None or only in STARTUP_CASE:
+        results[STARTUP_CASE] = time_startup(repeat)
+    for layout in layouts:
+        repo = make_repo(workdir / f"{scale_name}-{layout}" / "repo", scale, layout)
+        scratch = repo.parent / "scratch"
+        scratch.mkdir(exist_ok=True)
+        for case in build_cases(repo, scratch, scale, layout):
+            if only is None or only in case.name:
+                results[f"{layout}/{case.name}"] = await time_case(case, repeat)
+        for name, result in (await run_dispatch_cases(repo, layout, repeat)).items():
+            if only is None or only in name:
+                results[f"{layout}/{name}"] = result
+    return {
+        "version": RESULTS_VERSION,
+        "scale": scale_name,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+
+
+def find_regressions(current: dict[str, Any], baseline: dict[str, Any], threshold: float = 1.5, min_seconds: float = 0.001) -> list[dict[str, Any]]:
+    """Cases whose median time grew by more than threshold times the baseline.
+
+    Cases faster than min_seconds in both runs are skipped as timer noise.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if result["median"] < min_seconds and before["median"] < min_seconds:
+            continue
+        ratio = result["median"] / max(before["median"], 1e-9)
+        if ratio > threshold:
+            regressions.append({"name": name, "baseline": before["median"], "current": result["median"], "ratio": ratio})
+    return regressions
+
+
+@click.command()
+@click.option("--scale", type=click.Choice(list(SCALES)), default="small", show_default=True)
+@click.option("--layout", "layouts", type=click.Choice(LAYOUTS), multiple=True, help="Layouts to run, defaults to all")
+@click.option("--workdir", type=Path, help="Where synthetic repositories are generated and reused")
+@click.option("--repeat", type=click.IntRange(min=1), default=5, show_default=True)
+@click.option("--only", help="Only run cases whose name contains this text")
+@click.option("--output", "-o", type=Path, help="Write results JSON here instead of stdout")
+@click.option("--baseline", type=Path, help="Results JSON to compare against")
+@click.option("--threshold", type=float, default=1.5, show_default=True, help="Allowed slowdown factor against the baseline")
+def main(scale: str, layouts: tuple[str, ...], workdir: Path | None, repeat: int, only: str | None, output: Path | None, baseline: Path | None, threshold: float) -> None:
+    """Benchmark the code assist tools on synthetic repositories"""
+    workdir = workdir or Path(tempfile.gettempdir()) / "mcp-code-assist-bench"
+    results = asyncio.run(run_suite(scale, workdir, layouts or LAYOUTS, repeat, only))
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if output:
+        output.write_text(text + "\n")
+    else:
+        click.echo(text)
+
+    failed = False
+    eager_modules = results["results"].get(STARTUP_CASE, {}).get("eager_modules")
+    if eager_modules:
+        click.echo(f"EAGER IMPORT at startup: {', '.join(eager_modules)}", err=True)
+        failed = True
+    if baseline:
+        regressions = find_regressions(results, json.loads(baseline.read_text()), threshold)
+        for regression in regressions:
+            click.echo(f"REGRESSION {regression['name']}: {regression['baseline']:.4f}s -> {regression['current']:.4f}s ({regression['ratio']:.2f}x)", err=True)
+        failed = failed or bool(regressions)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
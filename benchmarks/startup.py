@@ -0,0 +1,55 @@
+"""Cold start time of the server, from the first import to a ready tool list.
+
+Every agent session spawns its own server, so each sample runs in a fresh
+interpreter. Heavy modules that only some tools need must stay unimported
+until a call uses them.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any
+
+# Imported on first use by the tools that need them
+LAZY_MODULES = ("git", "xmlschema", "difflib")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from mcp_server_code_assist.server import create_server, tool_definitions
+imported = time.perf_counter()
+server = create_server(None)
+server.create_initialization_options()
+tool_definitions()
+ready = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "ready": ready - start,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def probe_startup() -> dict[str, Any]:
+    """Time one cold start in a fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-c", _PROBE % (LAZY_MODULES,)], capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def time_startup(repeat: int) -> dict[str, Any]:
+    """Summarize repeat cold starts in the format of time_case.
+
+    Returns:
+        Import-to-ready timings plus the lazy modules that were imported anyway
+    """
+    samples = [probe_startup() for _ in range(repeat)]
+    timings = [sample["ready"] for sample in samples]
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "runs": len(timings),
+        "import_median": statistics.median(sample["import"] for sample in samples),
+        "eager_modules": sorted({name for sample in samples for name in sample["loaded"]}),
+    }
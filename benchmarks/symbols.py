@@ -0,0 +1,109 @@
+"""Benchmark of the find_symbol index on a synthetic Python package.
+
+Usage:
+    python -m benchmarks.symbols --modules 20000
+
+Times the first index of the tree, which parses every module in worker
+processes, a query against the warm index, and a query after one module
+changed. The warm query is repeated with a watcher covering the tree, which
+spares the per-file stat.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import click
+
+from mcp_server_code_assist.tools.file_tools import FileTools
+from mcp_server_code_assist.tools.symbols import shutdown_process_pool
+from mcp_server_code_assist.watcher import WatchManager
+
+MODULE_TEMPLATE = '''\
+"""Generated module {i}."""
+
+
+class Model{i}:
+    def load(self, key):
+        return key
+
+    def save(self, key, value):
+        return key, value
+
+
+def helper_{i}(value):
+    return value * {i}
+'''
+
+
+def generate_package(root: Path, modules: int) -> None:
+    """Write modules spread over packages of 100, backdated past the racy window."""
+    then = time.time() - 60
+    for i in range(modules):
+        package = root / f"pkg{i // 100:04d}"
+        package.mkdir(exist_ok=True)
+        path = package / f"mod{i:05d}.py"
+        path.write_text(MODULE_TEMPLATE.format(i=i))
+        os.utime(path, (then, then))
+    for directory in (*root.iterdir(), root):
+        os.utime(directory, (then, then))
+
+
+async def measure(root: Path, modules: int) -> dict[str, Any]:
+    """Time the cold index, warm queries with and without a watcher and a query after an edit, in milliseconds."""
+    generate_package(root, modules)
+    tools = FileTools([str(root)])
+    target = f"Model{modules - 1}.load"
+
+    start = time.perf_counter()
+    result = await tools.find_symbol(str(root), target)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await tools.find_symbol(str(root), target)
+    warm = time.perf_counter() - start
+
+    (root / "pkg0000" / "mod00000.py").write_text(MODULE_TEMPLATE.format(i=0) + "\n\ndef added():\n    pass\n")
+    start = time.perf_counter()
+    await tools.find_symbol(str(root), "added")
+    edited = time.perf_counter() - start
+
+    manager = WatchManager()
+    try:
+        manager.watch(root)
+        # The first query after the watcher started checks every file once
+        await tools.find_symbol(str(root), target)
+        start = time.perf_counter()
+        await tools.find_symbol(str(root), target)
+        watched = time.perf_counter() - start
+    finally:
+        manager.close()
+
+    return {
+        "modules": modules,
+        "cpus": os.cpu_count(),
+        "files_indexed": result["files_indexed"],
+        "cold_ms": cold * 1000,
+        "warm_ms": warm * 1000,
+        "after_edit_ms": edited * 1000,
+        "watched_warm_ms": watched * 1000,
+    }
+
+
+@click.command()
+@click.option("--modules", type=click.IntRange(min=1), default=20000, show_default=True)
+def main(modules: int) -> None:
+    """Time the symbol index on a generated package"""
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            click.echo(json.dumps(asyncio.run(measure(Path(workdir), modules)), indent=2))
+        finally:
+            shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
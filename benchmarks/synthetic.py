@@ -0,0 +1,143 @@
+"""Deterministic synthetic repositories for benchmarks.
+
+Repositories are written with git fast-import, so a scale's files, history
+and commit SHAs are identical on every machine and run.
+"""
+
+import os
+import random
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+LAYOUTS = ("wide", "deep")
+LARGE_FILE = "generated/large.py"
+# Fixed identity and clock so commit SHAs do not depend on the environment
+AUTHOR = "Bench <bench@example.com>"
+EPOCH = 1_700_000_000
+
+
+@dataclass(frozen=True)
+class Scale:
+    files: int
+    commits: int
+    large_file_lines: int
+    lines_per_file: int = 20
+
+
+SCALES = {
+    "tiny": Scale(files=50, commits=5, large_file_lines=2_000),
+    "small": Scale(files=1_000, commits=200, large_file_lines=50_000),
+    "medium": Scale(files=10_000, commits=1_000, large_file_lines=200_000),
+    "large": Scale(files=100_000, commits=5_000, large_file_lines=1_000_000),
+}
+
+_WORDS = [
+    "request",
+    "response",
+    "handler",
+    "config",
+    "value",
+    "result",
+    "buffer",
+    "client",
+    "server",
+    "session",
+    "token",
+    "index",
+    "cache",
+    "parser",
+    "record",
+    "stream",
+]
+
+
+def file_path(layout: str, i: int) -> str:
+    """Relative path of the i-th file of a layout.
+
+    wide puts 100 files in each of many top level packages, deep nests every
+    file eight directories down.
+    """
+    if layout == "wide":
+        return f"pkg{i // 100:04d}/module_{i}.py"
+    if layout == "deep":
+        digits = f"{i:08d}"
+        return "/".join(f"d{digit}" for digit in digits[:-1]) + f"/module_{i}.py"
+    raise ValueError(f"Unknown layout: {layout}. Expected one of {', '.join(LAYOUTS)}")
+
+
+def source_lines(rng: random.Random, count: int, start: int = 0) -> list[str]:
+    """Python-looking lines with identifiers drawn from a small vocabulary."""
+    lines = []
+    for n in range(start, start + count):
+        if n % 10 == 0:
+            lines.append(f"def {rng.choice(_WORDS)}_{n}({rng.choice(_WORDS)}):\n")
+        else:
+            lines.append(f"    {rng.choice(_WORDS)}_{rng.randrange(1000)} = {rng.choice(_WORDS)}({rng.randrange(1000)})\n")
+    return lines
+
+
+def make_repo(root: Path, scale: Scale, layout: str, seed: int = 0) -> Path:
+    """Generate a repository at root, reusing it if it was generated before.
+
+    The first commit adds every file plus one large file, and each further
+    commit rewrites a few files so that git log and diff have history to walk.
+
+    Returns:
+        Root of the checked out working tree
+    """
+    marker = root / ".git" / "bench-complete"
+    if marker.exists():
+        return root
+    root.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q", "-b", "main", str(root)], check=True)
+    proc = subprocess.Popen(["git", "-C", str(root), "fast-import", "--quiet"], stdin=subprocess.PIPE)
+    try:
+        _write_history(proc.stdin, scale, layout, random.Random(seed))
+    finally:
+        proc.stdin.close()
+    if proc.wait() != 0:
+        raise RuntimeError(f"git fast-import failed for {root}")
+    subprocess.run(["git", "-C", str(root), "checkout", "-q", "-f", "main"], check=True)
+    _age_tree(root)
+    marker.touch()
+    return root
+
+
+def _age_tree(root: Path) -> None:
+    """Backdate the working tree so caches do not treat it as just modified.
+
+    Freshly written files fall inside the racy mtime window of the tree cache
+    and git's own index, which would make every warm run a cold one.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        if ".git" in dirnames:
+            dirnames.remove(".git")
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (EPOCH, EPOCH))
+        os.utime(dirpath, (EPOCH, EPOCH))
+    subprocess.run(["git", "-C", str(root), "update-index", "-q", "--refresh"], check=True)
+    # The index must be newer than the files it describes to not be racily clean
+    os.utime(root / ".git" / "index", (EPOCH + 60, EPOCH + 60))
+
+
+def _write_history(out, scale: Scale, layout: str, rng: random.Random) -> None:
+    def commit(n: int, message: str, changes: dict[str, str]) -> None:
+        when = f"{EPOCH + n * 60} +0000"
+        msg = message.encode()
+        out.write(f"commit refs/heads/main\ncommitter {AUTHOR} {when}\ndata {len(msg)}\n".encode() + msg + b"\n")
+        for path, content in changes.items():
+            data = content.encode()
+            out.write(f"M 100644 inline {path}\ndata {len(data)}\n".encode() + data + b"\n")
+        out.write(b"\n")
+
+    files = {file_path(layout, i): "".join(source_lines(rng, scale.lines_per_file)) for i in range(scale.files)}
+    files[LARGE_FILE] = "".join(source_lines(rng, scale.large_file_lines))
+    files[".gitignore"] = "*.pyc\n__pycache__/\n"
+    commit(0, "Initial commit", files)
+    for n in range(1, scale.commits):
+        changes = {}
+        for _ in range(3):
+            i = rng.randrange(scale.files)
+            changes[file_path(layout, i)] = "".join(source_lines(rng, scale.lines_per_file, start=n))
+        commit(n, f"Change {n}", changes)
@@ -4,13 +4,44 @@ from pathlib import Path
 
 import click
 
+from .base_tools import configure_workers
+from .metrics import METRICS_FORMATS, get_metrics
 from .server import serve
+from .tools.read_cache import configure_read_cache
+from .tools.result_cache import configure_result_cache
+from .tools.tools_manager import DEFAULT_MAX_WORKSPACES, configure_tool_registry
+from .watcher import WATCH_BACKENDS
 
 
 @click.command()
 @click.option("--working-dir", "-w", type=Path, help="Working directory path")
+@click.option("--workers", type=click.IntRange(min=1), help="Worker threads for blocking file and git operations")
+@click.option("--slow-call-ms", type=click.FloatRange(min=0), default=1000.0, show_default=True, help="Log tool calls slower than this")
+@click.option("--metrics-file", type=Path, help="Periodically write tool metrics to this file")
+@click.option("--metrics-format", type=click.Choice(METRICS_FORMATS), default="json", show_default=True, help="Format of the metrics file")
+@click.option("--metrics-interval", type=click.FloatRange(min=1), default=60.0, show_default=True, help="Seconds between metrics file writes")
+@click.option("--read-cache-mb", type=click.IntRange(min=0), default=32, show_default=True, help="Memory for cached file contents, 0 disables the cache")
+@click.option("--git-cache-mb", type=click.IntRange(min=0), default=64, show_default=True, help="Memory for cached results of immutable git queries")
+@click.option("--git-cache-file", type=Path, help="SQLite file persisting cached git results across restarts")
+@click.option("--max-workspaces", type=click.IntRange(min=1), default=DEFAULT_MAX_WORKSPACES, show_default=True, help="Repositories whose tool instances are kept between calls")
+@click.option("--watch", type=click.Choice(WATCH_BACKENDS), default="auto", show_default=True, help="How to watch workspaces for changes, auto uses inotify where available")
+@click.option("--watch-debounce-ms", type=click.FloatRange(min=0), default=200.0, show_default=True, help="Quiet time before watched changes are published")
 @click.option("-v", "--verbose", count=True)
-def main(working_dir: Path | None, verbose: bool) -> None:
+def main(
+    working_dir: Path | None,
+    workers: int | None,
+    slow_call_ms: float,
+    metrics_file: Path | None,
+    metrics_format: str,
+    metrics_interval: float,
+    read_cache_mb: int,
+    git_cache_mb: int,
+    git_cache_file: Path | None,
+    max_workspaces: int,
+    watch: str,
+    watch_debounce_ms: float,
+    verbose: bool,
+) -> None:
     """MCP Code Assist Server - Code operations for MCP"""
     import asyncio
 
@@ -21,7 +52,12 @@ def main(working_dir: Path | None, verbose: bool) -> None:
         logging_level = logging.DEBUG
 
     logging.basicConfig(level=logging_level, stream=sys.stderr)
-    asyncio.run(serve(working_dir))
+    configure_workers(workers)
+    get_metrics().slow_call_seconds = slow_call_ms / 1000
+    configure_read_cache(read_cache_mb << 20)
+    configure_result_cache(git_cache_mb << 20, git_cache_file)
+    configure_tool_registry(max_workspaces)
+    asyncio.run(serve(working_dir, metrics_file, metrics_format, metrics_interval, watch, watch_debounce_ms / 1000))
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
 from mcp_server_code_assist import main
 
-main()
+if __name__ == "__main__":
+    main()
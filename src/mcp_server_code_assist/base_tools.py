@@ -1,16 +1,63 @@
+import asyncio
+import functools
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, TypeVar
+
+from mcp_server_code_assist.path_validator import get_path_validator
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_max_workers: int | None = None
+
+
+def configure_workers(max_workers: int | None) -> None:
+    """Set the size of the worker pool used for blocking tool operations.
+
+    Args:
+        max_workers: Number of worker threads, or None for the executor default
+    """
+    global _max_workers
+    shutdown_workers()
+    _max_workers = max_workers
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get or create the shared worker pool."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="code-assist")
+    return _executor
+
+
+def shutdown_workers() -> None:
+    """Shut down the shared worker pool, waiting for running operations."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
 
 
 class BaseTools(ABC):
     def __init__(self, allowed_paths: list[str] | None = None):
         self.allowed_paths = allowed_paths or []
+        self.path_validator = get_path_validator(self.allowed_paths)
 
     def validate_path(self, path: str | Path) -> Path:
-        path = Path(path).resolve()
-        if not self.allowed_paths or any(path.is_relative_to(Path(allowed).resolve()) for allowed in self.allowed_paths):
-            return path
-        raise ValueError(f"Path {path} is not in allowed paths: {self.allowed_paths}")
+        """Resolve path and check that it lies below one of the allowed paths.
+
+        Raises:
+            ValueError: If path is outside every allowed path
+        """
+        return self.path_validator.validate(path)
+
+    async def run_blocking(self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Run blocking work on the worker pool without stalling the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
 
     @abstractmethod
     def is_valid_operation(self, path: Path) -> bool:
@@ -0,0 +1,130 @@
+"""Dependency-aware concurrent execution of instruction batches."""
+
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+READ_TYPES = frozenset({"read_file"})
+WRITE_TYPES = frozenset({"create_file", "modify_file", "rewrite_file", "delete_file"})
+# Instructions that read everything below their path
+TREE_READ_TYPES = frozenset({"file_tree", "search_code", "list_directory"})
+GIT_TYPES = frozenset({"git_status", "git_diff", "git_log", "git_show"})
+DEFAULT_BATCH_CONCURRENCY = 8
+
+
+@dataclass
+class Access:
+    """Paths one instruction reads and writes."""
+
+    reads: set[str] = field(default_factory=set)
+    writes: set[str] = field(default_factory=set)
+    tree_reads: set[str] = field(default_factory=set)
+
+
+def _is_under(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def instruction_access(instruction: dict[str, Any], repo_path: str | Path) -> Access:
+    """Work out which paths an instruction touches.
+
+    Git instructions read the whole repository, so they wait for pending
+    writes inside it. Unknown or malformed instructions touch nothing and
+    fail on their own when run.
+    """
+    kind = instruction.get("type")
+    access = Access()
+    try:
+        if kind in READ_TYPES:
+            access.reads.add(os.path.abspath(instruction["path"]))
+        elif kind == "read_multiple":
+            access.reads.update(os.path.abspath(path) for path in instruction["paths"])
+        elif kind in WRITE_TYPES:
+            access.writes.add(os.path.abspath(instruction["path"]))
+        elif kind == "apply_edits":
+            access.writes.update(os.path.abspath(edit["path"]) for edit in instruction["edits"])
+        elif kind in TREE_READ_TYPES:
+            access.tree_reads.add(os.path.abspath(instruction["path"]))
+        elif kind in GIT_TYPES:
+            access.tree_reads.add(os.path.abspath(repo_path))
+    except (KeyError, TypeError):
+        pass
+    return access
+
+
+def plan_dependencies(accesses: list[Access]) -> list[set[int]]:
+    """Find the earlier instructions each instruction has to wait for.
+
+    Reads wait for the last write to the same path, writes wait for the last
+    write and every read since, and tree reads wait for the last write of
+    every path below them. Anything else runs concurrently.
+
+    Returns:
+        Indexes of the prerequisites of each instruction
+    """
+    last_write: dict[str, int] = {}
+    reads_since_write: dict[str, list[int]] = {}
+    tree_reads: list[tuple[str, int]] = []
+    dependencies = []
+    for index, access in enumerate(accesses):
+        deps = set()
+        for path in access.reads:
+            if path in last_write:
+                deps.add(last_write[path])
+        for root in access.tree_reads:
+            deps.update(writer for path, writer in last_write.items() if _is_under(path, root))
+        for path in access.writes:
+            if path in last_write:
+                deps.add(last_write[path])
+            deps.update(reads_since_write.get(path, ()))
+            deps.update(reader for root, reader in tree_reads if _is_under(path, root))
+        for path in access.reads:
+            reads_since_write.setdefault(path, []).append(index)
+        for path in access.writes:
+            last_write[path] = index
+            reads_since_write[path] = []
+        tree_reads.extend((root, index) for root in access.tree_reads)
+        deps.discard(index)
+        dependencies.append(deps)
+    return dependencies
+
+
+async def run_batch(
+    instructions: list[dict[str, Any]],
+    run: Callable[[dict[str, Any]], Awaitable[dict[str, Any]]],
+    repo_path: str | Path,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+) -> list[dict[str, Any]]:
+    """Run instructions concurrently while keeping conflicting ones in order.
+
+    Args:
+        instructions: Instructions in plan order
+        run: Coroutine function executing one instruction
+        repo_path: Repository the instructions operate on
+        max_concurrency: Maximum instructions running at once
+
+    Returns:
+        One entry per instruction in input order, with its result, the seconds
+        it ran and the seconds it waited for prerequisites and a free slot
+    """
+    dependencies = plan_dependencies([instruction_access(instruction, repo_path) for instruction in instructions])
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks: list[asyncio.Task] = []
+
+    async def execute(index: int) -> dict[str, Any]:
+        queued = time.perf_counter()
+        # Prerequisites always have lower indexes, so their tasks already exist
+        await asyncio.gather(*(tasks[dep] for dep in dependencies[index]))
+        async with semaphore:
+            start = time.perf_counter()
+            result = await run(instructions[index])
+            end = time.perf_counter()
+        return {"result": result, "seconds": end - start, "waited_seconds": start - queued}
+
+    for index in range(len(instructions)):
+        tasks.append(asyncio.create_task(execute(index)))
+    return list(await asyncio.gather(*tasks))
@@ -0,0 +1,169 @@
+"""Per-tool latency, call, error and response size metrics."""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets, Prometheus style
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_FORMATS = ("json", "prometheus")
+
+
+class ToolStats:
+    """Counters and latency histogram of one tool."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.response_bytes = 0
+        self.max_response_bytes = 0
+        # One count per bucket plus the +Inf overflow bucket
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, seconds: float, response_bytes: int, error: bool) -> None:
+        self.calls += 1
+        self.errors += error
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.response_bytes += response_bytes
+        self.max_response_bytes = max(self.max_response_bytes, response_bytes)
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a latency quantile as the upper bound of its bucket."""
+        if not self.calls:
+            return None
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max_seconds
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99),
+            "response_bytes": self.response_bytes,
+            "max_response_bytes": self.max_response_bytes,
+            "buckets": {str(bound): count for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), self.buckets)},
+        }
+
+
+class Metrics:
+    """Thread safe registry of tool stats with slow call logging.
+
+    Args:
+        slow_call_seconds: Calls taking at least this long are logged as warnings, None disables logging
+    """
+
+    def __init__(self, slow_call_seconds: float | None = 1.0):
+        self.slow_call_seconds = slow_call_seconds
+        self.started = time.time()
+        self._tools: dict[str, ToolStats] = {}
+        self._caches: dict[str, Callable[[], dict[str, int]]] = {}
+        self._lock = threading.Lock()
+
+    def register_cache(self, name: str, stats: Callable[[], dict[str, int]]) -> None:
+        """Report the counters returned by stats under name in every snapshot."""
+        with self._lock:
+            self._caches[name] = stats
+
+    def record(self, tool: str, seconds: float, response_bytes: int = 0, error: bool = False) -> None:
+        """Record one finished tool call."""
+        with self._lock:
+            stats = self._tools.get(tool)
+            if stats is None:
+                stats = self._tools[tool] = ToolStats()
+            stats.record(seconds, response_bytes, error)
+        if self.slow_call_seconds is not None and seconds >= self.slow_call_seconds:
+            logger.warning("Slow tool call: %s took %.3fs (%d response bytes%s)", tool, seconds, response_bytes, ", failed" if error else "")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tools.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current stats of every tool as plain data."""
+        with self._lock:
+            tools = {name: stats.to_dict() for name, stats in sorted(self._tools.items())}
+            caches = sorted(self._caches.items())
+        return {"uptime_seconds": time.time() - self.started, "tools": tools, "caches": {name: stats() for name, stats in caches}}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render the stats in the Prometheus text exposition format."""
+        with self._lock:
+            tools = sorted((name, stats.to_dict()) for name, stats in self._tools.items())
+            caches = sorted(self._caches.items())
+        lines = [
+            "# HELP code_assist_tool_calls_total Tool calls by tool name.",
+            "# TYPE code_assist_tool_calls_total counter",
+            *(f'code_assist_tool_calls_total{{tool="{name}"}} {stats["calls"]}' for name, stats in tools),
+            "# HELP code_assist_tool_errors_total Failed tool calls by tool name.",
+            "# TYPE code_assist_tool_errors_total counter",
+            *(f'code_assist_tool_errors_total{{tool="{name}"}} {stats["errors"]}' for name, stats in tools),
+            "# HELP code_assist_tool_response_bytes_total Bytes of tool responses by tool name.",
+            "# TYPE code_assist_tool_response_bytes_total counter",
+            *(f'code_assist_tool_response_bytes_total{{tool="{name}"}} {stats["response_bytes"]}' for name, stats in tools),
+            "# HELP code_assist_tool_duration_seconds Tool call latency.",
+            "# TYPE code_assist_tool_duration_seconds histogram",
+        ]
+        for name, stats in tools:
+            cumulative = 0
+            for bound, count in stats["buckets"].items():
+                cumulative += count
+                lines.append(f'code_assist_tool_duration_seconds_bucket{{tool="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'code_assist_tool_duration_seconds_sum{{tool="{name}"}} {stats["total_seconds"]}')
+            lines.append(f'code_assist_tool_duration_seconds_count{{tool="{name}"}} {stats["calls"]}')
+        for name, stats in caches:
+            for counter, value in stats().items():
+                lines.append(f'code_assist_cache_{counter}{{cache="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def render(self, fmt: str = "json") -> str:
+        if fmt not in METRICS_FORMATS:
+            raise ValueError(f"Unknown metrics format: {fmt}. Expected one of {', '.join(METRICS_FORMATS)}")
+        return self.to_prometheus() if fmt == "prometheus" else self.to_json()
+
+    def dump(self, path: str | Path, fmt: str = "json") -> None:
+        """Atomically write the stats to a file, e.g. for a node exporter textfile collector."""
+        path = Path(path)
+        text = self.render(fmt)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.replace(temp_name, path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Get the process wide metrics registry."""
+    return _metrics
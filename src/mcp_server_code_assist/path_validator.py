@@ -0,0 +1,109 @@
+"""Validation of tool paths against the allowed roots."""
+
+import functools
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Marks a trie node that is an allowed root itself
+_ROOT = ""
+
+
+class PathValidator:
+    """Checks that paths resolve to somewhere below one of a set of roots.
+
+    Roots are resolved once and stored in a trie of path components, so a
+    check costs O(depth) no matter how many roots there are. Symlinks in a
+    path's parent directories are resolved once per directory and cached;
+    an entry is reused only while the directory still stats to the same
+    device and inode, so replacing a directory with a symlink is noticed.
+
+    Args:
+        roots: Allowed directories. With no roots every path is rejected
+        max_dirs: Number of resolved directories to cache
+    """
+
+    def __init__(self, roots: list[str] | tuple[str, ...], max_dirs: int = 4096):
+        self.roots = tuple(str(Path(root).resolve()) for root in roots)
+        self.max_dirs = max_dirs
+        self._trie: dict = {}
+        for root in self.roots:
+            node = self._trie
+            for part in _components(root):
+                node = node.setdefault(part, {})
+            node[_ROOT] = True
+        self._dirs: OrderedDict[str, tuple[tuple[int, int], str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def validate(self, path: str | Path) -> Path:
+        """Resolve path and check that it lies below an allowed root.
+
+        Returns:
+            Absolute path with every symlink resolved
+
+        Raises:
+            ValueError: If path is outside every allowed root
+        """
+        resolved = self.resolve(path)
+        if not self.is_allowed(resolved):
+            raise ValueError(f"Path {path} is outside allowed directories: {', '.join(self.roots)}")
+        return Path(resolved)
+
+    def is_allowed(self, resolved: str) -> bool:
+        """Whether an already resolved absolute path lies below an allowed root."""
+        node = self._trie
+        if _ROOT in node:
+            return True
+        for part in _components(resolved):
+            node = node.get(part)
+            if node is None:
+                return False
+            if _ROOT in node:
+                return True
+        return False
+
+    def resolve(self, path: str | Path) -> str:
+        """Like os.path.realpath, but with the parent directory resolution cached."""
+        abs_path = os.path.abspath(path)
+        parent, name = os.path.split(abs_path)
+        if not name:
+            return self._resolve_dir(parent)
+        resolved = os.path.join(self._resolve_dir(parent), name)
+        if os.path.islink(resolved):
+            return os.path.realpath(resolved)
+        return resolved
+
+    def _resolve_dir(self, directory: str) -> str:
+        try:
+            st = os.stat(directory)
+        except OSError:
+            # Not created yet, nothing to cache
+            return os.path.realpath(directory)
+        identity = (st.st_dev, st.st_ino)
+        with self._lock:
+            entry = self._dirs.get(directory)
+            if entry is not None and entry[0] == identity:
+                self._dirs.move_to_end(directory)
+                return entry[1]
+        resolved = os.path.realpath(directory)
+        with self._lock:
+            self._dirs[directory] = (identity, resolved)
+            self._dirs.move_to_end(directory)
+            while len(self._dirs) > self.max_dirs:
+                self._dirs.popitem(last=False)
+        return resolved
+
+
+def _components(path: str) -> list[str]:
+    return [part for part in path.split(os.sep) if part]
+
+
+@functools.lru_cache(maxsize=64)
+def _validator_for(roots: tuple[str, ...]) -> PathValidator:
+    return PathValidator(roots)
+
+
+def get_path_validator(roots: list[str] | tuple[str, ...]) -> PathValidator:
+    """Get the shared validator of a set of roots, so each root is resolved only once."""
+    return _validator_for(tuple(roots))
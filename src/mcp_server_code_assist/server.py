@@ -1,14 +1,63 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import IO, Any
+from urllib.parse import unquote, urlsplit
 
 from mcp.server import Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.server.session import ServerSession
 from mcp.server.stdio import stdio_server
-from mcp.types import GetPromptResult, Prompt, TextContent, Tool
+from mcp.types import GetPromptResult, Prompt, Resource, TextContent, Tool
+from pydantic import AnyUrl
 
+from mcp_server_code_assist.base_tools import shutdown_workers
+from mcp_server_code_assist.batch import DEFAULT_BATCH_CONCURRENCY, run_batch
+from mcp_server_code_assist.metrics import get_metrics
 from mcp_server_code_assist.prompts.prompt_manager import get_prompts, handle_prompt
-from mcp_server_code_assist.tools.models import CreateDirectory, FileCreate, FileDelete, FileModify, FileRead, FileRewrite, FileTree, GitDiff, GitLog, GitShow, GitStatus, ListDirectory
-from mcp_server_code_assist.tools.tools_manager import get_dir_tools, get_file_tools, get_git_tools
+from mcp_server_code_assist.tools.dir_tools import render_listing
+from mcp_server_code_assist.tools.file_tools import drop_changed_trees
+from mcp_server_code_assist.tools.models import (
+    ApplyEdits,
+    CodeOutline,
+    CreateDirectory,
+    FileCreate,
+    FileDelete,
+    FileModify,
+    FileRead,
+    FileReadMultiple,
+    FileRewrite,
+    FileTree,
+    FindSymbol,
+    GitBlame,
+    GitDiff,
+    GitLog,
+    GitShow,
+    GitStatus,
+    ListDirectory,
+    SearchCode,
+    ServerStats,
+)
+from mcp_server_code_assist.tools.read_cache import drop_changed_reads, get_read_cache
+from mcp_server_code_assist.tools.repo_pool import get_repo_pool
+from mcp_server_code_assist.tools.result_cache import get_result_cache
+from mcp_server_code_assist.tools.symbols import shutdown_process_pool
+from mcp_server_code_assist.tools.tools_manager import Workspace, get_tool_registry
+from mcp_server_code_assist.watcher import DEFAULT_DEBOUNCE, Invalidation, WatchManager, get_invalidation_bus, is_within
+from mcp_server_code_assist.xml_parser import XMLProcessor
+
+logger = logging.getLogger(__name__)
+
+STATS_URI = "stats://server"
+# Resources of watched workspace roots, e.g. tree:///path/to/repo
+TREE_SCHEME = "tree"
+GIT_STATUS_SCHEME = "git-status"
 
 
 class CodeAssistTools(str, Enum):
@@ -21,124 +70,309 @@ class CodeAssistTools(str, Enum):
     DELETE_FILE = "delete_file"
     MODIFY_FILE = "modify_file"
     REWRITE_FILE = "rewrite_file"
+    APPLY_EDITS = "apply_edits"
     READ_FILE = "read_file"
+    READ_MULTIPLE_FILES = "read_multiple_files"
     FILE_TREE = "file_tree"
+    SEARCH_CODE = "search_code"
+    CODE_OUTLINE = "code_outline"
+    FIND_SYMBOL = "find_symbol"
 
     # Git operations
     GIT_STATUS = "git_status"
     GIT_DIFF = "git_diff"
     GIT_LOG = "git_log"
     GIT_SHOW = "git_show"
+    GIT_BLAME = "git_blame"
+
+    # Server
+    SERVER_STATS = "server_stats"
+
+
+GIT_TOOLS = frozenset({CodeAssistTools.GIT_STATUS, CodeAssistTools.GIT_DIFF, CodeAssistTools.GIT_LOG, CodeAssistTools.GIT_SHOW, CodeAssistTools.GIT_BLAME})
+
+
+@functools.cache
+def tool_definitions() -> tuple[Tool, ...]:
+    """Every tool with its input schema, built once per process."""
+    return (
+        # Directory operations
+        Tool(
+            name=CodeAssistTools.LIST_DIRECTORY,
+            description="Lists directory entries with type, size, mtime and mode, with optional sorting, glob filtering and offset/limit paging, as text or JSON",
+            inputSchema=ListDirectory.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.CREATE_DIRECTORY,
+            description="Creates a new directory",
+            inputSchema=CreateDirectory.model_json_schema(),
+        ),
+        # File operations
+        Tool(
+            name=CodeAssistTools.CREATE_FILE,
+            description="Creates a new file with content",
+            inputSchema=FileCreate.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.DELETE_FILE,
+            description="Deletes a file",
+            inputSchema=FileDelete.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.MODIFY_FILE,
+            description="Modifies parts of a file using literal string replacements applied in one pass, reporting matches per key. require_unique fails unless every key matches once",
+            inputSchema=FileModify.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.REWRITE_FILE,
+            description="Rewrites entire file content",
+            inputSchema=FileRewrite.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.APPLY_EDITS,
+            description="Applies create, rewrite, modify and delete edits across files as one atomic batch and returns one combined diff",
+            inputSchema=ApplyEdits.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.READ_FILE,
+            description="Reads file content, optionally a byte range (offset/length) or line range (start_line/end_line) reported with the file's total size and line count",
+            inputSchema=FileRead.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.READ_MULTIPLE_FILES,
+            description="Reads several files concurrently in one call, returning each file's content or error within a total byte budget",
+            inputSchema=FileReadMultiple.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.FILE_TREE,
+            description="Lists directory tree structure with git tracking support",
+            inputSchema=FileTree.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.SEARCH_CODE,
+            description="Searches file contents for literal text or a regex, honoring git tracking and gitignore rules, with per-file match caps and offset/limit paging",
+            inputSchema=SearchCode.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.CODE_OUTLINE,
+            description="Lists the classes, functions and methods of a Python file with their line spans",
+            inputSchema=CodeOutline.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.FIND_SYMBOL,
+            description="Finds Python class, function and method definitions below a directory by name or Class.method, using an incrementally updated index",
+            inputSchema=FindSymbol.model_json_schema(),
+        ),
+        # Git operations
+        Tool(
+            name=CodeAssistTools.GIT_STATUS,
+            description="Shows git repository status",
+            inputSchema=GitStatus.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.GIT_DIFF,
+            description="Shows git diff against a revision or an A..B range as a patch, per-file line counts (stat) or changed paths (name_only), limited to paths or paged by max_bytes with a cursor",
+            inputSchema=GitDiff.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.GIT_LOG,
+            description="Shows git commit history filtered by paths, author and date range, in full or oneline format. Long histories are paged with skip or the returned cursor",
+            inputSchema=GitLog.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.GIT_SHOW,
+            description="Shows git commit details",
+            inputSchema=GitShow.model_json_schema(),
+        ),
+        Tool(
+            name=CodeAssistTools.GIT_BLAME,
+            description="Shows who last changed each line of a file or a start_line-end_line range, with commit, author, date and summary per line, as text or JSON",
+            inputSchema=GitBlame.model_json_schema(),
+        ),
+        # Server
+        Tool(
+            name=CodeAssistTools.SERVER_STATS,
+            description="Shows per-tool call counts, error counts, latency percentiles and histograms, and response sizes as JSON or Prometheus text",
+            inputSchema=ServerStats.model_json_schema(),
+        ),
+    )
+
+
+def render_blame(lines: list[dict[str, Any]]) -> str:
+    return "\n".join(f"{line['commit'][:12]} ({line['author']} {line['date']} {line['line']}) {line['content']}" for line in lines)
+
+
+def render_search_results(result: dict[str, Any]) -> str:
+    lines = [f"{match['path']}:{match['line']}:{match['column']}: {match['text']}" for match in result["matches"]]
+    if not lines:
+        lines.append("No matches found")
+    if result["next_offset"] is not None:
+        lines.append(f"More matches available, continue with offset={result['next_offset']}")
+    return "\n".join(lines)
+
+
+def render_outline(symbols: list[dict[str, Any]]) -> str:
+    lines = [f"{'    ' * symbol['depth']}{symbol['kind']} {symbol['name']} {symbol['line']}-{symbol['end_line']}" for symbol in symbols]
+    return "\n".join(lines) if lines else "No definitions found"
+
 
+def render_symbols(result: dict[str, Any]) -> str:
+    lines = [f"{match['path']}:{match['line']}-{match['end_line']}: {match['kind']} {match['qualname']}" for match in result["matches"]]
+    if not lines:
+        lines.append("No definitions found")
+    if result["next_offset"] is not None:
+        lines.append(f"More definitions available, continue with offset={result['next_offset']}")
+    return "\n".join(lines)
 
-async def process_instruction(instruction: dict[str, Any], repo_path: Path) -> dict[str, Any]:
-    file_tools = get_file_tools([str(repo_path)])
-    dir_tools = get_dir_tools([str(repo_path)])
-    git_tools = get_git_tools([str(repo_path)])
+
+async def process_instruction(instruction: dict[str, Any], repo_path: Path, tools: Workspace | None = None) -> dict[str, Any]:
     try:
+        tools = tools or get_tool_registry().workspace([str(repo_path)])
+        file_tools = tools.file
+        dir_tools = tools.dir
         match instruction["type"]:
             case "read_file":
-                return {"content": await file_tools.read_file(instruction["path"])}
+                model = FileRead(**instruction)
+                if model.is_ranged:
+                    return await file_tools.read_file_range(model.path, model.offset, model.length, model.start_line, model.end_line)
+                return {"content": await file_tools.read_file(model.path)}
             case "read_multiple":
-                return {"contents": await file_tools.read_multiple_files(instruction["paths"])}
+                model = FileReadMultiple(**instruction)
+                return {"contents": await file_tools.read_multiple_files(model.paths, model.max_concurrency, model.max_bytes)}
             case "create_file":
                 return {"message": await file_tools.create_file(instruction["path"], instruction["content"])}
             case "modify_file":
-                return {"diff": await file_tools.modify_file(instruction["path"], instruction["replacements"])}
+                model = FileModify(**instruction)
+                return await file_tools.replace_in_file(model.path, model.replacements, model.require_unique, model.stat_only)
             case "rewrite_file":
-                return {"diff": await file_tools.rewrite_file(instruction["path"], instruction["content"])}
+                model = FileRewrite(**instruction)
+                return {"diff": await file_tools.rewrite_file(model.path, model.content, model.stat_only)}
+            case "apply_edits":
+                model = ApplyEdits(**instruction)
+                return await file_tools.apply_edits([edit.model_dump(exclude_none=True) for edit in model.edits], model.stat_only)
             case "delete_file":
                 return {"message": await file_tools.delete_file(instruction["path"])}
             case "file_tree":
-                tree, dirs, files = await file_tools.file_tree(instruction["path"])
-                return {"tree": tree, "directories": dirs, "files": files}
+                return {"tree": await file_tools.file_tree(instruction["path"])}
+            case "search_code":
+                model = SearchCode(**instruction)
+                return await file_tools.search_code(model.path, model.query, model.regex, model.case_sensitive, model.glob, model.max_matches_per_file, model.offset, model.limit, model.use_index)
             case "list_directory":
-                return {"content": await dir_tools.list_directory(instruction["path"])}
+                model = ListDirectory(**instruction)
+                listing = await dir_tools.scan_directory(model.path, model.sort_by, model.reverse, model.pattern, model.offset, model.limit)
+                return {"content": render_listing(listing), **listing}
             case "git_status":
-                return {"status": git_tools.status(str(repo_path))}
+                return {"status": await tools.git.status(str(repo_path))}
             case "git_diff":
-                return {"diff": git_tools.diff(str(repo_path), instruction.get("target"))}
+                model = GitDiff(**{**instruction, "repo_path": str(repo_path)})
+                return {"diff": await tools.git.diff(model.repo_path, model.target, model.mode, model.paths, model.max_bytes, model.cursor)}
             case "git_log":
-                return {"log": git_tools.log(str(repo_path), instruction.get("max_count", 10))}
+                model = GitLog(**{**instruction, "repo_path": str(repo_path)})
+                log = await tools.git.log(model.repo_path, model.max_count, model.skip, model.cursor, model.paths, model.author, model.since, model.until, model.revision, model.format)
+                return {"log": log}
+            case "git_blame":
+                model = GitBlame(**{**instruction, "repo_path": str(repo_path)})
+                return {"blame": await tools.git.blame(model.repo_path, model.path, model.start_line, model.end_line, model.revision)}
             case "git_show":
-                return {"show": git_tools.show(str(repo_path), instruction["commit"])}
+                model = GitShow(**{**instruction, "repo_path": str(repo_path)})
+                return {"show": await tools.git.show(model.repo_path, model.revision)}
             case _:
                 raise ValueError(f"Unknown instruction type: {instruction['type']}")
     except Exception as e:
         return {"error": str(e)}
 
 
-async def serve(working_dir: Path | None) -> None:
+async def process_batch(instructions: list[dict[str, Any]], repo_path: Path, max_concurrency: int = DEFAULT_BATCH_CONCURRENCY) -> list[dict[str, Any]]:
+    """Run a batch of instructions concurrently on shared tool instances.
+
+    Reads of different files run in parallel, while writes to a path wait for
+    earlier reads and writes of it, and git instructions wait for pending
+    writes in the repository.
+
+    Args:
+        instructions: Instructions in plan order, each in the format of process_instruction
+        repo_path: Repository the instructions operate on
+        max_concurrency: Maximum instructions running at once
+
+    Returns:
+        Per instruction, in input order, {"result", "seconds", "waited_seconds"}
+    """
+    tools = get_tool_registry().workspace([str(repo_path)])
+    return await run_batch(instructions, lambda instruction: process_instruction(instruction, repo_path, tools), repo_path, max_concurrency)
+
+
+async def process_xml_instructions(source: str | Path | IO, repo_path: Path) -> AsyncIterator[dict[str, Any]]:
+    """Validate and run the instructions of an XML document one at a time.
+
+    Args:
+        source: Path or file object of a document with one or many <instruction> elements
+        repo_path: Repository the instructions operate on
+
+    Yields:
+        Result of process_instruction for each instruction, in document order
+    """
+    processor = XMLProcessor()
+    tools = get_tool_registry().workspace([str(repo_path)])
+    for data in processor.iterparse(source):
+        yield await process_instruction(processor.to_instruction(data), repo_path, tools)
+
+
+def workspace_uri(scheme: str, root: str) -> str:
+    return f"{scheme}://{root}"
+
+
+def parse_workspace_uri(uri: AnyUrl | str) -> tuple[str, str]:
+    """Split a workspace resource URI into its scheme and root directory."""
+    parts = urlsplit(str(uri))
+    return parts.scheme, unquote(parts.path)
+
+
+def create_server(working_dir: Path | None, watcher: WatchManager | None = None) -> Server:
+    """Create the MCP server with every tool and prompt handler registered.
+
+    Args:
+        working_dir: Directory tools may operate on when a call names no repo_path
+        watcher: Watches the workspace roots tools are called on. Their trees
+            and git status are then offered as resources that clients can
+            subscribe to for update notifications
+
+    Returns:
+        Server ready to run over any transport
+    """
     server = Server("mcp-code-assist")
     allowed_paths = [str(working_dir)] if working_dir else []
+    metrics = get_metrics()
+    metrics.register_cache("git_results", lambda: get_result_cache().stats())
+    metrics.register_cache("file_reads", lambda: get_read_cache().stats())
+    metrics.register_cache("workspaces", lambda: get_tool_registry().stats())
+    bus = get_invalidation_bus()
+    bus.subscribe("file_reads", drop_changed_reads)
+    bus.subscribe("trees", drop_changed_trees)
+    subscriptions: dict[str, set[ServerSession]] = {}
+    notifications: set[asyncio.Task] = set()
+
+    async def send_update(session: ServerSession, uri: str) -> None:
+        try:
+            await session.send_resource_updated(AnyUrl(uri))
+        except Exception as e:
+            logger.debug("Dropping subscription of %s: %s", uri, e)
+            subscriptions.get(uri, set()).discard(session)
+
+    def notify_subscribers(event: Invalidation) -> None:
+        for uri, sessions in list(subscriptions.items()):
+            scheme, root = parse_workspace_uri(uri)
+            if not event.touches(root) or (scheme == TREE_SCHEME and not event.structure_changed):
+                continue
+            for session in list(sessions):
+                task = asyncio.get_running_loop().create_task(send_update(session, uri))
+                notifications.add(task)
+                task.add_done_callback(notifications.discard)
+
+    bus.subscribe("resource_updates", notify_subscribers)
 
     @server.list_tools()
     async def list_tools() -> list[Tool]:
-        return [
-            # Directory operations
-            Tool(
-                name=CodeAssistTools.LIST_DIRECTORY,
-                description="Lists directory contents using system ls/dir command",
-                inputSchema=ListDirectory.model_json_schema(),
-            ),
-            Tool(
-                name=CodeAssistTools.CREATE_DIRECTORY,
-                description="Creates a new directory",
-                inputSchema=CreateDirectory.model_json_schema(),
-            ),
-            # File operations
-            Tool(
-                name=CodeAssistTools.CREATE_FILE,
-                description="Creates a new file with content",
-                inputSchema=FileCreate.model_json_schema(),
-            ),
-            Tool(
-                name=CodeAssistTools.DELETE_FILE,
-                description="Deletes a file",
-                inputSchema=FileDelete.model_json_schema(),
-            ),
-            Tool(
-                name=CodeAssistTools.MODIFY_FILE,
-                description="Modifies parts of a file using string replacements",
-                inputSchema=FileModify.model_json_schema(),
-            ),
-            Tool(
-                name=CodeAssistTools.REWRITE_FILE,
-                description="Rewrites entire file content",
-                inputSchema=FileRewrite.model_json_schema(),
-            ),
-            Tool(
-                name=CodeAssistTools.READ_FILE,
-                description="Reads file content",
-                inputSchema=FileRead.model_json_schema(),
-            ),
-            Tool(
-                name=CodeAssistTools.FILE_TREE,
-                description="Lists directory tree structure with git tracking support",
-                inputSchema=ListDirectory.model_json_schema(),
-            ),
-            # Git operations
-            Tool(
-                name=CodeAssistTools.GIT_STATUS,
-                description="Shows git repository status",
-                inputSchema=GitStatus.model_json_schema(),
-            ),
-            Tool(
-                name=CodeAssistTools.GIT_DIFF,
-                description="Shows git diff",
-                inputSchema=GitDiff.model_json_schema(),
-            ),
-            Tool(
-                name=CodeAssistTools.GIT_LOG,
-                description="Shows git commit history",
-                inputSchema=GitLog.model_json_schema(),
-            ),
-            Tool(
-                name=CodeAssistTools.GIT_SHOW,
-                description="Shows git commit details",
-                inputSchema=GitShow.model_json_schema(),
-            ),
-        ]
+        return list(tool_definitions())
 
     @server.list_prompts()
     async def list_prompts() -> list[Prompt]:
@@ -148,19 +382,81 @@ async def serve(working_dir: Path | None) -> None:
     async def get_prompt(name: str, arguments: dict[str, str] | None = None) -> GetPromptResult:
         return await handle_prompt(name, arguments)
 
+    @server.list_resources()
+    async def list_resources() -> list[Resource]:
+        resources = [Resource(uri=STATS_URI, name="server_stats", description="Per-tool latency, call, error and response size metrics", mimeType="application/json")]
+        for root in watcher.roots if watcher else ():
+            resources.append(Resource(uri=workspace_uri(TREE_SCHEME, root), name=f"file_tree {root}", description="Tree of the files below the root", mimeType="text/plain"))
+            if os.path.exists(os.path.join(root, ".git")):
+                resources.append(Resource(uri=workspace_uri(GIT_STATUS_SCHEME, root), name=f"git_status {root}", description="Git status of the repository", mimeType="text/plain"))
+        return resources
+
+    def check_workspace_root(root: str) -> None:
+        """Reject resource roots outside the allowed and watched directories."""
+        resolved = os.path.realpath(root)
+        trusted = [os.path.realpath(path) for path in allowed_paths] + (watcher.roots if watcher else [])
+        if not any(is_within(resolved, path) for path in trusted):
+            raise ValueError(f"Resource root {root} is outside the watched and allowed directories")
+
+    @server.read_resource()
+    async def read_resource(uri: AnyUrl) -> list[ReadResourceContents]:
+        if str(uri) == STATS_URI:
+            return [ReadResourceContents(content=metrics.to_json(), mime_type="application/json")]
+        scheme, root = parse_workspace_uri(uri)
+        if scheme in (TREE_SCHEME, GIT_STATUS_SCHEME):
+            check_workspace_root(root)
+        if scheme == TREE_SCHEME:
+            return [ReadResourceContents(content=await get_tool_registry().workspace([root]).file.file_tree(root), mime_type="text/plain")]
+        if scheme == GIT_STATUS_SCHEME:
+            return [ReadResourceContents(content=await get_tool_registry().workspace([root]).git.status(root), mime_type="text/plain")]
+        raise ValueError(f"Unknown resource: {uri}")
+
+    @server.subscribe_resource()
+    async def subscribe_resource(uri: AnyUrl) -> None:
+        scheme, root = parse_workspace_uri(uri)
+        if scheme not in (TREE_SCHEME, GIT_STATUS_SCHEME):
+            raise ValueError(f"Resource {uri} does not send updates")
+        check_workspace_root(root)
+        if watcher is not None:
+            watcher.watch(root)
+        subscriptions.setdefault(str(uri), set()).add(server.request_context.session)
+
+    @server.unsubscribe_resource()
+    async def unsubscribe_resource(uri: AnyUrl) -> None:
+        sessions = subscriptions.get(str(uri), set())
+        sessions.discard(server.request_context.session)
+        if not sessions:
+            subscriptions.pop(str(uri), None)
+
     @server.call_tool()
     async def call_tool(name: str, arguments: dict) -> list[TextContent]:
+        start = time.perf_counter()
+        try:
+            result = await dispatch_tool(name, arguments)
+        except Exception:
+            metrics.record(name, time.perf_counter() - start, error=True)
+            raise
+        metrics.record(name, time.perf_counter() - start, sum(len(content.text.encode()) for content in result))
+        return result
+
+    async def dispatch_tool(name: str, arguments: dict) -> list[TextContent]:
         repo_path = arguments.get("repo_path", "")
         paths = [repo_path] if repo_path else allowed_paths
-        file_tools = get_file_tools(paths)
-        dir_tools = get_dir_tools(paths)
-        git_tools = get_git_tools(paths)
+        workspace = get_tool_registry().workspace(paths)
+        if watcher is not None:
+            for path in paths:
+                watcher.watch(path)
+        file_tools = workspace.file
+        dir_tools = workspace.dir
+        # Only git calls load GitPython and require a repository
+        git_tools = workspace.git if name in GIT_TOOLS else None
 
         match name:
             # Directory operations
             case CodeAssistTools.LIST_DIRECTORY:
-                model = ListDirectory(path=arguments["path"])
-                result = await dir_tools.list_directory(model.path)
+                model = ListDirectory(**arguments)
+                listing = await dir_tools.scan_directory(model.path, model.sort_by, model.reverse, model.pattern, model.offset, model.limit)
+                result = json.dumps(listing) if model.output_format == "json" else render_listing(listing)
                 return [TextContent(type="text", text=result)]
             case CodeAssistTools.CREATE_DIRECTORY:
                 model = CreateDirectory(path=arguments["path"])
@@ -169,21 +465,34 @@ async def serve(working_dir: Path | None) -> None:
 
             # File operations
             case CodeAssistTools.READ_FILE:
-                model = FileRead(path=arguments["path"])
-                result = await file_tools.read_file(model.path)
-                return [TextContent(type="text", text=result)]
+                model = FileRead(**arguments)
+                if not model.is_ranged:
+                    result = await file_tools.read_file(model.path)
+                    return [TextContent(type="text", text=result)]
+                result = await file_tools.read_file_range(model.path, model.offset, model.length, model.start_line, model.end_line)
+                summary = f"Lines {result['start_line']}-{result['end_line']} of {result['lines']}, bytes {result['start']}-{result['end']} of {result['size']}"
+                return [TextContent(type="text", text=result["content"]), TextContent(type="text", text=summary)]
+            case CodeAssistTools.READ_MULTIPLE_FILES:
+                model = FileReadMultiple(**arguments)
+                results = await file_tools.read_multiple_files(model.paths, model.max_concurrency, model.max_bytes)
+                return [TextContent(type="text", text=f"{path}:\n{result['content']}" if "content" in result else f"{path}: {result['error']}") for path, result in results.items()]
             case CodeAssistTools.CREATE_FILE:
                 model = FileCreate(path=arguments["path"], content=arguments["content"])
                 result = await file_tools.create_file(model.path, model.content)
                 return [TextContent(type="text", text=result)]
             case CodeAssistTools.MODIFY_FILE:
-                model = FileModify(path=arguments["path"], replacements=arguments["replacements"])
-                result = await file_tools.modify_file(model.path, model.replacements)
-                return [TextContent(type="text", text=result)]
+                model = FileModify(**arguments)
+                result = await file_tools.replace_in_file(model.path, model.replacements, model.require_unique, model.stat_only)
+                summary = ", ".join(f"{key!r}: {count}" for key, count in result["counts"].items())
+                return [TextContent(type="text", text=result["diff"]), TextContent(type="text", text=f"Matches per key: {summary}")]
             case CodeAssistTools.REWRITE_FILE:
-                model = FileRewrite(path=arguments["path"], content=arguments["content"])
-                result = await file_tools.rewrite_file(model.path, model.content)
+                model = FileRewrite(**arguments)
+                result = await file_tools.rewrite_file(model.path, model.content, model.stat_only)
                 return [TextContent(type="text", text=result)]
+            case CodeAssistTools.APPLY_EDITS:
+                model = ApplyEdits(**arguments)
+                result = await file_tools.apply_edits([edit.model_dump(exclude_none=True) for edit in model.edits], model.stat_only)
+                return [TextContent(type="text", text=result["diff"] or "No changes")]
             case CodeAssistTools.DELETE_FILE:
                 model = FileDelete(path=arguments["path"])
                 result = await file_tools.delete_file(model.path)
@@ -192,6 +501,18 @@ async def serve(working_dir: Path | None) -> None:
                 model = FileTree(path=arguments["path"])
                 result = await file_tools.file_tree(model.path)
                 return [TextContent(type="text", text=result)]
+            case CodeAssistTools.SEARCH_CODE:
+                model = SearchCode(**arguments)
+                result = await file_tools.search_code(model.path, model.query, model.regex, model.case_sensitive, model.glob, model.max_matches_per_file, model.offset, model.limit, model.use_index)
+                return [TextContent(type="text", text=render_search_results(result))]
+            case CodeAssistTools.CODE_OUTLINE:
+                model = CodeOutline(**arguments)
+                result = await file_tools.code_outline(model.path)
+                return [TextContent(type="text", text=render_outline(result))]
+            case CodeAssistTools.FIND_SYMBOL:
+                model = FindSymbol(**arguments)
+                result = await file_tools.find_symbol(model.path, model.name, model.kind, model.offset, model.limit)
+                return [TextContent(type="text", text=render_symbols(result))]
 
             # Git operations
             case CodeAssistTools.GIT_STATUS:
@@ -199,20 +520,74 @@ async def serve(working_dir: Path | None) -> None:
                 result = await git_tools.status(model.repo_path)
                 return [TextContent(type="text", text=result)]
             case CodeAssistTools.GIT_DIFF:
-                model = GitDiff(repo_path=arguments["repo_path"], target=arguments.get("target", ""))
-                result = await git_tools.diff(model.repo_path, model.target)
+                model = GitDiff(**arguments)
+                result = await git_tools.diff(model.repo_path, model.target, model.mode, model.paths, model.max_bytes, model.cursor)
                 return [TextContent(type="text", text=result)]
             case CodeAssistTools.GIT_LOG:
-                model = GitLog(repo_path=arguments["repo_path"], max_count=arguments.get("max_count", 10))
-                result = await git_tools.log(model.repo_path, model.max_count)
+                model = GitLog(**arguments)
+                result = await git_tools.log(model.repo_path, model.max_count, model.skip, model.cursor, model.paths, model.author, model.since, model.until, model.revision, model.format)
                 return [TextContent(type="text", text=result)]
             case CodeAssistTools.GIT_SHOW:
-                model = GitShow(repo_path=arguments["repo_path"], revision=arguments["commit"])
+                model = GitShow(**arguments)
                 result = await git_tools.show(model.repo_path, model.revision)
                 return [TextContent(type="text", text=result)]
+            case CodeAssistTools.GIT_BLAME:
+                model = GitBlame(**arguments)
+                lines = await git_tools.blame(model.repo_path, model.path, model.start_line, model.end_line, model.revision)
+                result = json.dumps(lines) if model.output_format == "json" else render_blame(lines)
+                return [TextContent(type="text", text=result)]
+
+            # Server
+            case CodeAssistTools.SERVER_STATS:
+                model = ServerStats(**arguments)
+                return [TextContent(type="text", text=metrics.render(model.format))]
             case _:
                 raise ValueError(f"Unknown tool: {name}")
 
+    return server
+
+
+def dump_metrics(path: Path, fmt: str) -> None:
+    """Write the metrics to path, logging instead of raising when that fails."""
+    try:
+        get_metrics().dump(path, fmt)
+    except OSError as e:
+        logger.warning("Could not write metrics to %s: %s", path, e)
+
+
+async def dump_metrics_periodically(path: Path, fmt: str, interval: float) -> None:
+    """Write the metrics to path every interval seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        dump_metrics(path, fmt)
+
+
+async def serve(
+    working_dir: Path | None,
+    metrics_file: Path | None = None,
+    metrics_format: str = "json",
+    metrics_interval: float = 60.0,
+    watch: str = "auto",
+    watch_debounce: float = DEFAULT_DEBOUNCE,
+) -> None:
+    watcher = WatchManager(watch, watch_debounce, max_roots=get_tool_registry().max_workspaces) if watch != "off" else None
+    server = create_server(working_dir, watcher)
     options = server.create_initialization_options()
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    if watcher is not None:
+        # The SDK never advertises subscriptions itself
+        options.capabilities.resources.subscribe = True
+        if working_dir:
+            watcher.watch(working_dir)
+    dumper = asyncio.create_task(dump_metrics_periodically(metrics_file, metrics_format, metrics_interval)) if metrics_file else None
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    finally:
+        if dumper is not None:
+            dumper.cancel()
+            dump_metrics(metrics_file, metrics_format)
+        if watcher is not None:
+            watcher.close()
+        shutdown_workers()
+        shutdown_process_pool()
+        get_repo_pool().close()
@@ -0,0 +1,372 @@
+"""Pluggable line diff engines with unified and stat output.
+
+Engines map two sequences of interned lines to their matching blocks. The
+histogram engine anchors on the rarest lines common to both sides and falls
+back to linear space Myers for regions made only of frequent lines, so
+neither engine builds the quadratic tables difflib can end up with.
+"""
+
+import math
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Callable, Iterator, Sequence
+
+# (start in a, start in b, length), sorted and non-overlapping
+Blocks = list[tuple[int, int, int]]
+DiffEngine = Callable[[Sequence[int], Sequence[int]], Blocks]
+Opcode = tuple[str, int, int, int, int]
+
+DEFAULT_ENGINE = "histogram"
+# Lines occurring more often than this are never used as histogram anchors
+MAX_CHAIN = 64
+# Minimum number of edits Myers searches for a middle snake before cutting off
+MIN_COST_LIMIT = 64
+
+
+def myers_blocks(a: Sequence[int], b: Sequence[int]) -> Blocks:
+    """Matching blocks of a shortest edit script, found in linear space.
+
+    The script is minimal unless a region needs more edits than the search
+    cutoff, in which case it is split heuristically.
+    """
+    blocks: Blocks = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = _trim(a, b, *stack.pop(), blocks)
+        if alo == ahi or blo == bhi:
+            continue
+        x, y, u, v = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if u > x:
+            blocks.append((x, y, u - x))
+        stack.append((alo, x, blo, y))
+        stack.append((u, ahi, v, bhi))
+    return _normalize(blocks)
+
+
+def _trim(a: Sequence[int], b: Sequence[int], alo: int, ahi: int, blo: int, bhi: int, blocks: Blocks) -> tuple[int, int, int, int]:
+    """Strip the common prefix and suffix of a region, recording them as blocks."""
+    start = alo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start:
+        blocks.append((start, blo - (alo - start), alo - start))
+    end = ahi
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+    if ahi < end:
+        blocks.append((ahi, bhi, end - ahi))
+    return alo, ahi, blo, bhi
+
+
+def _middle_snake(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int) -> tuple[int, int, int, int]:
+    """Find the middle snake of an edit graph, as in Myers' linear space refinement.
+
+    Returns:
+        Start and end of the snake as absolute (x, y) coordinates
+    """
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    # Past max_cost edits each way the search settles for the forward path
+    # that got furthest, trading a minimal script for bounded time
+    max_cost = max(MIN_COST_LIMIT, math.isqrt(n + m))
+    max_d = min((n + m + 1) // 2, max_cost)
+    offset = max_d + 1
+    # Furthest x reached on each diagonal k = x - y, forward and on the reversed sequences
+    forward = [0] * (2 * max_d + 3)
+    backward = [0] * (2 * max_d + 3)
+    fa, fb = a[alo:ahi], b[blo:bhi]
+    ra, rb = fa[::-1], fb[::-1]
+    for d in range(max_d + 1):
+        snake = _advance(forward, backward, offset, d, fa, fb, delta, d - 1 if odd else -1)
+        if snake is not None:
+            x0, y0, x, y = snake
+            return alo + x0, blo + y0, alo + x, blo + y
+        snake = _advance(backward, forward, offset, d, ra, rb, delta, -1 if odd else d)
+        if snake is not None:
+            x0, y0, x, y = snake
+            return alo + n - x, blo + m - y, alo + n - x0, blo + m - y0
+        if d >= max_cost:
+            x, y = _furthest_point(forward, offset, d, n, m)
+            return alo + x, blo + y, alo + x, blo + y
+    raise AssertionError("edit graph has no middle snake")
+
+
+def _advance(v: list[int], other: list[int], offset: int, d: int, a: Sequence[int], b: Sequence[int], delta: int, reach: int) -> tuple[int, int, int, int] | None:
+    """Extend the paths of one direction to cost d.
+
+    Returns:
+        The snake where a path meets one of the other direction, whose
+        diagonals within reach of delta have been explored, or None
+    """
+    n = len(a)
+    m = len(b)
+    for k in range(-d, d + 1, 2):
+        if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+            x = v[offset + k + 1]
+        else:
+            x = v[offset + k - 1] + 1
+        y = x - k
+        x0, y0 = x, y
+        while x < n and y < m and a[x] == b[y]:
+            x += 1
+            y += 1
+        v[offset + k] = x
+        if -reach <= delta - k <= reach and x + other[offset + delta - k] >= n:
+            return x0, y0, x, y
+    return None
+
+
+def _furthest_point(forward: list[int], offset: int, d: int, n: int, m: int) -> tuple[int, int]:
+    """Point inside the edit graph reached by the furthest forward path of cost d."""
+    points = ((x, x - k) for k in range(-d, d + 1, 2) for x in [forward[offset + k]])
+    return max(((x, y) for x, y in points if x <= n and 0 <= y <= m), key=sum)
+
+
+def histogram_blocks(a: Sequence[int], b: Sequence[int]) -> Blocks:
+    """Matching blocks anchored on the least frequent common lines.
+
+    Lines unique to both sides are matched first, patience style, through a
+    longest increasing subsequence. Regions without such lines are split at
+    the longest run around their rarest shared line, as git's histogram diff
+    does, and regions sharing only frequent lines fall back to Myers.
+    """
+    blocks: Blocks = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = _trim(a, b, *stack.pop(), blocks)
+        if alo == ahi or blo == bhi:
+            continue
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        if anchors:
+            for i, j in anchors:
+                blocks.append((i, j, 1))
+                stack.append((alo, i, blo, j))
+                alo, blo = i + 1, j + 1
+            stack.append((alo, ahi, blo, bhi))
+            continue
+        anchor = _find_anchor(a, alo, ahi, b, blo, bhi)
+        if anchor is None:
+            continue
+        if anchor is _NO_ANCHOR:
+            blocks.extend((i + alo, j + blo, size) for i, j, size in myers_blocks(a[alo:ahi], b[blo:bhi]))
+            continue
+        i, j, size = anchor
+        blocks.append(anchor)
+        stack.append((alo, i, blo, j))
+        stack.append((i + size, ahi, j + size, bhi))
+    return _normalize(blocks)
+
+
+def _unique_anchors(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int) -> list[tuple[int, int]]:
+    """Longest in-order chain of lines occurring exactly once on each side."""
+    a_counts = Counter(a[alo:ahi])
+    b_counts = Counter(b[blo:bhi])
+    a_index = {line: i for i, line in enumerate(a[alo:ahi], alo) if a_counts[line] == 1}
+    pairs = [(a_index[line], j) for j, line in enumerate(b[blo:bhi], blo) if b_counts[line] == 1 and line in a_index]
+    if not pairs:
+        return []
+
+    # Patience sort on a positions, keeping back links to rebuild the chain
+    tails: list[int] = []
+    tail_pairs: list[int] = []
+    links = [-1] * len(pairs)
+    for n, (i, _) in enumerate(pairs):
+        pile = bisect_left(tails, i)
+        if pile:
+            links[n] = tail_pairs[pile - 1]
+        if pile == len(tails):
+            tails.append(i)
+            tail_pairs.append(n)
+        else:
+            tails[pile] = i
+            tail_pairs[pile] = n
+    chain = []
+    n = tail_pairs[-1]
+    while n != -1:
+        chain.append(pairs[n])
+        n = links[n]
+    chain.reverse()
+    return chain
+
+
+_NO_ANCHOR = (-1, -1, -1)
+
+
+def _find_anchor(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int) -> tuple[int, int, int] | None:
+    """Longest common run around the rarest shared line of a region.
+
+    Returns:
+        The run as a block, None if the sides share no line, or _NO_ANCHOR if
+        every shared line is too frequent to anchor on
+    """
+    occurrences: dict[int, list[int]] = {}
+    for i in range(alo, ahi):
+        occurrences.setdefault(a[i], []).append(i)
+
+    best = None
+    best_count = MAX_CHAIN
+    common = False
+    j = blo
+    while j < bhi:
+        positions = occurrences.get(b[j])
+        next_j = j + 1
+        if positions is not None:
+            common = True
+            if len(positions) <= best_count:
+                for i in positions:
+                    start = 0
+                    while i - start > alo and j - start > blo and a[i - start - 1] == b[j - start - 1]:
+                        start += 1
+                    end = 1
+                    while i + end < ahi and j + end < bhi and a[i + end] == b[j + end]:
+                        end += 1
+                    size = start + end
+                    count = min(len(occurrences[a[k]]) for k in range(i - start, i + end))
+                    if count < best_count or (count == best_count and (best is None or size > best[2])):
+                        best = (i - start, j - start, size)
+                        best_count = count
+                    next_j = max(next_j, j + end)
+        j = next_j
+
+    if best is not None:
+        return best
+    return _NO_ANCHOR if common else None
+
+
+def difflib_blocks(a: Sequence[int], b: Sequence[int]) -> Blocks:
+    """Matching blocks from difflib.SequenceMatcher."""
+    import difflib
+
+    return [tuple(block) for block in difflib.SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks()[:-1]]
+
+
+def _normalize(blocks: Blocks) -> Blocks:
+    """Sort blocks, drop empty ones and merge adjacent ones."""
+    merged: Blocks = []
+    for i, j, size in sorted(blocks):
+        if not size:
+            continue
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+    return merged
+
+
+ENGINES: dict[str, DiffEngine] = {
+    "histogram": histogram_blocks,
+    "myers": myers_blocks,
+    "difflib": difflib_blocks,
+}
+
+
+def register_engine(name: str, engine: DiffEngine) -> None:
+    """Make a diff engine available by name."""
+    ENGINES[name] = engine
+
+
+def get_opcodes(a: Sequence[str], b: Sequence[str], engine: str = DEFAULT_ENGINE) -> list[Opcode]:
+    """Opcodes turning a into b, in the format of difflib.SequenceMatcher.get_opcodes.
+
+    Raises:
+        ValueError: If the engine is unknown
+    """
+    try:
+        find_blocks = ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown diff engine: {engine}. Expected one of {', '.join(ENGINES)}") from None
+    ids: dict[str, int] = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+
+    opcodes: list[Opcode] = []
+    i = j = 0
+    for bi, bj, size in [*find_blocks(a_ids, b_ids), (len(a), len(b), 0)]:
+        if i < bi and j < bj:
+            opcodes.append(("replace", i, bi, j, bj))
+        elif i < bi:
+            opcodes.append(("delete", i, bi, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, bi, j, bj))
+        if size:
+            opcodes.append(("equal", bi, bi + size, bj, bj + size))
+        i, j = bi + size, bj + size
+    return opcodes
+
+
+def group_opcodes(opcodes: list[Opcode], n: int = 3) -> Iterator[list[Opcode]]:
+    """Group opcodes into hunks with n lines of context, like difflib."""
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _format_range(start: int, stop: int) -> str:
+    length = stop - start
+    if length == 1:
+        return str(start + 1)
+    return f"{start + 1 if length else start},{length}"
+
+
+def unified_diff(original: str, modified: str, fromfile: str = "original", tofile: str = "modified", n: int = 3, engine: str = DEFAULT_ENGINE) -> str:
+    """Unified diff of two texts in the same format as difflib.unified_diff.
+
+    Identical texts return an empty string without diffing.
+    """
+    if original == modified:
+        return ""
+    a = original.splitlines(keepends=True)
+    b = modified.splitlines(keepends=True)
+    out: list[str] = []
+    for group in group_opcodes(get_opcodes(a, b, engine), n):
+        if not out:
+            out.append(f"--- {fromfile}\n+++ {tofile}\n")
+        first, last = group[0], group[-1]
+        out.append(f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@\n")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                out.extend(" " + line for line in a[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                out.extend("-" + line for line in a[i1:i2])
+            if tag in ("replace", "insert"):
+                out.extend("+" + line for line in b[j1:j2])
+    return "".join(out)
+
+
+def diff_stat(original: str, modified: str, n: int = 3, engine: str = DEFAULT_ENGINE) -> dict[str, int]:
+    """Count the hunks, added lines and removed lines between two texts."""
+    stat = {"hunks": 0, "added": 0, "removed": 0}
+    if original == modified:
+        return stat
+    opcodes = get_opcodes(original.splitlines(keepends=True), modified.splitlines(keepends=True), engine)
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag != "equal":
+            stat["removed"] += i2 - i1
+            stat["added"] += j2 - j1
+    stat["hunks"] = sum(1 for _ in group_opcodes(opcodes, n))
+    return stat
+
+
+def format_stat(stat: dict[str, int]) -> str:
+    """Render a diff_stat result as one line."""
+    return f"hunks: {stat['hunks']}, added: {stat['added']}, removed: {stat['removed']}"
@@ -1,9 +1,13 @@
 """Directory operations and utilities."""
 
-import asyncio
+import fnmatch
+import heapq
 import os
-import sys
+import re
+import stat
+from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 from mcp_server_code_assist.base_tools import BaseTools
 
@@ -34,10 +38,7 @@ class DirTools(BaseTools):
         Raises:
             ValueError: If path is outside allowed directories
         """
-        abs_path = os.path.abspath(path)
-        if not any(abs_path.startswith(p) for p in self.allowed_paths):
-            raise ValueError(f"Path {path} is outside allowed directories")
-        return Path(abs_path)
+        return super().validate_path(path)
 
     async def create_directory(self, path: str) -> str:
         """Create a new directory.
@@ -50,29 +51,121 @@ class DirTools(BaseTools):
         """
         path = await self.validate_path(path)
         try:
-            path.mkdir(parents=True, exist_ok=True)
+            await self.run_blocking(path.mkdir, parents=True, exist_ok=True)
             return f"Created directory: {path}"
         except Exception as e:
             self.handle_error(e, {"operation": "create_directory", "path": str(path)})
 
-    async def list_directory(self, path: str) -> str:
-        """List contents of a directory using system ls/dir command.
+    async def scan_directory(
+        self,
+        path: str,
+        sort_by: str = "name",
+        reverse: bool = False,
+        pattern: str | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> dict[str, Any]:
+        """List directory entries as structured data.
 
         Args:
             path: Directory path to list
+            sort_by: Sort key, one of name, size, mtime or type
+            reverse: Reverse the sort order
+            pattern: Optional glob matched against entry names
+            offset: Number of sorted entries to skip
+            limit: Maximum number of entries to return
 
         Returns:
-            Raw command output as string
+            Dict with the page of entries (name, type, size, mtime, mode) and the total number of matching entries
         """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Invalid sort key: {sort_by}. Expected one of {', '.join(SORT_KEYS)}")
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset and limit must not be negative")
         path = await self.validate_path(path)
         if not path.is_dir():
             raise ValueError(f"Path {path} is not a directory")
-
-        if sys.platform == "win32":
-            cmd = ["dir", path]
+        return await self.run_blocking(self._scan, path, sort_by, reverse, pattern, offset, limit)
+
+    @staticmethod
+    def _scan(path: Path, sort_by: str, reverse: bool, pattern: str | None, offset: int, limit: int | None) -> dict[str, Any]:
+        match = re.compile(fnmatch.translate(pattern)).match if pattern else None
+        with os.scandir(path) as it:
+            entries = [entry for entry in it if match is None or match(entry.name)]
+
+        end = None if limit is None else offset + limit
+        if sort_by == "name":
+            # Names need no stat call, so only the returned page is stat'ed
+            if end is not None and not reverse:
+                ordered = heapq.nsmallest(end, entries, key=lambda entry: entry.name)
+            else:
+                ordered = sorted(entries, key=lambda entry: entry.name, reverse=reverse)
+            page = [_describe(entry) for entry in ordered[offset:end]]
         else:
-            cmd = ["ls", "-la", path]
+            described = sorted((_describe(entry) for entry in entries), key=lambda item: (item[sort_by], item["name"]), reverse=reverse)
+            page = described[offset:end]
+
+        return {"path": str(path), "entries": page, "total": len(entries), "offset": offset, "limit": limit}
+
+    async def list_directory(
+        self,
+        path: str,
+        sort_by: str = "name",
+        reverse: bool = False,
+        pattern: str | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> str:
+        """List contents of a directory as text in an ls -l like layout.
+
+        Args:
+            path: Directory path to list
+            sort_by: Sort key, one of name, size, mtime or type
+            reverse: Reverse the sort order
+            pattern: Optional glob matched against entry names
+            offset: Number of sorted entries to skip
+            limit: Maximum number of entries to return
 
-        proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-        stdout, _ = await proc.communicate()
-        return stdout.decode()
+        Returns:
+            Listing as string
+        """
+        return render_listing(await self.scan_directory(path, sort_by, reverse, pattern, offset, limit))
+
+
+SORT_KEYS = ("name", "size", "mtime", "type")
+
+
+def _describe(entry: os.DirEntry) -> dict[str, Any]:
+    try:
+        st = entry.stat(follow_symlinks=False)
+    except OSError:
+        return {"name": entry.name, "type": "unknown", "size": 0, "mtime": 0.0, "mode": "?---------"}
+    if stat.S_ISLNK(st.st_mode):
+        entry_type = "symlink"
+    elif stat.S_ISDIR(st.st_mode):
+        entry_type = "directory"
+    elif stat.S_ISREG(st.st_mode):
+        entry_type = "file"
+    else:
+        entry_type = "other"
+    return {"name": entry.name, "type": entry_type, "size": st.st_size, "mtime": st.st_mtime, "mode": stat.filemode(st.st_mode)}
+
+
+def render_listing(listing: dict[str, Any]) -> str:
+    """Render a scan_directory result as text.
+
+    Args:
+        listing: Result of DirTools.scan_directory
+
+    Returns:
+        One line per entry with mode, size, modification time and name
+    """
+    lines = [f"total {listing['total']}"]
+    for entry in listing["entries"]:
+        mtime = datetime.fromtimestamp(entry["mtime"]).strftime("%Y-%m-%d %H:%M")
+        suffix = "/" if entry["type"] == "directory" else ""
+        lines.append(f"{entry['mode']} {entry['size']:>12} {mtime} {entry['name']}{suffix}")
+    shown = len(listing["entries"])
+    if listing["offset"] or listing["offset"] + shown < listing["total"]:
+        lines.append(f"showing {listing['offset'] + 1 if shown else listing['offset']}-{listing['offset'] + shown} of {listing['total']}")
+    return "\n".join(lines) + "\n"
@@ -1,45 +1,165 @@
-import difflib
+import asyncio
 import fnmatch
+import logging
 import os
+import re
+import sqlite3
 from pathlib import Path
-
-import git
+from typing import Any
 
 from mcp_server_code_assist.base_tools import BaseTools
+from mcp_server_code_assist.tools.diff import DEFAULT_ENGINE, diff_stat, format_stat, unified_diff
+from mcp_server_code_assist.tools.gitignore import IGNORE_FILE, MatcherCache
+from mcp_server_code_assist.tools.line_index import read_range
+from mcp_server_code_assist.tools.models import FileEdit
+from mcp_server_code_assist.tools.read_cache import get_read_cache
+from mcp_server_code_assist.tools.replace import replace_all
+from mcp_server_code_assist.tools.repo_pool import get_repo_pool
+from mcp_server_code_assist.tools.search import compile_query, get_index, required_trigrams, scan_file
+from mcp_server_code_assist.tools.symbols import SYMBOL_KINDS, get_symbol_index, is_python_file, outline_file
+from mcp_server_code_assist.tools.transaction import EDIT_OPS, StagedFile, Transaction, atomic_write
+from mcp_server_code_assist.tools.tree_cache import TreeCache, TreeSnapshot, build_tracked_tree, build_walk_tree, git_index_path
+from mcp_server_code_assist.watcher import Invalidation, get_invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+# Files per worker task, and tasks in flight, when scanning for search_code
+SEARCH_CHUNK_SIZE = 32
+SEARCH_PARALLEL_CHUNKS = 8
+
+_tree_cache = TreeCache()
+_ignore_matchers = MatcherCache()
+
+
+def drop_changed_trees(event: Invalidation) -> None:
+    """Drop the trees and ignore rules a change affects, subscribed to the invalidation bus.
+
+    Trees change when files are created, deleted or moved, or the git index
+    changes, and edits of other files leave them alone.
+    """
+    names = {os.path.basename(path) for path in event.paths} if event.paths is not None else {IGNORE_FILE}
+    if event.structure_changed or "index" in names:
+        _tree_cache.invalidate_where(event.touches)
+    if IGNORE_FILE in names:
+        _ignore_matchers.invalidate_where(event.touches)
 
 
 class FileTools(BaseTools):
+    # Engine used for the diffs returned by edits, see tools.diff.ENGINES
+    diff_engine = DEFAULT_ENGINE
+
     def is_valid_operation(self, path: Path) -> bool:
         """Validate if operation can be performed on path"""
         return path.exists() and path.is_file()
 
     async def validate_path(self, path: str) -> Path:
-        abs_path = os.path.abspath(path)
-        if not any(abs_path.startswith(p) for p in self.allowed_paths):
-            raise ValueError(f"Path {path} is outside allowed directories")
-        return Path(abs_path)
+        return super().validate_path(path)
 
     async def read_file(self, path: str) -> str:
         path = await self.validate_path(path)
         try:
-            return path.read_text()
+            return await self.run_blocking(get_read_cache().read, path)
         except Exception as e:
             self.handle_error(e, {"operation": "read", "path": str(path)})
 
+    async def read_file_range(
+        self,
+        path: str,
+        offset: int | None = None,
+        length: int | None = None,
+        start_line: int | None = None,
+        end_line: int | None = None,
+    ) -> dict[str, Any]:
+        """Read part of a file without decoding the rest of it.
+
+        Args:
+            path: File path
+            offset: First byte to read
+            length: Maximum number of bytes to read
+            start_line: First line to read (one based)
+            end_line: Last line to read (inclusive)
+
+        Returns:
+            Dict with content, the byte and line span read and the file's total size and line count
+        """
+        path = await self.validate_path(path)
+        try:
+            return await self.run_blocking(read_range, path, offset, length, start_line, end_line)
+        except Exception as e:
+            self.handle_error(e, {"operation": "read_range", "path": str(path)})
+
+    async def read_multiple_files(self, paths: list[str], max_concurrency: int = 8, max_bytes: int = 10 * 1024 * 1024) -> dict[str, dict[str, str]]:
+        """Read several files concurrently.
+
+        All paths are validated before any file is read. Files are read with
+        at most max_concurrency reads in flight, and a file is skipped once
+        reading it would push the batch past max_bytes.
+
+        Args:
+            paths: File paths to read
+            max_concurrency: Maximum number of concurrent reads
+            max_bytes: Total byte budget for the batch
+
+        Returns:
+            Dict mapping each path to {"content": ...} or {"error": ...}
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        results: dict[str, dict[str, str]] = {}
+        validated: dict[str, Path] = {}
+        for path in paths:
+            try:
+                validated[path] = await self.validate_path(path)
+            except ValueError as e:
+                results[path] = {"error": str(e)}
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        budget = max_bytes
+
+        async def read_one(path: str, resolved: Path) -> None:
+            nonlocal budget
+            async with semaphore:
+                try:
+                    size = (await self.run_blocking(resolved.stat)).st_size
+                    if size > budget:
+                        results[path] = {"error": f"Skipped: {size} bytes exceeds the remaining batch budget of {budget} bytes"}
+                        return
+                    budget -= size
+                    results[path] = {"content": await self.run_blocking(self._read_limited, resolved, size)}
+                except Exception as e:
+                    results[path] = {"error": f"{type(e).__name__}: {e}"}
+
+        await asyncio.gather(*(read_one(path, resolved) for path, resolved in validated.items()))
+        return {path: results[path] for path in paths}
+
+    @staticmethod
+    def _read_limited(path: Path, size: int) -> str:
+        with open(path, "rb") as f:
+            return f.read(size).decode()
+
     async def write_file(self, path: str, content: str) -> None:
         path = await self.validate_path(path)
         try:
-            path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(content)
+            await self.run_blocking(self._write, path, content)
         except Exception as e:
             self.handle_error(e, {"operation": "write", "path": str(path)})
 
+    @staticmethod
+    def _write(path: Path, content: str) -> None:
+        atomic_write(path, content)
+        get_read_cache().invalidate(path)
+
     async def create_file(self, path: str, content: str = "") -> str:
         await self.write_file(path, content)
         return f"Created file: {path}"
 
     async def delete_file(self, path: str) -> str:
         path = await self.validate_path(path)
+        return await self.run_blocking(self._move_to_trash, path)
+
+    @staticmethod
+    def _move_to_trash(path: Path) -> str:
         if not path.is_file():
             return f"Path not found: {path}"
 
@@ -53,34 +173,129 @@ class FileTools(BaseTools):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         trash_path = trash_dir / f"{path.name}_{timestamp}"
         path.rename(trash_path)
+        get_read_cache().invalidate(path)
 
         return f"Moved file to trash: {trash_path}"
 
-    async def modify_file(self, path: str, replacements: dict[str, str]) -> str:
+    async def modify_file(self, path: str, replacements: dict[str, str], require_unique: bool = False, stat_only: bool = False) -> str:
+        result = await self.replace_in_file(path, replacements, require_unique, stat_only)
+        return result["diff"]
+
+    async def replace_in_file(self, path: str, replacements: dict[str, str], require_unique: bool = False, stat_only: bool = False) -> dict[str, Any]:
+        """Replace literal strings in a file in a single pass.
+
+        Args:
+            path: File to modify
+            replacements: Mapping of literal text to its replacement
+            require_unique: Fail without writing unless every key matches exactly once
+            stat_only: Return only hunk and line counts instead of the diff
+
+        Returns:
+            Dict with the unified diff and the number of matches per key
+        """
         path = await self.validate_path(path)
-        content = await self.read_file(path)
-        original = content
+        original = await self.read_file(path)
+        content, counts = await self.run_blocking(replace_all, original, replacements, require_unique)
+        if content != original:
+            await self.write_file(path, content)
+        return {"diff": await self.run_blocking(self.generate_diff, original, content, stat_only, self.diff_engine), "counts": counts}
 
-        for old, new in replacements.items():
-            content = content.replace(old, new)
+    async def apply_edits(self, edits: list[dict[str, Any]], stat_only: bool = False) -> dict[str, Any]:
+        """Apply a batch of file edits as one transaction.
 
-        await self.write_file(path, content)
-        return self.generate_diff(original, content)
+        Edits to different files are staged concurrently, edits to the same
+        file in order. Every changed file is written to a temp file first and
+        only renamed into place once all edits succeeded, so a failing edit
+        leaves every file untouched.
 
-    async def rewrite_file(self, path: str, content: str) -> str:
+        Args:
+            edits: Dicts with an op (create, rewrite, modify or delete), a path
+                and the content or replacements the op needs
+            stat_only: Return only hunk and line counts instead of the diff
+
+        Returns:
+            Dict with one combined unified diff and the changed paths
+        """
+        for edit in edits:
+            if edit.get("op") not in EDIT_OPS:
+                raise ValueError(f"Unknown edit op: {edit.get('op')}. Expected one of {', '.join(EDIT_OPS)}")
+        edits = [FileEdit.model_validate(edit).model_dump(exclude_none=True) for edit in edits]
+        groups: dict[Path, list[dict[str, Any]]] = {}
+        for edit in edits:
+            groups.setdefault(await self.validate_path(edit["path"]), []).append(edit)
+
+        results = await asyncio.gather(*(self.run_blocking(self._stage, path, group) for path, group in groups.items()), return_exceptions=True)
+        staged = [result for result in results if isinstance(result, StagedFile)]
+        transaction = Transaction(staged)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            await self.run_blocking(transaction.discard)
+            raise errors[0]
+        try:
+            await self.run_blocking(transaction.commit)
+        finally:
+            for item in staged:
+                get_read_cache().invalidate(item.path)
+
+        diff = await self.run_blocking(self._combined_diff, staged, stat_only, self.diff_engine)
+        return {"diff": diff, "changed": [str(item.path) for item in staged if item.changed]}
+
+    @staticmethod
+    def _stage(path: Path, edits: list[dict[str, Any]]) -> StagedFile:
+        staged = StagedFile(path)
+        try:
+            staged.stage(edits)
+        except BaseException:
+            staged.discard()
+            raise
+        return staged
+
+    @staticmethod
+    def _combined_diff(staged: list[StagedFile], stat_only: bool = False, engine: str = DEFAULT_ENGINE) -> str:
+        changed = [item for item in staged if item.changed]
+        if stat_only:
+            total = {"hunks": 0, "added": 0, "removed": 0}
+            for item in changed:
+                for key, value in diff_stat(item.original or "", item.content or "", engine=engine).items():
+                    total[key] += value
+            return format_stat(total)
+        parts = []
+        for item in changed:
+            fromfile = "/dev/null" if item.original is None else f"a/{item.path}"
+            tofile = "/dev/null" if item.content is None else f"b/{item.path}"
+            parts.append(unified_diff(item.original or "", item.content or "", fromfile, tofile, engine=engine))
+        return "".join(parts)
+
+    async def rewrite_file(self, path: str, content: str, stat_only: bool = False) -> str:
         path = await self.validate_path(path)
         original = await self.read_file(path) if path.exists() else ""
-        await self.write_file(path, content)
-        return self.generate_diff(original, content)
+        if content != original or not path.exists():
+            await self.write_file(path, content)
+        return await self.run_blocking(self.generate_diff, original, content, stat_only, self.diff_engine)
 
     @staticmethod
-    def generate_diff(original: str, modified: str) -> str:
-        diff = difflib.unified_diff(original.splitlines(keepends=True), modified.splitlines(keepends=True), fromfile="original", tofile="modified")
-        return "".join(diff)
+    def generate_diff(original: str, modified: str, stat_only: bool = False, engine: str = DEFAULT_ENGINE) -> str:
+        """Diff two versions of a file.
+
+        Args:
+            original: Content before the change
+            modified: Content after the change
+            stat_only: Return only hunk and line counts
+            engine: Name of the diff engine, see tools.diff.ENGINES
+
+        Returns:
+            Unified diff, empty if the contents are identical, or the stat line
+        """
+        if stat_only:
+            return format_stat(diff_stat(original, modified, engine=engine))
+        return unified_diff(original, modified, engine=engine)
 
-    async def file_tree(self, path: str) -> tuple[str, int, int]:
+    async def file_tree(self, path: str) -> str:
         """Generate tree view of directory structure.
 
+        The tree is cached per root and rebuilt only when the git index,
+        an ignore file or a directory in the tree changes.
+
         Args:
             path: Root directory path
 
@@ -88,103 +303,154 @@ class FileTools(BaseTools):
             Tree view as string
         """
         path = await self.validate_path(path)
-        base_path = path
-
-        # Try git tracking first
-        tracked_files = self._get_tracked_files(path)
-        gitignore = self._load_gitignore(path) if tracked_files is None else []
-
-        def gen_tree(path: Path, prefix: str = "") -> tuple[list[str], int, int]:
-            entries = []
-            dir_count = 0
-            file_count = 0
-
-            items = sorted(path.iterdir(), key=lambda x: (x.is_file(), x.name))
-            for i, item in enumerate(items):
-                rel_path = str(item.relative_to(base_path))
-
-                # Skip if file should be ignored
-                if tracked_files is not None:
-                    if rel_path not in tracked_files and not any(str(p.relative_to(base_path)) in tracked_files for p in item.rglob("*") if p.is_file()):
-                        continue
-                else:
-                    # Use gitignore
-                    if self._should_ignore(rel_path, gitignore):
-                        continue
-
-                is_last = i == len(items) - 1
-                curr_prefix = "└── " if is_last else "├── "
-                curr_line = prefix + curr_prefix + item.name
-
-                if item.is_dir():
-                    next_prefix = prefix + ("    " if is_last else "│   ")
-                    subtree, sub_dirs, sub_files = gen_tree(item, next_prefix)
-                    if tracked_files is not None and not subtree:
-                        continue
-                    entries.extend([curr_line] + subtree)
-                    dir_count += 1 + sub_dirs
-                    file_count += sub_files
-                else:
-                    if tracked_files is not None and rel_path not in tracked_files:
-                        continue
-                    entries.append(curr_line)
-                    file_count += 1
-
-            return entries, dir_count, file_count
-
-        tree_lines, _, _ = gen_tree(path)
-        return "\n".join(tree_lines)
-
-    def _should_ignore(self, path: str, patterns: list[str]) -> bool:
-        """Check if path matches gitignore patterns.
+        return await self.run_blocking(self._file_tree, path)
+
+    def _file_tree(self, path: Path) -> str:
+        tree, _, _ = self._tree_snapshot(path).render()
+        return tree
+
+    def _tree_snapshot(self, path: Path) -> TreeSnapshot:
+        snapshot = _tree_cache.get(path)
+        if snapshot is None:
+            # Try git tracking first
+            tracked_files = self._get_tracked_files(path)
+            if tracked_files is not None:
+                snapshot = build_tracked_tree(path, tracked_files, [git_index_path(path)])
+            else:
+                matcher = _ignore_matchers.get(path)
+                snapshot = build_walk_tree(path, lambda rel_path, is_dir: matcher.is_ignored(rel_path, is_dir, check_parents=False))
+                snapshot.watch(matcher.ignore_files())
+            _tree_cache.put(path, snapshot)
+        return snapshot
+
+    async def search_code(
+        self,
+        path: str,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = True,
+        glob: str | None = None,
+        max_matches_per_file: int = 20,
+        offset: int = 0,
+        limit: int = 100,
+        use_index: bool = False,
+    ) -> dict[str, Any]:
+        """Search file contents below a directory.
+
+        Files are selected with the same tracked-file and gitignore rules as
+        file_tree and scanned in parallel in path order. With use_index, a
+        trigram index narrows the scan to files that can contain the query.
 
         Args:
-            path: Path to check
-            patterns: List of gitignore patterns
+            path: Root directory to search
+            query: Literal text, or a regex if regex is set
+            regex: Treat query as a regular expression
+            case_sensitive: Match case exactly
+            glob: Optional glob matched against relative paths or file names
+            max_matches_per_file: Maximum matching lines reported per file
+            offset: Number of matches to skip
+            limit: Maximum number of matches to return
+            use_index: Narrow the scan with the on-disk trigram index
 
         Returns:
-            True if path should be ignored
+            Dict with matches (path, line, column, text), the number of candidate
+            and scanned files, and next_offset when more matches remain
         """
-        if not patterns:
-            return False
-
-        parts = Path(path).parts
-        for pattern in patterns:
-            pattern = pattern.strip()
-            if not pattern or pattern.startswith("#"):
-                continue
-
-            if pattern.endswith("/"):
-                pattern = pattern.rstrip("/")
-                if pattern in parts:
-                    return True
-            else:
-                if fnmatch.fnmatch(parts[-1], pattern):  # Match basename
-                    return True
-                # Match full path
-                if fnmatch.fnmatch(path, pattern):
-                    return True
+        if max_matches_per_file < 1 or limit < 1 or offset < 0:
+            raise ValueError("max_matches_per_file and limit must be positive and offset not negative")
+        pattern = compile_query(query, regex, case_sensitive)
+        path = await self.validate_path(path)
+        candidates = await self.run_blocking(self._search_candidates, path, pattern, glob, use_index)
+
+        matches: list[dict[str, Any]] = []
+        scanned = 0
+        for start in range(0, len(candidates), SEARCH_CHUNK_SIZE * SEARCH_PARALLEL_CHUNKS):
+            window = candidates[start : start + SEARCH_CHUNK_SIZE * SEARCH_PARALLEL_CHUNKS]
+            chunks = [window[i : i + SEARCH_CHUNK_SIZE] for i in range(0, len(window), SEARCH_CHUNK_SIZE)]
+            for chunk_matches in await asyncio.gather(*(self.run_blocking(self._scan_files, path, chunk, pattern, max_matches_per_file) for chunk in chunks)):
+                matches.extend(chunk_matches)
+            scanned += len(window)
+            if len(matches) > offset + limit:
+                break
+
+        return {
+            "matches": matches[offset : offset + limit],
+            "candidates": len(candidates),
+            "files_scanned": scanned,
+            "next_offset": offset + limit if len(matches) > offset + limit else None,
+        }
+
+    def _search_candidates(self, path: Path, pattern: re.Pattern, glob: str | None, use_index: bool) -> list[str]:
+        rel_paths = list(self._tree_snapshot(path).root.iter_files())
+        if use_index:
+            try:
+                rel_paths = get_index(path).candidates(rel_paths, required_trigrams(pattern))
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("Trigram index unavailable for %s, scanning all files: %s", path, e)
+        if glob:
+            match = re.compile(fnmatch.translate(glob)).match
+            rel_paths = [rel_path for rel_path in rel_paths if match(rel_path) or match(rel_path.rpartition("/")[2])]
+        return sorted(rel_paths)
 
-        return False
+    @staticmethod
+    def _scan_files(root: Path, rel_paths: list[str], pattern: re.Pattern, max_matches: int) -> list[dict[str, Any]]:
+        matches = []
+        for rel_path in rel_paths:
+            matches.extend(scan_file(root / rel_path, rel_path, pattern, max_matches))
+        return matches
 
-    def _load_gitignore(self, path: str) -> list[str]:
-        """Load gitignore patterns from a directory.
+    async def code_outline(self, path: str) -> list[dict[str, Any]]:
+        """List the classes, functions and methods of a Python file with their line spans.
 
         Args:
-            path: Directory containing .gitignore
+            path: Python file path
 
         Returns:
-            List of gitignore patterns
+            Symbols in file order, with qualname, name, kind, line, end_line and nesting depth
         """
-        gitignore_path = os.path.join(path, ".gitignore")
-        patterns = []
-        if os.path.exists(gitignore_path):
-            with open(gitignore_path) as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        patterns.append(line)
-        return patterns
+        path = await self.validate_path(path)
+        symbols = await self.run_blocking(outline_file, path)
+        return [symbol.to_dict() for symbol in symbols]
+
+    async def find_symbol(self, path: str, name: str, kind: str | None = None, offset: int = 0, limit: int = 100) -> dict[str, Any]:
+        """Find Python definitions below a directory.
+
+        Python files are selected like in file_tree and indexed on first use,
+        in parallel worker processes for large trees. Later calls reparse only
+        files whose content changed.
+
+        Args:
+            path: Root directory to search
+            name: Symbol name, or a dotted suffix of its qualname like Class.method
+            kind: Only return symbols of this kind, see SYMBOL_KINDS
+            offset: Number of matches to skip
+            limit: Maximum number of matches to return
+
+        Returns:
+            Dict with matches (path, qualname, name, kind, line, end_line, depth),
+            the number of indexed files and next_offset when more matches remain
+        """
+        if not name:
+            raise ValueError("Symbol name must not be empty")
+        if kind is not None and kind not in SYMBOL_KINDS:
+            raise ValueError(f"Unknown symbol kind {kind!r}, expected one of {', '.join(SYMBOL_KINDS)}")
+        if limit < 1 or offset < 0:
+            raise ValueError("limit must be positive and offset not negative")
+        path = await self.validate_path(path)
+        return await self.run_blocking(self._find_symbol, path, name, kind, offset, limit)
+
+    def _find_symbol(self, path: Path, name: str, kind: str | None, offset: int, limit: int) -> dict[str, Any]:
+        index = get_symbol_index(path)
+        # While a watcher vouches for the tree, only files it reported changed need a stat
+        verify = not get_invalidation_bus().is_current(str(path))
+        snapshot = self._tree_snapshot(path)
+        index.refresh((rel_path for rel_path in snapshot.root.iter_files() if is_python_file(rel_path)), verify, snapshot)
+        matches = index.find(name, kind)
+        return {
+            "matches": matches[offset : offset + limit],
+            "files_indexed": len(index.files),
+            "next_offset": offset + limit if len(matches) > offset + limit else None,
+        }
 
     def _get_tracked_files(self, repo_path: str) -> set[str] | None:
         """Get set of tracked files in a git repository.
@@ -195,8 +461,10 @@ class FileTools(BaseTools):
         Returns:
             Set of tracked file paths or None if not a git repo
         """
+        import git
+
         try:
-            repo = git.Repo(repo_path)
-            return set(repo.git.ls_files().splitlines())
+            with get_repo_pool().lease(repo_path) as repo:
+                return {name for name in repo.git.ls_files("-z").split("\0") if name}
         except git.exc.InvalidGitRepositoryError:
             return None
@@ -1,43 +1,538 @@
 """Git operations and utilities."""
 
+import asyncio
+import os
+import re
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from datetime import UTC, datetime
 from pathlib import Path
-
-import git
+from typing import TYPE_CHECKING, Any, TypeVar
 
 from mcp_server_code_assist.base_tools import BaseTools
+from mcp_server_code_assist.tools.lru import LRUCache
+from mcp_server_code_assist.tools.repo_pool import get_repo_pool
+from mcp_server_code_assist.tools.result_cache import get_result_cache, is_full_sha
+
+if TYPE_CHECKING:
+    import git
+
+T = TypeVar("T")
+
+LOG_FORMATS = ("full", "oneline")
+DIFF_MODES = ("patch", "stat", "name_only")
+# Fields of git's --format for commit metadata, separated by NUL
+_COMMIT_FORMAT = "%x00".join(("%H", "%P", "%an", "%ae", "%aI", "%s", "%B")) + "%x1e"
+
+# Commit metadata by SHA, and SHA lists of anchored log pages
+_commit_cache = LRUCache(max_entries=50_000)
+_log_page_cache = LRUCache(max_entries=256)
+# Per-line blame by last commit touching the file, path and line range
+_blame_cache = LRUCache(max_entries=256)
+# Porcelain header fields of git blame kept in blame results
+_BLAME_FIELDS = {"author": "author", "author-mail": "email", "summary": "summary"}
+# File lists and stat output of diffs between two trees, their patches live in the result cache
+_diff_cache = LRUCache(max_entries=4096)
+
+
+def parse_log_cursor(cursor: str) -> tuple[str, int]:
+    """Split a log cursor into the anchor commit SHA and the number of commits to skip."""
+    sha, _, skip = cursor.partition(":")
+    if len(sha) != 40 or not skip.isdigit():
+        raise ValueError(f"Invalid log cursor: {cursor}")
+    return sha, int(skip)
+
+
+def _is_absolute_date(value: str | None) -> bool:
+    if value is None:
+        return True
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _line_range_args(start_line: int | None, end_line: int | None) -> list[str]:
+    if start_line is None and end_line is None:
+        return []
+    return [f"-L{start_line or 1},{end_line or ''}"]
+
+
+def parse_diff_cursor(cursor: str) -> tuple[int, int]:
+    """Split a diff cursor into the index of a file and a byte offset into its output."""
+    index, _, offset = cursor.partition(":")
+    if not index.isdigit() or not offset.isdigit():
+        raise ValueError(f"Invalid diff cursor: {cursor}")
+    return int(index), int(offset)
+
+
+def _utf8_cut(data: bytes, limit: int) -> int:
+    """Largest cut point up to limit, at a line end if there is one, never inside a character."""
+    cut = data.rfind(b"\n", 0, limit) + 1
+    if cut:
+        return cut
+    cut = limit
+    while cut > 0 and data[cut] & 0xC0 == 0x80:
+        cut -= 1
+    if cut == 0:
+        # A single character wider than the limit
+        cut = 1
+        while cut < len(data) and data[cut] & 0xC0 == 0x80:
+            cut += 1
+    return cut
+
+
+def _take_page(entries: Iterable[str], index: int, offset: int, max_bytes: int | None) -> tuple[list[str], str | None]:
+    """Collect per-file outputs starting at entry index until max_bytes is reached.
+
+    Returns:
+        Chunks of the page and the cursor of the rest, None if nothing is left
+    """
+    chunks = []
+    budget = max_bytes
+    for entry in entries:
+        data = entry.encode()[offset:]
+        if budget is None or len(data) <= budget:
+            chunks.append(data.decode())
+            if budget is not None:
+                budget -= len(data)
+            index, offset = index + 1, 0
+            continue
+        if chunks:
+            # Start the next page at this file rather than splitting it
+            return chunks, f"{index}:{offset}"
+        cut = _utf8_cut(data, budget)
+        chunks.append(data[:cut].decode())
+        return chunks, f"{index}:{offset + cut}"
+    return chunks, None
+
+
+class DiffSource:
+    """Per-file outputs of one diff, cached when both sides are fixed trees."""
+
+    # Files whose patches are fetched with one git call
+    BATCH = 32
+    # Patches larger than this are not cached
+    MAX_CACHED_PATCH = 1 << 20
+
+    def __init__(self, repo: "git.Repo", target: str | None, paths: list[str]):
+        self.repo = repo
+        self.paths = paths
+        self.revs = [target] if target else []
+        self.cache_key = None
+        if target and ".." in target and "..." not in target:
+            old, new = (rev or "HEAD" for rev in target.split("..", 1))
+            self.revs = [repo.commit(old).tree.hexsha, repo.commit(new).tree.hexsha]
+            self.cache_key = (*self.revs, tuple(paths))
+
+    def _git_diff(self, *args: str, paths: list[str] | None = None, strip_newline: bool = False) -> str:
+        # Renames are not detected, as a paged diff fetches the patches of each side separately
+        return self.repo.git.diff("--no-renames", "--src-prefix=a/", "--dst-prefix=b/", *args, *self.revs, "--", *(self.paths if paths is None else paths), strip_newline_in_stdout=strip_newline)
+
+    def _cached(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        if self.cache_key is None:
+            return compute()
+        value = _diff_cache.get((*self.cache_key, *key))
+        if value is None:
+            value = compute()
+            _diff_cache.put((*self.cache_key, *key), value)
+        return value
+
+    def full_patch(self) -> str:
+        if self.cache_key is None:
+            return self._git_diff(strip_newline=True)
+        cache = get_result_cache()
+        key = ("diff", *self.cache_key, "full")
+        patch = cache.get(key)
+        if patch is None:
+            patch = self._git_diff(strip_newline=True)
+            if len(patch) <= self.MAX_CACHED_PATCH:
+                cache.put(key, patch)
+        return patch
+
+    def names(self) -> list[str]:
+        return self._cached(("names",), lambda: [name for name in self._git_diff("--name-only", "-z").split("\0") if name])
+
+    def summary(self, mode: str) -> list[str]:
+        """One line per file, for the stat and name_only modes."""
+        if mode == "name_only":
+            return [f"{name}\n" for name in self.names()]
+
+        def compute() -> list[str]:
+            lines = []
+            for record in self._git_diff("--numstat", "-z").split("\0"):
+                if record:
+                    added, removed, name = record.split("\t", 2)
+                    lines.append(f"{name} | +{added} -{removed}\n")
+            return lines
+
+        return self._cached(("stat",), compute)
+
+    def patches(self, start: int) -> Iterator[str]:
+        """Patch of each file from the start-th on, fetched a batch of files at a time."""
+        names = self.names()
+        for batch_start in range(start, len(names), self.BATCH):
+            batch = names[batch_start : batch_start + self.BATCH]
+            cached = [get_result_cache().get(("diff", *self.cache_key, "patch", name)) for name in batch] if self.cache_key else [None] * len(batch)
+            missing = [name for name, patch in zip(batch, cached) if patch is None]
+            fetched = {_patch_path(patch): patch for patch in _split_patch(self._git_diff(paths=[f":(literal){name}" for name in missing]))} if missing else {}
+            for name, patch in zip(batch, cached):
+                if patch is None:
+                    patch = fetched.get(name, "")
+                    if self.cache_key and len(patch) <= self.MAX_CACHED_PATCH:
+                        get_result_cache().put(("diff", *self.cache_key, "patch", name), patch)
+                yield patch
+
+
+def _split_patch(output: str) -> list[str]:
+    """Split git diff output into one patch per file, in path order."""
+    return [part for part in re.split(r"(?m)^(?=diff --git )", output) if part]
+
+
+_QUOTED_ESCAPES = {"a": 7, "b": 8, "t": 9, "n": 10, "v": 11, "f": 12, "r": 13, '"': 34, "\\": 92}
+
+
+def _patch_path(patch: str) -> str:
+    """Path in the diff --git header of a patch made without rename detection.
+
+    Both sides then name the same path, as "a/<path> b/<path>" or, for paths
+    git has to quote, as C-style quoted strings.
+    """
+    header = patch.partition("\n")[0].removeprefix("diff --git ")
+    if not header.startswith('"'):
+        return header[2 : 2 + (len(header) - 5) // 2]
+    raw = bytearray()
+    i = 1
+    while header[i] != '"':
+        if header[i] != "\\":
+            raw += header[i].encode()
+            i += 1
+        elif header[i + 1] in "01234567":
+            raw.append(int(header[i + 1 : i + 4], 8))
+            i += 4
+        else:
+            raw.append(_QUOTED_ESCAPES[header[i + 1]])
+            i += 2
+    return raw.decode(errors="replace")[2:]
+
+
+def _commit_metadata(repo: "git.Repo", shas: list[str]) -> list[dict[str, Any]]:
+    """Metadata of commits, running git only for those not cached yet."""
+    cached = {sha: _commit_cache.get(sha) for sha in shas}
+    missing = [sha for sha, commit in cached.items() if commit is None]
+    if missing:
+        output = repo.git.show("-s", f"--format={_COMMIT_FORMAT}", *missing)
+        for record in output.split("\x1e"):
+            record = record.lstrip("\n")
+            if not record:
+                continue
+            sha, parents, name, email, date, subject, message = record.split("\x00")
+            commit = {
+                "sha": sha,
+                "parents": parents.split(),
+                "author": name,
+                "email": email,
+                "date": str(datetime.fromisoformat(date)),
+                "subject": subject,
+                "message": message,
+            }
+            _commit_cache.put(sha, commit)
+            cached[sha] = commit
+    return [cached[sha] for sha in shas]
 
 
 class GitTools(BaseTools):
     """Tools for git operations."""
 
     def __init__(self, allowed_paths: list[str] | None = None):
+        import git
+
         super().__init__(allowed_paths)
+        self.repo_pool = get_repo_pool()
         # Validate that all paths are git repositories
         if allowed_paths:
             for path in allowed_paths:
                 try:
-                    git.Repo(path)
+                    with self.repo_pool.lease(path):
+                        pass
                 except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError) as e:
                     raise ValueError(f"Invalid git repository path: {path}") from e
 
+    async def _with_repo(self, repo_path: str | Path, func: Callable[["git.Repo"], T]) -> T:
+        """Run func against the pooled repository handle on the worker pool."""
+
+        def run() -> T:
+            with self.repo_pool.lease(repo_path) as repo:
+                return func(repo)
+
+        return await self.run_blocking(run)
+
     async def status(self, repo_path: str) -> str:
         """Get git repository status."""
-        repo = git.Repo(repo_path)
-        return repo.git.status()
-
-    async def diff(self, repo_path: str, target: str | None = None) -> str:
-        """Show git diff."""
-        repo = git.Repo(repo_path)
-        return repo.git.diff(target) if target else repo.git.diff()
-
-    async def log(self, repo_path: str, max_count: int = 10) -> str:
-        """Show git commit history."""
-        repo = git.Repo(repo_path)
-        commits = list(repo.iter_commits(max_count=max_count))
-        log = []
-        for commit in commits:
-            log.append(f"Commit: {commit.hexsha}\nAuthor: {commit.author}\nDate: {commit.authored_datetime}\nMessage: {commit.message}\n")
-        return "\n".join(log)
+        return await self._with_repo(repo_path, lambda repo: repo.git.status())
+
+    async def diff(
+        self,
+        repo_path: str,
+        target: str | None = None,
+        mode: str = "patch",
+        paths: list[str] | None = None,
+        max_bytes: int | None = None,
+        cursor: str | None = None,
+    ) -> str:
+        """Show git diff.
+
+        Args:
+            repo_path: Path to git repository
+            target: Revision to diff the working tree against, or a "A..B" range
+            mode: "patch" for the full diff, "stat" for added/removed line counts per file, or "name_only"
+            paths: Only diff these paths
+            max_bytes: Stop before the output exceeds this many bytes and return a continuation cursor
+            cursor: Continuation cursor of a previous call with the same arguments
+
+        Returns:
+            Diff output, followed by a continuation cursor if it was cut off
+        """
+        page = await self.diff_page(repo_path, target, mode, paths, max_bytes, cursor)
+        text = page["content"]
+        if page["next_cursor"]:
+            text += f"\nOutput truncated at {max_bytes} bytes, continue with cursor={page['next_cursor']}"
+        return text
+
+    async def diff_page(
+        self,
+        repo_path: str,
+        target: str | None = None,
+        mode: str = "patch",
+        paths: list[str] | None = None,
+        max_bytes: int | None = None,
+        cursor: str | None = None,
+    ) -> dict[str, Any]:
+        """Get one bounded page of a diff, split at file boundaries where possible.
+
+        Diffs between two revisions are keyed by their tree SHAs, which never
+        change, so their file lists and per-file patches are cached.
+
+        Returns:
+            Dict with "content", "files" (number of files in the whole diff) and
+            "next_cursor", None on the last page
+        """
+        if mode not in DIFF_MODES:
+            raise ValueError(f"Unknown diff mode: {mode}. Expected one of {', '.join(DIFF_MODES)}")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        index, offset = parse_diff_cursor(cursor) if cursor else (0, 0)
+
+        def run(repo: "git.Repo") -> dict[str, Any]:
+            source = DiffSource(repo, target, paths or [])
+            if mode == "patch" and max_bytes is None and not cursor:
+                return {"content": source.full_patch(), "files": None, "next_cursor": None}
+            if mode == "patch":
+                files = len(source.names())
+                entries = source.patches(index)
+            else:
+                summary = source.summary(mode)
+                files = len(summary)
+                entries = summary[index:]
+            chunks, next_cursor = _take_page(entries, index, offset, max_bytes)
+            return {"content": "".join(chunks).rstrip("\n"), "files": files, "next_cursor": next_cursor}
+
+        return await self._with_repo(repo_path, run)
+
+    async def log(
+        self,
+        repo_path: str,
+        max_count: int = 10,
+        skip: int = 0,
+        cursor: str | None = None,
+        paths: list[str] | None = None,
+        author: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        revision: str | None = None,
+        log_format: str = "full",
+    ) -> str:
+        """Show git commit history.
+
+        Args:
+            repo_path: Path to git repository
+            max_count: Maximum number of commits to show
+            skip: Number of matching commits to skip
+            cursor: Continuation cursor of a previous call, overrides revision and skip
+            paths: Only show commits touching these paths
+            author: Only show commits whose author matches this pattern
+            since: Only show commits more recent than this date
+            until: Only show commits older than this date
+            revision: Commit to start from. Defaults to HEAD
+            log_format: "full" for complete messages or "oneline" for hash and subject
+
+        Returns:
+            Formatted commits, followed by a continuation cursor if there are more
+        """
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format: {log_format}. Expected one of {', '.join(LOG_FORMATS)}")
+        page = await self.log_page(repo_path, max_count, skip, cursor, paths, author, since, until, revision)
+        if log_format == "oneline":
+            lines = [f"{commit['sha'][:12]} {commit['subject']}" for commit in page["commits"]]
+        else:
+            lines = [f"Commit: {commit['sha']}\nAuthor: {commit['author']}\nDate: {commit['date']}\nMessage: {commit['message']}\n" for commit in page["commits"]]
+        if page["next_cursor"]:
+            lines.append(f"More commits available, continue with cursor={page['next_cursor']}")
+        return "\n".join(lines)
+
+    async def log_page(
+        self,
+        repo_path: str,
+        max_count: int = 10,
+        skip: int = 0,
+        cursor: str | None = None,
+        paths: list[str] | None = None,
+        author: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        revision: str | None = None,
+    ) -> dict[str, Any]:
+        """Get one page of commit history as structured data.
+
+        Paging is anchored at the commit SHA the first page started from, so
+        commits made while paging do not shift later pages. Pages of anchored
+        queries and the metadata of every commit are cached by SHA.
+
+        Returns:
+            Dict with "commits" (sha, parents, author, email, date, subject and
+            message of each) and "next_cursor", None on the last page
+        """
+        if max_count < 1 or skip < 0:
+            raise ValueError("max_count must be positive and skip must not be negative")
+        if cursor is not None:
+            revision, skip = parse_log_cursor(cursor)
+
+        def run(repo: "git.Repo") -> dict[str, Any]:
+            start = repo.commit(revision or "HEAD").hexsha
+            filters = (tuple(paths or ()), author, since, until)
+            # Relative dates like "2 weeks ago" change meaning over time
+            key = (repo.git_dir, start, skip, max_count, filters) if _is_absolute_date(since) and _is_absolute_date(until) else None
+            shas = _log_page_cache.get(key) if key else None
+            if shas is None:
+                args = [f"--max-count={max_count + 1}", f"--skip={skip}"]
+                if author:
+                    args.append(f"--author={author}")
+                if since:
+                    args.append(f"--since={since}")
+                if until:
+                    args.append(f"--until={until}")
+                shas = repo.git.rev_list(*args, start, "--", *(paths or ())).split()
+                if key:
+                    _log_page_cache.put(key, shas)
+            commits = _commit_metadata(repo, shas[:max_count])
+            next_cursor = f"{start}:{skip + max_count}" if len(shas) > max_count else None
+            return {"commits": commits, "next_cursor": next_cursor}
+
+        return await self._with_repo(repo_path, run)
+
+    async def blame_incremental(
+        self,
+        repo_path: str,
+        path: str,
+        start_line: int | None = None,
+        end_line: int | None = None,
+        revision: str | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream blame hunks as git finds them, without waiting for the whole file.
+
+        Hunks arrive in the order git resolves them, not in line order.
+
+        Args:
+            repo_path: Path to git repository
+            path: File to blame, relative to the repository root or absolute
+            start_line: First line to blame, 1-based. Defaults to the first line
+            end_line: Last line to blame, inclusive. Defaults to the last line
+            revision: Commit to blame at. Defaults to HEAD
+
+        Yields:
+            Dicts with commit, author, email, date, summary, final_line, original_line and lines
+        """
+        args = ["blame", "--incremental", *_line_range_args(start_line, end_line), revision or "HEAD", "--", path]
+        proc = await asyncio.create_subprocess_exec("git", "-C", str(repo_path), *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        commits: dict[str, dict[str, str]] = {}
+        hunk: dict[str, Any] | None = None
+        try:
+            async for raw in proc.stdout:
+                line = raw.decode(errors="replace").rstrip("\n")
+                if hunk is None:
+                    sha, original, final, count = line.split()
+                    hunk = {"commit": sha, "original_line": int(original), "final_line": int(final), "lines": int(count)}
+                    info = commits.setdefault(sha, {})
+                    continue
+                key, _, value = line.partition(" ")
+                if key == "filename":
+                    yield {**hunk, **commits[hunk["commit"]]}
+                    hunk = None
+                elif key in _BLAME_FIELDS:
+                    info[_BLAME_FIELDS[key]] = value
+                elif key == "author-time":
+                    info["date"] = str(datetime.fromtimestamp(int(value), UTC))
+            stderr = await proc.stderr.read()
+            if await proc.wait() != 0:
+                raise ValueError(f"git blame failed: {stderr.decode(errors='replace').strip()}")
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+    async def blame(
+        self,
+        repo_path: str,
+        path: str,
+        start_line: int | None = None,
+        end_line: int | None = None,
+        revision: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Blame a range of lines of a file.
+
+        Results are cached by the last commit that changed the file and the
+        range, so blaming an unchanged file again is free even after HEAD
+        moves on.
+
+        Args:
+            repo_path: Path to git repository
+            path: File to blame, relative to the repository root or absolute
+            start_line: First line to blame, 1-based. Defaults to the first line
+            end_line: Last line to blame, inclusive. Defaults to the last line
+            revision: Commit to blame at. Defaults to HEAD
+
+        Returns:
+            One dict per line, in line order, with line, content, commit, author, email, date and summary
+        """
+        if (start_line is not None and start_line < 1) or (end_line is not None and end_line < (start_line or 1)):
+            raise ValueError("start_line must be positive and end_line must not be before start_line")
+
+        def resolve(repo: "git.Repo") -> tuple[str, str, str]:
+            rel_path = os.path.relpath(path, repo.working_tree_dir) if os.path.isabs(path) else path
+            last_change = repo.git.rev_list("-1", revision or "HEAD", "--", rel_path)
+            if not last_change:
+                raise ValueError(f"No commits touch {rel_path} at {revision or 'HEAD'}")
+            return repo.working_tree_dir, rel_path, last_change
+
+        root, rel_path, last_change = await self._with_repo(repo_path, resolve)
+        key = (last_change, rel_path, start_line, end_line)
+        cached = _blame_cache.get(key)
+        if cached is not None:
+            return cached
+
+        by_line: dict[int, dict[str, Any]] = {}
+        async for hunk in self.blame_incremental(root, rel_path, start_line, end_line, last_change):
+            entry = {field: hunk.get(field) for field in ("commit", "author", "email", "date", "summary")}
+            for offset in range(hunk["lines"]):
+                by_line[hunk["final_line"] + offset] = entry
+
+        def contents(repo: "git.Repo") -> list[str]:
+            return (repo.commit(last_change).tree / rel_path).data_stream.read().decode(errors="replace").splitlines()
+
+        lines = await self._with_repo(root, contents)
+        result = [{"line": number, "content": lines[number - 1], **entry} for number, entry in sorted(by_line.items())]
+        _blame_cache.put(key, result)
+        return result
 
     async def show(self, repo_path: str, revision: str | None = None, format_str: str | None = None) -> str:
         """Show various types of git objects.
@@ -50,13 +545,19 @@ class GitTools(BaseTools):
         Returns:
             String output of git show command
         """
-        repo = git.Repo(repo_path)
         args = []
         if format_str:
             args.extend([f"--format={format_str}"])
         if revision:
             args.append(revision)
-        return repo.git.show(*args)
+
+        def run(repo: "git.Repo") -> str:
+            if not is_full_sha(revision):
+                return repo.git.show(*args)
+            # A full SHA always shows the same object
+            return get_result_cache().get_or_compute(("show", repo.git_dir, revision, format_str or ""), lambda: repo.git.show(*args))
+
+        return await self._with_repo(repo_path, run)
 
     async def is_valid_operation(self, path: Path) -> bool:
         """Validate if operation can be performed on path.
@@ -67,8 +568,10 @@ class GitTools(BaseTools):
         Returns:
             True if path exists and is a git repository
         """
+        import git
+
         try:
-            git.Repo(path)
-            return True
+            with self.repo_pool.lease(path):
+                return True
         except git.exc.InvalidGitRepositoryError:
             return False
@@ -0,0 +1,253 @@
+"""Compiled gitignore matching with nested ignore files and negation."""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+IGNORE_FILE = ".gitignore"
+
+
+def translate_pattern(pattern: str) -> str:
+    """Translate the glob part of a gitignore pattern into a regex.
+
+    Args:
+        pattern: Glob with the leading "!" and trailing "/" already removed
+
+    Returns:
+        Regex source matching paths relative to the ignore file's directory
+    """
+    anchored = "/" in pattern
+    pattern = pattern.removeprefix("/")
+    out = [] if anchored else ["(?:.*/)?"]
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/") and (i + 2 == n or pattern[i + 2] == "/"):
+                if i + 2 == n:
+                    out.append(".*")
+                    i += 2
+                else:
+                    out.append("(?:.*/)?")
+                    i += 3
+                continue
+            out.append("[^/]*")
+            while i < n and pattern[i] == "*":
+                i += 1
+            continue
+        if c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            regex, i = _translate_class(pattern, i)
+            out.append(regex)
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def _translate_class(pattern: str, start: int) -> tuple[str, int]:
+    """Translate the bracket expression at start, returning the regex and its closing index."""
+    # A "]" right after the opening bracket (or its negation) is literal
+    j = start + 1
+    if j < len(pattern) and pattern[j] in "!^":
+        j += 1
+    if j < len(pattern) and pattern[j] == "]":
+        j += 1
+    end = pattern.find("]", j)
+    if end == -1:
+        return re.escape("["), start
+    body = pattern[start + 1 : end]
+    negated = body[:1] in ("!", "^")
+    if negated:
+        body = body[1:]
+    body = "".join("\\" + ch if ch in "\\[]^&~|" else ch for ch in body)
+    return ("[^" if negated else "[") + body + "]", end
+
+
+def parse_line(line: str) -> tuple[str, bool, bool] | None:
+    """Parse one ignore file line.
+
+    Returns:
+        Tuple of regex source, negated flag and directory-only flag, or None for blanks and comments
+    """
+    line = line.rstrip("\n\r")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    if not stripped or stripped.startswith("#"):
+        return None
+    negate = stripped.startswith("!")
+    if negate:
+        stripped = stripped[1:]
+    dir_only = stripped.endswith("/")
+    stripped = stripped.rstrip("/")
+    if not stripped:
+        return None
+    return translate_pattern(stripped), negate, dir_only
+
+
+class IgnoreRules:
+    """Rules of one ignore file compiled into a few combined regexes.
+
+    Consecutive rules with the same polarity are merged into one block, with
+    separate regexes for patterns matching anything and directories only.
+    Blocks are checked last to first, so the last matching rule wins.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        runs: list[tuple[bool, list[str], list[str]]] = []
+        for line in lines:
+            parsed = parse_line(line)
+            if parsed is None:
+                continue
+            regex, negate, dir_only = parsed
+            if not runs or runs[-1][0] != negate:
+                runs.append((negate, [], []))
+            runs[-1][2 if dir_only else 1].append(regex)
+        self.blocks = [(negate, _combine(any_rules), _combine(dir_rules)) for negate, any_rules, dir_rules in reversed(runs)]
+
+    def __bool__(self) -> bool:
+        return bool(self.blocks)
+
+    def match(self, rel_path: str, is_dir: bool) -> bool | None:
+        """Return True if ignored, False if re-included, None if no rule matches."""
+        for negate, any_re, dir_re in self.blocks:
+            if (any_re is not None and any_re.match(rel_path)) or (is_dir and dir_re is not None and dir_re.match(rel_path)):
+                return not negate
+        return None
+
+
+def _combine(regexes: list[str]) -> re.Pattern | None:
+    if not regexes:
+        return None
+    return re.compile("(?:" + "|".join(regexes) + r")\Z", re.DOTALL)
+
+
+class GitignoreMatcher:
+    """Ignore matcher for one root directory.
+
+    Rules are loaded lazily from the .gitignore of each directory consulted
+    plus .git/info/exclude, and each compiled file is kept until refresh()
+    sees its mtime change.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        # Keyed by directory relative to the root, or None for .git/info/exclude
+        self._rules: dict[str | None, tuple[Path, int | None, IgnoreRules | None]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Drop compiled rules whose ignore file changed, appeared or vanished."""
+        with self._lock:
+            for rel_dir, (path, mtime, _) in list(self._rules.items()):
+                if _mtime_ns(path) != mtime:
+                    del self._rules[rel_dir]
+
+    def ignore_files(self) -> list[Path]:
+        """Paths of every ignore file consulted so far, existing or not."""
+        return [path for path, _, _ in list(self._rules.values())]
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False, check_parents: bool = True) -> bool:
+        """Check whether a path relative to the root is ignored.
+
+        Args:
+            rel_path: Slash separated path relative to the root
+            is_dir: Whether the path is a directory
+            check_parents: Also report paths inside ignored directories. Walkers
+                that never descend into ignored directories can skip this.
+
+        Returns:
+            True if the path should be ignored
+        """
+        parts = rel_path.strip("/").split("/")
+        if check_parents:
+            for depth in range(1, len(parts)):
+                if self._match(parts[:depth], True):
+                    return True
+        return self._match(parts, is_dir)
+
+    def _match(self, parts: list[str], is_dir: bool) -> bool:
+        # Deeper ignore files take precedence over shallower ones, and every
+        # .gitignore over .git/info/exclude.
+        for depth in range(len(parts) - 1, -1, -1):
+            rules = self._rules_for("/".join(parts[:depth]))
+            if rules:
+                result = rules.match("/".join(parts[depth:]), is_dir)
+                if result is not None:
+                    return result
+        exclude = self._rules_for(None)
+        if exclude:
+            return bool(exclude.match("/".join(parts), is_dir))
+        return False
+
+    def _ignore_file(self, rel_dir: str | None) -> Path:
+        if rel_dir is None:
+            return self.root / ".git" / "info" / "exclude"
+        return self.root / rel_dir / IGNORE_FILE if rel_dir else self.root / IGNORE_FILE
+
+    def _rules_for(self, rel_dir: str | None) -> IgnoreRules | None:
+        entry = self._rules.get(rel_dir)
+        if entry is not None:
+            return entry[2]
+        path = self._ignore_file(rel_dir)
+        mtime = _mtime_ns(path)
+        rules = None
+        if mtime is not None:
+            try:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    rules = IgnoreRules(f)
+            except OSError:
+                mtime = None
+        with self._lock:
+            self._rules[rel_dir] = (path, mtime, rules)
+        return rules
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class MatcherCache:
+    """LRU cache of gitignore matchers keyed by root."""
+
+    def __init__(self, max_roots: int = 16):
+        self.max_roots = max_roots
+        self._matchers: OrderedDict[str, GitignoreMatcher] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, root: str | Path) -> GitignoreMatcher:
+        """Get the matcher for root with stale ignore files reloaded."""
+        key = str(root)
+        with self._lock:
+            matcher = self._matchers.get(key)
+            if matcher is None:
+                matcher = self._matchers[key] = GitignoreMatcher(root)
+            self._matchers.move_to_end(key)
+            while len(self._matchers) > self.max_roots:
+                self._matchers.popitem(last=False)
+        matcher.refresh()
+        return matcher
+
+    def invalidate(self, root: str | Path | None = None) -> None:
+        with self._lock:
+            if root is None:
+                self._matchers.clear()
+            else:
+                self._matchers.pop(str(root), None)
+
+    def invalidate_where(self, predicate: Callable[[str], bool]) -> None:
+        """Drop the matchers of every root the predicate holds for."""
+        with self._lock:
+            for key in [key for key in self._matchers if predicate(key)]:
+                del self._matchers[key]
@@ -0,0 +1,146 @@
+"""Memory-mapped ranged reads with a cached line offset index."""
+
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+# Newlines are counted per block, so locating a line scans at most one block.
+BLOCK_SIZE = 1 << 16
+
+
+class LineIndex:
+    """Sparse line index storing the newline count before each block."""
+
+    def __init__(self, size: int, newlines_before: array, ends_with_newline: bool):
+        self.size = size
+        self.newlines_before = newlines_before
+        self.ends_with_newline = ends_with_newline
+
+    @classmethod
+    def build(cls, mm: mmap.mmap, size: int) -> "LineIndex":
+        newlines_before = array("Q", [0])
+        total = 0
+        for start in range(0, size, BLOCK_SIZE):
+            total += mm[start : start + BLOCK_SIZE].count(b"\n")
+            newlines_before.append(total)
+        ends_with_newline = size > 0 and mm[size - 1 : size] == b"\n"
+        return cls(size, newlines_before, ends_with_newline)
+
+    @property
+    def newline_count(self) -> int:
+        return self.newlines_before[-1]
+
+    @property
+    def line_count(self) -> int:
+        if self.size == 0:
+            return 0
+        return self.newline_count + (0 if self.ends_with_newline else 1)
+
+    def line_offset(self, mm: mmap.mmap, line: int) -> int:
+        """Byte offset where a zero based line starts, or the file size past the end."""
+        if line <= 0:
+            return 0
+        if line > self.newline_count:
+            return self.size
+        # Block holding the line-th newline
+        block = bisect_left(self.newlines_before, line) - 1
+        pos = block * BLOCK_SIZE
+        for _ in range(line - self.newlines_before[block]):
+            pos = mm.find(b"\n", pos) + 1
+        return pos
+
+    def line_at(self, mm: mmap.mmap, offset: int) -> int:
+        """Zero based line containing a byte offset."""
+        offset = min(max(offset, 0), self.size)
+        block = offset // BLOCK_SIZE
+        start = block * BLOCK_SIZE
+        return self.newlines_before[block] + mm[start:offset].count(b"\n")
+
+
+class LineIndexCache:
+    """LRU cache of line indexes keyed by path and validated by file identity."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[tuple[int, int, int, int], LineIndex]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat: os.stat_result, mm: mmap.mmap) -> LineIndex:
+        stamp = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        index = LineIndex.build(mm, stat.st_size)
+        with self._lock:
+            self._entries[path] = (stamp, index)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+
+_line_index_cache = LineIndexCache()
+
+
+def read_range(
+    path: str | Path,
+    offset: int | None = None,
+    length: int | None = None,
+    start_line: int | None = None,
+    end_line: int | None = None,
+) -> dict[str, Any]:
+    """Read a byte range or an inclusive one based line range of a file.
+
+    Args:
+        path: File to read
+        offset: First byte to read
+        length: Maximum number of bytes to read, defaults to the rest of the file
+        start_line: First line to read, defaults to 1
+        end_line: Last line to read, defaults to the last line
+
+    Returns:
+        Dict with the decoded content, the byte and line span it covers and
+        the total size and line count of the file
+    """
+    if (offset is not None or length is not None) and (start_line is not None or end_line is not None):
+        raise ValueError("Byte range and line range cannot be combined")
+    if any(value is not None and value < 0 for value in (offset, length)):
+        raise ValueError("offset and length must not be negative")
+    if any(value is not None and value < 1 for value in (start_line, end_line)):
+        raise ValueError("start_line and end_line are one based")
+
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size == 0:
+            return {"content": "", "size": 0, "lines": 0, "start": 0, "end": 0, "start_line": 0, "end_line": 0}
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            index = _line_index_cache.get(str(path), stat, mm)
+            if start_line is not None or end_line is not None:
+                first = (start_line or 1) - 1
+                last = index.line_count if end_line is None else min(end_line, index.line_count)
+                start = index.line_offset(mm, first)
+                end = max(start, index.line_offset(mm, last))
+            else:
+                start = min(offset or 0, index.size)
+                end = index.size if length is None else min(index.size, start + length)
+                first = index.line_at(mm, start)
+                last = index.line_at(mm, end - 1) + 1 if end > start else first
+
+            return {
+                "content": mm[start:end].decode("utf-8", errors="replace"),
+                "size": index.size,
+                "lines": index.line_count,
+                "start": start,
+                "end": end,
+                "start_line": first + 1 if end > start else first,
+                "end_line": last if end > start else first,
+            }
@@ -1,10 +1,32 @@
 from pathlib import Path
+from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 
 
 # File operations
 # ====================================================================
+class FileEdit(BaseModel):
+    op: Literal["create", "rewrite", "modify", "delete"]
+    path: str
+    content: str | None = None
+    replacements: dict[str, str] | None = None
+    require_unique: bool = False
+
+    @model_validator(mode="after")
+    def check_op_fields(self) -> "FileEdit":
+        if self.op == "rewrite" and self.content is None:
+            raise ValueError(f"rewrite edit of {self.path} requires content")
+        if self.op == "modify" and self.replacements is None:
+            raise ValueError(f"modify edit of {self.path} requires replacements")
+        return self
+
+
+class ApplyEdits(BaseModel):
+    edits: list[FileEdit]
+    stat_only: bool = False
+
+
 class FileCreate(BaseModel):
     path: str | Path
     content: str = ""
@@ -17,25 +39,72 @@ class FileDelete(BaseModel):
 class FileModify(BaseModel):
     path: str | Path
     replacements: dict[str, str]
+    require_unique: bool = False
+    stat_only: bool = False
 
 
 class FileRead(BaseModel):
     path: str | Path
+    offset: int | None = None
+    length: int | None = None
+    start_line: int | None = None
+    end_line: int | None = None
+
+    @property
+    def is_ranged(self) -> bool:
+        return any(value is not None for value in (self.offset, self.length, self.start_line, self.end_line))
+
+
+class FileReadMultiple(BaseModel):
+    paths: list[str]
+    max_concurrency: int = 8
+    max_bytes: int = 10 * 1024 * 1024
 
 
 class FileRewrite(BaseModel):
     path: str | Path
     content: str
+    stat_only: bool = False
 
 
 class FileTree(BaseModel):
     path: str
 
 
+class SearchCode(BaseModel):
+    path: str
+    query: str
+    regex: bool = False
+    case_sensitive: bool = True
+    glob: str | None = None
+    max_matches_per_file: int = 20
+    offset: int = 0
+    limit: int = 100
+    use_index: bool = False
+
+
+class CodeOutline(BaseModel):
+    path: str
+
+
+class FindSymbol(BaseModel):
+    path: str
+    name: str
+    kind: Literal["class", "function", "method"] | None = None
+    offset: int = 0
+    limit: int = 100
+
+
 # Directory operations
 # ====================================================================
 class ListDirectory(BaseModel):
     path: str | Path
+    sort_by: Literal["name", "size", "mtime", "type"] = "name"
+    reverse: bool = False
+    pattern: str | None = None
+    offset: int = 0
+    limit: int | None = None
+    output_format: Literal["text", "json"] = "text"
 
 
 class CreateDirectory(BaseModel):
@@ -50,7 +119,11 @@ class GitBase(BaseModel):
 
 class GitDiff(BaseModel):
     repo_path: str
-    target: str
+    target: str = ""
+    mode: Literal["patch", "stat", "name_only"] = "patch"
+    paths: list[str] | None = None
+    max_bytes: int | None = None
+    cursor: str | None = None
 
 
 class GitShow(BaseModel):
@@ -61,12 +134,35 @@ class GitShow(BaseModel):
 class GitLog(BaseModel):
     repo_path: str
     max_count: int = 10
+    skip: int = 0
+    cursor: str | None = None
+    paths: list[str] | None = None
+    author: str | None = None
+    since: str | None = None
+    until: str | None = None
+    revision: str | None = None
+    format: Literal["full", "oneline"] = "full"
+
+
+class GitBlame(BaseModel):
+    repo_path: str
+    path: str
+    start_line: int | None = None
+    end_line: int | None = None
+    revision: str | None = None
+    output_format: Literal["text", "json"] = "text"
 
 
 class GitStatus(BaseModel):
     repo_path: str
 
 
+# Server
+# ====================================================================
+class ServerStats(BaseModel):
+    format: Literal["json", "prometheus"] = "json"
+
+
 class RepositoryOperation(BaseModel):
     path: str
     content: str | None = None
@@ -0,0 +1,115 @@
+"""Shared cache of decoded file contents."""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from mcp_server_code_assist.tools.tree_cache import RACY_WINDOW_NS
+from mcp_server_code_assist.watcher import Invalidation
+
+DEFAULT_MAX_BYTES = 32 << 20
+
+
+class ReadCache:
+    """LRU of file contents bounded by their memory size.
+
+    Entries are keyed by path and validated against the file's (device,
+    inode, mtime_ns, size) on every read, so an edit from outside the server
+    is never served stale. Files modified within the racy window are not
+    cached, because a second edit in the same timestamp tick could leave
+    all four unchanged.
+
+    Args:
+        max_bytes: Memory budget for cached contents, 0 disables caching
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: OrderedDict[str, tuple[tuple[int, int, int, int], str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, path: str | Path) -> str:
+        """Read a text file like Path.read_text, from the cache when it is unchanged."""
+        key = str(path)
+        st = os.stat(key)
+        stamp = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with open(key) as f:
+            st = os.fstat(f.fileno())
+            content = f.read()
+        if time.time_ns() - st.st_mtime_ns > RACY_WINDOW_NS:
+            self._put(key, (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size), content)
+        return content
+
+    def _put(self, key: str, stamp: tuple[int, int, int, int], content: str) -> None:
+        size = sys.getsizeof(content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (stamp, content)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= sys.getsizeof(entry[1])
+
+    def invalidate(self, path: str | Path | None = None) -> None:
+        """Drop the entry of one path, or every entry."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._discard(str(path))
+
+    def invalidate_below(self, root: str | Path) -> None:
+        """Drop the entries of every file below root."""
+        prefix = os.path.join(str(root), "")
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._discard(key)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+
+_read_cache = ReadCache()
+
+
+def configure_read_cache(max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+    """Replace the shared read cache with one of a different size."""
+    global _read_cache
+    _read_cache = ReadCache(max_bytes)
+
+
+def get_read_cache() -> ReadCache:
+    """Get the read cache shared by every FileTools instance."""
+    return _read_cache
+
+
+def drop_changed_reads(event: Invalidation) -> None:
+    """Drop cached contents of changed files, subscribed to the invalidation bus."""
+    if event.paths is None:
+        _read_cache.invalidate_below(event.root)
+    else:
+        for path in event.paths:
+            _read_cache.invalidate(path)
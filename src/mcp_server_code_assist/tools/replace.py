@@ -0,0 +1,86 @@
+"""Single pass multi-pattern string replacement."""
+
+import re
+from collections.abc import Mapping
+
+
+def compile_keys(keys: list[str]) -> re.Pattern:
+    """Compile literal keys into one regex shaped like their prefix trie.
+
+    Keys sharing a prefix share one branch of the regex, so each position of
+    the text is matched by walking the trie once instead of trying every key
+    in turn. Longer keys are tried before the keys that are their prefixes,
+    giving leftmost-longest matches.
+
+    Raises:
+        ValueError: If there are no keys or a key is empty
+    """
+    if not keys:
+        raise ValueError("No replacement keys given")
+    trie: dict = {}
+    for key in keys:
+        if not key:
+            raise ValueError("Replacement keys must not be empty")
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[""] = None
+    return re.compile(_trie_pattern(trie), re.DOTALL)
+
+
+def _trie_pattern(node: dict) -> str:
+    # Runs of single child nodes become plain literals, so recursion only
+    # happens where keys branch.
+    prefix = []
+    while len(node) == 1 and "" not in node:
+        ((ch, node),) = node.items()
+        prefix.append(re.escape(ch))
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        body = ""
+    elif len(branches) == 1:
+        body = f"(?:{branches[0]})?" if "" in node else branches[0]
+    else:
+        body = "(?:" + "|".join(branches) + (")?" if "" in node else ")")
+    return "".join(prefix) + body
+
+
+def replace_all(content: str, replacements: Mapping[str, str], require_unique: bool = False) -> tuple[str, dict[str, int]]:
+    """Apply every replacement in a single scan of content.
+
+    All keys are matched against the original content, so replacement text is
+    never matched again. Where keys overlap the leftmost, then longest, wins.
+
+    Args:
+        content: Text to modify
+        replacements: Mapping of literal text to its replacement
+        require_unique: Fail unless every key matches exactly once
+
+    Returns:
+        Tuple of the new content and the number of matches per key
+
+    Raises:
+        ValueError: If a key is empty, or require_unique is set and a key
+            matched zero or several times
+    """
+    counts = dict.fromkeys(replacements, 0)
+    if not replacements:
+        return content, counts
+
+    pattern = compile_keys(list(replacements))
+    parts = []
+    pos = 0
+    for match in pattern.finditer(content):
+        key = match.group()
+        counts[key] += 1
+        parts.append(content[pos : match.start()])
+        parts.append(replacements[key])
+        pos = match.end()
+    parts.append(content[pos:])
+
+    if require_unique:
+        bad = {key: count for key, count in counts.items() if count != 1}
+        if bad:
+            details = ", ".join(f"{key!r} matched {count} times" for key, count in bad.items())
+            raise ValueError(f"Replacement keys must match exactly once: {details}")
+    return "".join(parts), counts
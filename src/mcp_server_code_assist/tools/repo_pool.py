@@ -0,0 +1,107 @@
+"""Pool of long-lived git repository handles."""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import git
+
+
+class _Handle:
+    __slots__ = ("repo", "lock")
+
+    def __init__(self, repo: "git.Repo"):
+        self.repo = repo
+        self.lock = threading.RLock()
+
+
+class RepoPool:
+    """LRU pool of ``git.Repo`` objects keyed by resolved repository root.
+
+    Reusing handles keeps GitPython's persistent ``git cat-file`` processes
+    alive between calls. Each handle is leased under its own lock because
+    those processes must not be shared by concurrent callers. GitPython is
+    imported on the first lease, so sessions that never touch git skip it.
+    """
+
+    def __init__(self, max_size: int = 8):
+        self.max_size = max_size
+        self._handles: OrderedDict[str, _Handle] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lease(self, repo_path: str | Path) -> Generator["git.Repo"]:
+        """Borrow the pooled handle for a repository.
+
+        Args:
+            repo_path: Path to the repository root
+
+        Yields:
+            Open repository handle
+
+        Raises:
+            git.exc.InvalidGitRepositoryError: If path is not a git repository
+            git.exc.NoSuchPathError: If path does not exist
+        """
+        handle = self._acquire(repo_path)
+        with handle.lock:
+            yield handle.repo
+
+    def _acquire(self, repo_path: str | Path) -> _Handle:
+        key = str(Path(repo_path).resolve())
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                self._handles.move_to_end(key)
+                return handle
+
+        import git
+
+        repo = git.Repo(key)
+        evicted = []
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                evicted.append(_Handle(repo))
+            else:
+                handle = self._handles[key] = _Handle(repo)
+                while len(self._handles) > self.max_size:
+                    evicted.append(self._handles.popitem(last=False)[1])
+            self._handles.move_to_end(key)
+        for stale in evicted:
+            self._close(stale)
+        return handle
+
+    def __contains__(self, repo_path: str | Path) -> bool:
+        return str(Path(repo_path).resolve()) in self._handles
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def close(self) -> None:
+        """Close every pooled handle."""
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+        for handle in handles:
+            self._close(handle)
+
+    @staticmethod
+    def _close(handle: _Handle) -> None:
+        with handle.lock:
+            handle.repo.close()
+
+
+_repo_pool: RepoPool | None = None
+
+
+def get_repo_pool() -> RepoPool:
+    """Get the process wide repository pool."""
+    global _repo_pool
+    if _repo_pool is None:
+        _repo_pool = RepoPool()
+    return _repo_pool
@@ -0,0 +1,179 @@
+"""Memory capped cache of git query results that can never change."""
+
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 64 << 20
+DEFAULT_MAX_DISK_BYTES = 256 << 20
+
+_FULL_SHA = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+
+def is_full_sha(revision: str | None) -> bool:
+    """Whether revision names one object by its full SHA-1 or SHA-256 hash."""
+    return revision is not None and _FULL_SHA.fullmatch(revision) is not None
+
+
+class ResultCache:
+    """LRU of string results bounded by their memory size, with optional SQLite persistence.
+
+    Only results that are fully determined by their key belong here, e.g.
+    the output of git show for a full SHA. Entries evicted from memory stay
+    on disk, and the disk store drops its least recently used entries once it
+    grows past max_disk_bytes.
+
+    Args:
+        max_bytes: Memory budget for cached values
+        path: SQLite file persisting results across restarts, None to keep them in memory only
+        max_disk_bytes: Size budget for values in the SQLite file
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, path: str | Path | None = None, max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.path = Path(path) if path else None
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return "\0".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+    def get(self, key: Hashable) -> str | None:
+        name = self._key(key)
+        with self._lock:
+            value = self._entries.get(name)
+            if value is not None:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return value
+        value = self._disk_get(name) if self.path else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(name, value)
+        return value
+
+    def put(self, key: Hashable, value: str) -> None:
+        name = self._key(key)
+        self._remember(name, value)
+        if self.path:
+            self._disk_put(name, value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], str]) -> str:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _remember(self, name: str, value: str) -> None:
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            if previous is not None:
+                self._bytes -= sys.getsizeof(previous)
+            self._entries[name] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used INTEGER NOT NULL);
+                CREATE INDEX IF NOT EXISTS results_used ON results (used);
+                """
+            )
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def _disk_get(self, name: str) -> str | None:
+        with self._disk_lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    row = conn.execute("SELECT value FROM results WHERE key = ?", (name,)).fetchone()
+                    if row is not None:
+                        conn.execute("UPDATE results SET used = (SELECT MAX(used) FROM results) + 1 WHERE key = ?", (name,))
+                return row[0] if row else None
+            finally:
+                conn.close()
+
+    def _disk_put(self, name: str, value: str) -> None:
+        with self._disk_lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO results (key, value, size, used) VALUES (?, ?, ?, (SELECT COALESCE(MAX(used), 0) FROM results) + 1)",
+                        (name, value, len(value)),
+                    )
+                    (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+                    if total > self.max_disk_bytes:
+                        self._prune(conn, total)
+            finally:
+                conn.close()
+
+    def _prune(self, conn: sqlite3.Connection, total: int) -> None:
+        """Drop least recently used rows until the stored values fit max_disk_bytes."""
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY used"):
+            if total <= self.max_disk_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+_result_cache = ResultCache()
+
+
+def configure_result_cache(max_bytes: int = DEFAULT_MAX_BYTES, path: str | Path | None = None) -> None:
+    """Replace the shared result cache, e.g. to enable persistence from the command line."""
+    global _result_cache
+    _result_cache = ResultCache(max_bytes, path)
+
+
+def get_result_cache() -> ResultCache:
+    """Get the process wide result cache for immutable git queries."""
+    return _result_cache
@@ -0,0 +1,227 @@
+"""Content search with an optional on-disk trigram index."""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from mcp_server_code_assist.tools.tree_cache import RACY_WINDOW_NS
+
+MAX_FILE_SIZE = 4 * 1024 * 1024
+MAX_LINE_LENGTH = 300
+_BINARY_SNIFF_SIZE = 8192
+
+
+def compile_query(query: str, regex: bool = False, case_sensitive: bool = True) -> re.Pattern:
+    """Compile a literal or regex search query.
+
+    Raises:
+        ValueError: If the query is empty or not a valid regex
+    """
+    if not query:
+        raise ValueError("Search query must not be empty")
+    try:
+        return re.compile(query if regex else re.escape(query), 0 if case_sensitive else re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Invalid regex {query!r}: {e}") from e
+
+
+def required_trigrams(pattern: re.Pattern) -> set[str]:
+    """Trigrams every match of pattern must contain.
+
+    Only runs of ASCII literals at the top level of the pattern are used, so
+    the result is a conservative filter: an empty set means any file may match.
+    Trigrams are lowercase to agree with the case-insensitive index.
+
+    The pattern is parsed with the private re parser, so any failure to
+    import or walk its output also yields an empty set.
+    """
+    try:
+        import re._constants as sre_constants
+        import re._parser as sre_parse
+
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+        trigrams: set[str] = set()
+        run: list[str] = []
+        for op, arg in list(parsed) + [(None, None)]:
+            if op is sre_constants.LITERAL and arg < 128:
+                run.append(chr(arg))
+                continue
+            text = "".join(run).lower()
+            trigrams.update(text[i : i + 3] for i in range(len(text) - 2))
+            run.clear()
+    except Exception:
+        return set()
+    return trigrams
+
+
+def read_searchable(path: str | Path, max_file_size: int = MAX_FILE_SIZE) -> bytes | None:
+    """Read a file for searching, or None if it is too large, binary or unreadable."""
+    try:
+        if os.stat(path).st_size > max_file_size:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:_BINARY_SNIFF_SIZE]:
+        return None
+    return data
+
+
+def scan_file(path: str | Path, rel_path: str, pattern: re.Pattern, max_matches: int) -> list[dict[str, Any]]:
+    """Find matching lines in one file.
+
+    Returns:
+        Up to max_matches dicts with path, line, column and the matching line text
+    """
+    data = read_searchable(path)
+    if data is None:
+        return []
+    text = data.decode("utf-8", errors="replace")
+    if pattern.search(text) is None:
+        return []
+
+    matches = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        found = pattern.search(line)
+        if found is None:
+            continue
+        matches.append({"path": rel_path, "line": lineno, "column": found.start() + 1, "text": line[:MAX_LINE_LENGTH]})
+        if len(matches) >= max_matches:
+            break
+    return matches
+
+
+def default_index_dir() -> Path:
+    """Directory holding trigram indexes, following XDG_CACHE_HOME."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(cache_home) / "mcp-server-code-assist" / "search"
+
+
+class TrigramIndex:
+    """Trigram index of the files below one root, stored in SQLite FTS5.
+
+    The FTS table is contentless, so only the trigram postings are stored.
+    Rows of contentless tables cannot be deleted in older SQLite versions, so
+    a changed file is indexed under a new rowid and its old row is dropped
+    from the files table. Queries join against that table to skip stale rows,
+    and the FTS table is rebuilt once stale rows outnumber live ones.
+    """
+
+    def __init__(self, root: str | Path, index_dir: str | Path | None = None):
+        self.root = Path(root)
+        index_dir = Path(index_dir) if index_dir else default_index_dir()
+        self.db_path = index_dir / (hashlib.sha1(str(self.root).encode()).hexdigest() + ".sqlite")
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                CREATE VIRTUAL TABLE IF NOT EXISTS content USING fts5(body, tokenize='trigram', content='', detail='none');
+                """
+            )
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def candidates(self, rel_paths: Iterable[str], trigrams: set[str]) -> list[str]:
+        """Bring the index up to date for rel_paths and return those that may match.
+
+        Args:
+            rel_paths: Slash separated paths relative to the root
+            trigrams: Trigrams a matching file must contain
+
+        Returns:
+            Sorted paths whose indexed content holds every trigram
+
+        Raises:
+            sqlite3.Error: If the index cannot be opened, e.g. when SQLite lacks FTS5
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    current = self._sync(conn, rel_paths)
+                if not trigrams:
+                    return sorted(current)
+                query = " AND ".join('"' + trigram.replace('"', '""') + '"' for trigram in sorted(trigrams))
+                rows = conn.execute("SELECT f.path FROM content JOIN files f ON f.id = content.rowid WHERE content MATCH ?", (query,))
+                return sorted(path for (path,) in rows if path in current)
+            finally:
+                conn.close()
+
+    def _sync(self, conn: sqlite3.Connection, rel_paths: Iterable[str]) -> set[str]:
+        indexed = {path: (mtime_ns, size) for path, mtime_ns, size in conn.execute("SELECT path, mtime_ns, size FROM files")}
+        current = set()
+        stale = 0
+        racy_after = time.time_ns() - RACY_WINDOW_NS
+        for rel_path in rel_paths:
+            abs_path = self.root / rel_path
+            try:
+                stat = os.stat(abs_path)
+            except OSError:
+                continue
+            current.add(rel_path)
+            entry = indexed.get(rel_path)
+            if entry == (stat.st_mtime_ns, stat.st_size):
+                continue
+            if entry is not None:
+                conn.execute("DELETE FROM files WHERE path = ?", (rel_path,))
+                stale += 1
+            # A file written within the racy window may change again without its
+            # mtime moving, so it is stamped to be re-indexed on the next sync.
+            mtime_ns = stat.st_mtime_ns if stat.st_mtime_ns < racy_after else 0
+            file_id = conn.execute("INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)", (rel_path, mtime_ns, stat.st_size)).lastrowid
+            data = read_searchable(abs_path)
+            if data is not None:
+                conn.execute("INSERT INTO content (rowid, body) VALUES (?, ?)", (file_id, data.decode("utf-8", errors="replace")))
+
+        removed = indexed.keys() - current
+        conn.executemany("DELETE FROM files WHERE path = ?", ((rel_path,) for rel_path in removed))
+        stale += len(removed)
+        if stale:
+            self._collect(conn, stale)
+        return current
+
+    def _collect(self, conn: sqlite3.Connection, stale: int) -> None:
+        """Count stale FTS rows and rebuild the table once they dominate."""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'stale'").fetchone()
+        stale += row[0] if row else 0
+        live = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        if stale <= max(live, 64):
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('stale', ?)", (stale,))
+            return
+        conn.execute("INSERT INTO content (content) VALUES ('delete-all')")
+        conn.execute("DELETE FROM meta WHERE key = 'stale'")
+        for file_id, rel_path in conn.execute("SELECT id, path FROM files").fetchall():
+            data = read_searchable(self.root / rel_path)
+            if data is not None:
+                conn.execute("INSERT INTO content (rowid, body) VALUES (?, ?)", (file_id, data.decode("utf-8", errors="replace")))
+
+
+_indexes: dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root: str | Path, index_dir: str | Path | None = None) -> TrigramIndex:
+    """Get the shared trigram index for a root."""
+    key = f"{root}\0{index_dir}"
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = TrigramIndex(root, index_dir)
+        return index
@@ -0,0 +1,350 @@
+"""Python symbol index built with ast in a process pool."""
+
+import ast
+import hashlib
+import os
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from mcp_server_code_assist.tools.lru import LRUCache
+from mcp_server_code_assist.tools.tree_cache import RACY_WINDOW_NS
+from mcp_server_code_assist.watcher import Invalidation, get_invalidation_bus, is_unwatched
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+PYTHON_SUFFIXES = (".py", ".pyi")
+SYMBOL_KINDS = ("class", "function", "method")
+# Files per task sent to the process pool, and the number of changed files
+# below which parsing in the calling thread beats shipping them to workers
+PARSE_CHUNK_SIZE = 64
+PARALLEL_PARSE_MIN = 256
+
+_process_pool: "ProcessPoolExecutor | None" = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> "ProcessPoolExecutor":
+    """Get or create the process pool used to parse files, one worker per core."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            # Spawned workers, since forking a process running threads can deadlock
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Shut down the parser processes, if they were started."""
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True, cancel_futures=True)
+            _process_pool = None
+
+
+class Symbol(NamedTuple):
+    """Class or function definition with the lines it spans."""
+
+    qualname: str
+    name: str
+    kind: str
+    line: int
+    end_line: int
+    depth: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return self._asdict()
+
+
+def outline_source(source: str | bytes, filename: str = "<unknown>") -> list[Symbol]:
+    """List the classes, functions and methods defined in Python source, in order.
+
+    Functions nested in functions are included with a dotted qualname, like
+    classes nested in classes.
+
+    Raises:
+        SyntaxError: If the source does not parse
+    """
+    symbols: list[Symbol] = []
+
+    def visit(body: list[ast.stmt], prefix: str, in_class: bool, depth: int) -> None:
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                kind = "class"
+            elif isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef):
+                kind = "method" if in_class else "function"
+            else:
+                # Definitions under if, try or with blocks still count
+                for field in ("body", "orelse", "finalbody", "handlers"):
+                    visit(getattr(node, field, None) or [], prefix, in_class, depth)
+                continue
+            qualname = prefix + node.name
+            line = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+            symbols.append(Symbol(qualname, node.name, kind, line, node.end_lineno or line, depth))
+            visit(node.body, qualname + ".", kind == "class", depth + 1)
+
+    visit(ast.parse(source, filename).body, "", False, 0)
+    return symbols
+
+
+def parse_files(root: str, jobs: list[tuple[str, str | None]]) -> list[tuple[str, tuple[int, int] | None, str | None, list[Symbol] | None]]:
+    """Parse a chunk of files, run in the process pool.
+
+    Args:
+        root: Directory the paths are relative to
+        jobs: Relative path and the digest it had when last parsed
+
+    Returns:
+        Path, (mtime_ns, size) stamp, content digest and symbols of each file.
+        Symbols are None when the digest is unchanged, and the stamp and digest
+        are None when the file could not be read. Files that do not parse have
+        no symbols.
+    """
+    results = []
+    for rel_path, old_digest in jobs:
+        path = os.path.join(root, rel_path)
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            results.append((rel_path, None, None, []))
+            continue
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        stamp = (st.st_mtime_ns, st.st_size)
+        if digest == old_digest:
+            results.append((rel_path, stamp, digest, None))
+            continue
+        try:
+            symbols = outline_source(data, path)
+        except (SyntaxError, ValueError, RecursionError):
+            symbols = []
+        results.append((rel_path, stamp, digest, symbols))
+    return results
+
+
+class SymbolIndex:
+    """Definitions in the Python files below one root, kept up to date incrementally.
+
+    Files are revalidated by (mtime_ns, size) and reparsed only when their
+    content digest changed. Files modified within the racy window are
+    rechecked on the next refresh even if their stamp matches. While a
+    watcher covers the root, refreshes can skip the stat of files it did
+    not report through invalidate(), except for files below the directories
+    watchers do not descend into.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = str(root)
+        self.files: dict[str, tuple[tuple[int, int] | None, str | None, list[Symbol]]] = {}
+        # Name and every dotted qualname suffix to the definitions in each file
+        self.names: dict[str, dict[str, list[Symbol]]] = {}
+        # Files without a trusted stamp, checked on every refresh
+        self._unstamped: set[str] = set()
+        # Files below directories watchers skip, checked on every refresh
+        self._unwatched: set[str] = set()
+        self._listing: object | None = None
+        self._lock = threading.Lock()
+        # Changes reported since the last refresh, guarded by their own lock
+        # so that reporting never waits for a refresh in progress
+        self._changed: set[str] = set()
+        self._changed_dirs: set[str] = set()
+        self._all_changed = True
+        self._changed_lock = threading.Lock()
+
+    def invalidate(self, event: Invalidation) -> None:
+        """Record files a watcher reported changed, for refreshes that skip verification."""
+        prefix = os.path.join(self.root, "")
+        with self._changed_lock:
+            if event.paths is None:
+                self._all_changed = True
+                return
+            for path in event.paths:
+                if not path.startswith(prefix):
+                    if path == self.root or self.root.startswith(os.path.join(path, "")):
+                        # The root or one of its parents was moved or deleted
+                        self._all_changed = True
+                    continue
+                rel_path = path[len(prefix) :].replace(os.sep, "/")
+                if rel_path in self.files:
+                    self._changed.add(rel_path)
+                else:
+                    # New file, or a directory whose files were not reported one by one
+                    self._changed_dirs.add(rel_path + "/")
+
+    def refresh(self, rel_paths: Iterable[str], verify: bool = True, listing: object | None = None) -> int:
+        """Bring the index in line with the given Python files.
+
+        Args:
+            rel_paths: Python files below the root, slash separated
+            verify: Stat every indexed file. Without it only files reported
+                through invalidate() are checked, so pass False only while a
+                watcher has reported every change below the root
+            listing: Object standing for this set of files, like the tree
+                snapshot it came from. Without verify, rel_paths is not even
+                iterated when it is the listing of the previous refresh
+
+        Returns:
+            Number of files that were read again
+        """
+        with self._changed_lock:
+            verify |= self._all_changed
+            changed, changed_dirs = self._changed, tuple(self._changed_dirs)
+            self._changed, self._changed_dirs, self._all_changed = set(), set(), False
+        with self._lock:
+            if not verify and not changed_dirs and listing is not None and listing is self._listing:
+                jobs = self._reported_jobs(changed)
+            else:
+                jobs = self._listing_jobs(list(rel_paths), verify, changed, changed_dirs)
+            self._listing = listing
+            if jobs:
+                self._parse(jobs)
+            return len(jobs)
+
+    def _reported_jobs(self, changed: set[str]) -> list[tuple[str, str | None]]:
+        """Files to read among those reported changed, when the listing is the previous one."""
+        prefix = os.path.join(self.root, "")
+        jobs = []
+        for rel_path in changed | self._unstamped | self._unwatched:
+            entry = self.files.get(rel_path)
+            if entry is not None and (entry[0] is None or entry[0] != _stamp(prefix + rel_path)):
+                jobs.append((rel_path, entry[1]))
+        return jobs
+
+    def _listing_jobs(self, rel_paths: list[str], verify: bool, changed: set[str], changed_dirs: tuple[str, ...]) -> list[tuple[str, str | None]]:
+        """Files to read among rel_paths, dropping indexed files no longer listed.
+
+        New and unstamped files are always read, and other files when their
+        stamp changed, checked for all of them with verify and otherwise only
+        for files reported changed or below directories watchers skip.
+        """
+        prefix = os.path.join(self.root, "")
+        jobs = []
+        known = 0
+        for rel_path in rel_paths:
+            entry = self.files.get(rel_path)
+            if entry is None:
+                jobs.append((rel_path, None))
+                continue
+            known += 1
+            checked = verify or rel_path in changed or rel_path in self._unwatched or rel_path.startswith(changed_dirs)
+            if entry[0] is None or (checked and entry[0] != _stamp(prefix + rel_path)):
+                jobs.append((rel_path, entry[1]))
+        if known < len(self.files):
+            for rel_path in self.files.keys() - set(rel_paths):
+                self._set(rel_path, None)
+        return jobs
+
+    def _parse(self, jobs: list[tuple[str, str | None]]) -> None:
+        """Read and parse files, in worker processes for many, and merge the results."""
+        chunks = [jobs[i : i + PARSE_CHUNK_SIZE] for i in range(0, len(jobs), PARSE_CHUNK_SIZE)]
+        if len(jobs) < PARALLEL_PARSE_MIN:
+            parsed = [parse_files(self.root, chunk) for chunk in chunks]
+        else:
+            parsed = get_process_pool().map(parse_files, [self.root] * len(chunks), chunks)
+
+        racy_after = time.time_ns() - RACY_WINDOW_NS
+        for results in parsed:
+            for rel_path, stamp, digest, symbols in results:
+                if symbols is None:
+                    symbols = self.files[rel_path][2]
+                if stamp is not None and stamp[0] > racy_after:
+                    stamp = None
+                self._set(rel_path, (stamp, digest, symbols))
+
+    def _set(self, rel_path: str, entry: tuple[tuple[int, int] | None, str | None, list[Symbol]] | None) -> None:
+        old = self.files.pop(rel_path, None)
+        self._unstamped.discard(rel_path)
+        self._unwatched.discard(rel_path)
+        if old is not None:
+            for symbol in old[2]:
+                for key in _name_keys(symbol.qualname):
+                    by_path = self.names.get(key)
+                    if by_path is not None and by_path.pop(rel_path, None) is not None and not by_path:
+                        del self.names[key]
+        if entry is not None:
+            self.files[rel_path] = entry
+            if entry[0] is None:
+                self._unstamped.add(rel_path)
+            if is_unwatched(rel_path):
+                self._unwatched.add(rel_path)
+            for symbol in entry[2]:
+                for key in _name_keys(symbol.qualname):
+                    self.names.setdefault(key, {}).setdefault(rel_path, []).append(symbol)
+
+    def find(self, name: str, kind: str | None = None) -> list[dict[str, Any]]:
+        """Find definitions by name or by dotted qualname suffix, e.g. Class.method.
+
+        Returns:
+            Matching symbols with their path, sorted by path and line
+        """
+        with self._lock:
+            found = [(rel_path, symbol) for rel_path, symbols in self.names.get(name, {}).items() for symbol in symbols if kind is None or symbol.kind == kind]
+        found.sort(key=lambda match: (match[0], match[1].line))
+        return [{"path": rel_path, **symbol.to_dict()} for rel_path, symbol in found]
+
+
+def _name_keys(qualname: str) -> list[str]:
+    """The qualname and each of its dotted suffixes, e.g. a.b.c, b.c and c."""
+    parts = qualname.split(".")
+    return [".".join(parts[i:]) for i in range(len(parts))]
+
+
+def _stamp(path: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def is_python_file(rel_path: str) -> bool:
+    return rel_path.endswith(PYTHON_SUFFIXES)
+
+
+_indexes = LRUCache(16)
+_outlines = LRUCache(1024)
+
+
+def get_symbol_index(root: str | Path) -> SymbolIndex:
+    """Get the shared symbol index of a root directory."""
+    key = str(root)
+    index = _indexes.get(key)
+    if index is None:
+        # Refreshes trust the watchers of the bus, so make sure changes reach the index
+        get_invalidation_bus().subscribe("symbols", mark_changed_symbols)
+        index = SymbolIndex(key)
+        _indexes.put(key, index)
+    return index
+
+
+def outline_file(path: str | Path) -> list[Symbol]:
+    """Outline one file, cached by its (mtime_ns, size) stamp.
+
+    Raises:
+        ValueError: If the file is not valid Python
+    """
+    key = (str(path), _stamp(str(path)))
+    symbols = _outlines.get(key)
+    if symbols is None:
+        data = Path(path).read_bytes()
+        try:
+            symbols = outline_source(data, str(path))
+        except (SyntaxError, ValueError) as e:
+            raise ValueError(f"Cannot parse {path}: {e}") from e
+        if key[1] is not None and key[1][0] < time.time_ns() - RACY_WINDOW_NS:
+            _outlines.put(key, symbols)
+    return symbols
+
+
+def mark_changed_symbols(event: Invalidation) -> None:
+    """Report changed files to the symbol indexes, subscribed to the invalidation bus."""
+    for index in _indexes.values():
+        index.invalidate(event)
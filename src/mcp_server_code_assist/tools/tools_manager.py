@@ -1,54 +1,109 @@
-"""Tools manager for maintaining singleton instances of tools."""
+"""Tools manager keeping the tool instances of recently used workspaces."""
+
+import os
 
 from mcp_server_code_assist.tools.dir_tools import DirTools
 from mcp_server_code_assist.tools.file_tools import FileTools
 from mcp_server_code_assist.tools.git_tools import GitTools
+from mcp_server_code_assist.tools.lru import LRUCache
+
+DEFAULT_MAX_WORKSPACES = 16
+
+
+class Workspace:
+    """Tool instances operating on one set of allowed paths.
+
+    GitTools is only created when first needed, as it requires a repository.
+    """
 
-_file_tools: FileTools | None = None
-_dir_tools: DirTools | None = None
-_git_tools: GitTools | None = None
+    def __init__(self, allowed_paths: list[str]):
+        self.allowed_paths = allowed_paths
+        self.file = FileTools(allowed_paths=allowed_paths)
+        self.dir = DirTools(allowed_paths=allowed_paths)
+        self._git: GitTools | None = None
+
+    @property
+    def git(self) -> GitTools:
+        if self._git is None:
+            self._git = GitTools(allowed_paths=self.allowed_paths)
+        return self._git
+
+
+class ToolRegistry:
+    """Workspaces keyed by their allowed paths, least recently used ones dropped first.
+
+    Args:
+        max_workspaces: Number of workspaces to keep
+    """
+
+    def __init__(self, max_workspaces: int = DEFAULT_MAX_WORKSPACES):
+        self.max_workspaces = max_workspaces
+        self._workspaces = LRUCache(max_workspaces)
+
+    def workspace(self, allowed_paths: list[str]) -> Workspace:
+        """Get or create the workspace of a set of allowed paths."""
+        key = tuple(os.path.normpath(path) for path in allowed_paths)
+        workspace = self._workspaces.get(key)
+        if workspace is None:
+            workspace = Workspace(list(key))
+            self._workspaces.put(key, workspace)
+        return workspace
+
+    def clear(self) -> None:
+        self._workspaces.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._workspaces.stats()
+
+
+_registry = ToolRegistry()
+
+
+def configure_tool_registry(max_workspaces: int = DEFAULT_MAX_WORKSPACES) -> None:
+    """Replace the shared registry with one keeping a different number of workspaces."""
+    global _registry
+    _registry = ToolRegistry(max_workspaces)
+
+
+def get_tool_registry() -> ToolRegistry:
+    """Get the registry shared by every tool call."""
+    return _registry
 
 
 def get_file_tools(allowed_paths: list[str]) -> FileTools:
-    """Get or create FileTools instance with given allowed paths.
+    """Get the FileTools instance of the workspace with the given allowed paths.
 
     Args:
         allowed_paths: List of paths that tools can operate on
 
     Returns:
-        FileTools instance with updated paths
+        FileTools instance restricted to allowed_paths
     """
-    global _file_tools
-    if not _file_tools or not all(path in _file_tools.allowed_paths for path in allowed_paths):
-        _file_tools = FileTools(allowed_paths=allowed_paths)
-    return _file_tools
+    return _registry.workspace(allowed_paths).file
 
 
 def get_dir_tools(allowed_paths: list[str]) -> DirTools:
-    """Get or create DirTools instance with given allowed paths.
+    """Get the DirTools instance of the workspace with the given allowed paths.
 
     Args:
         allowed_paths: List of paths that tools can operate on
 
     Returns:
-        DirTools instance with updated paths
+        DirTools instance restricted to allowed_paths
     """
-    global _dir_tools
-    if not _dir_tools or not all(path in _dir_tools.allowed_paths for path in allowed_paths):
-        _dir_tools = DirTools(allowed_paths=allowed_paths)
-    return _dir_tools
+    return _registry.workspace(allowed_paths).dir
 
 
 def get_git_tools(allowed_paths: list[str]) -> GitTools:
-    """Get or create GitTools instance with given allowed paths.
+    """Get the GitTools instance of the workspace with the given allowed paths.
 
     Args:
         allowed_paths: List of paths that tools can operate on
 
     Returns:
-        GitTools instance with updated paths
+        GitTools instance restricted to allowed_paths
+
+    Raises:
+        ValueError: If one of the paths is not a git repository
     """
-    global _git_tools
-    if not _git_tools or not all(path in _git_tools.allowed_paths for path in allowed_paths):
-        _git_tools = GitTools(allowed_paths=allowed_paths)
-    return _git_tools
+    return _registry.workspace(allowed_paths).git
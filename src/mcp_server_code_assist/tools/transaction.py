@@ -0,0 +1,175 @@
+"""Multi-file edits staged to temp files and committed with atomic renames."""
+
+import os
+import secrets
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from mcp_server_code_assist.tools.replace import replace_all
+
+EDIT_OPS = ("create", "rewrite", "modify", "delete")
+TRASH_DIR = ".mcp_server_code_assist_trash"
+
+
+def atomic_write(path: Path, content: str) -> None:
+    """Replace a file's content through a temp file and rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = _write_temp(path, content)
+    try:
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _write_temp(path: Path, content: str) -> Path:
+    """Write content to a temp file next to path, keeping path's permissions."""
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    temp_path = Path(name)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        try:
+            shutil.copymode(path, temp_path)
+        except FileNotFoundError:
+            pass
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return temp_path
+
+
+def _stamp(path: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def apply_edit(content: str | None, edit: dict[str, Any]) -> str | None:
+    """Apply one edit to the in-memory state of a file.
+
+    Args:
+        content: Current content, or None if the file does not exist
+        edit: Edit with op, path and the op's content or replacements
+
+    Returns:
+        New content, or None if the file is deleted
+    """
+    op = edit["op"]
+    path = edit["path"]
+    if op == "create":
+        if content is not None:
+            raise ValueError(f"Cannot create {path}: file already exists")
+        return edit.get("content") or ""
+    if op == "rewrite":
+        return edit["content"]
+    if content is None:
+        raise ValueError(f"Cannot {op} {path}: file does not exist")
+    if op == "modify":
+        return replace_all(content, edit["replacements"], edit.get("require_unique", False))[0]
+    if op == "delete":
+        return None
+    raise ValueError(f"Unknown edit op: {op}. Expected one of {', '.join(EDIT_OPS)}")
+
+
+class StagedFile:
+    """Final state of one file in a transaction, written to a temp file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.stamp = _stamp(path)
+        self.original = path.read_text() if self.stamp is not None else None
+        self.content = self.original
+        self.temp_path: Path | None = None
+        self.created_dirs: list[Path] = []
+
+    @property
+    def changed(self) -> bool:
+        return self.content != self.original
+
+    def stage(self, edits: list[dict[str, Any]]) -> None:
+        """Apply edits in order and write the result to a temp file."""
+        for edit in edits:
+            self.content = apply_edit(self.content, edit)
+        if self.content is None or not self.changed:
+            return
+        missing = self.path.parent
+        while not missing.exists():
+            self.created_dirs.append(missing)
+            missing = missing.parent
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.temp_path = _write_temp(self.path, self.content)
+
+    def discard(self) -> None:
+        """Remove the temp file and any directory created for it."""
+        if self.temp_path is not None:
+            self.temp_path.unlink(missing_ok=True)
+            self.temp_path = None
+        for directory in self.created_dirs:
+            try:
+                directory.rmdir()
+            except OSError:
+                break
+
+
+class Transaction:
+    """Commits staged files together, rolling back on any failure.
+
+    Overwritten files are first linked to a backup name and deleted files are
+    moved to the trash, so every committed step can be undone by a rename.
+    """
+
+    def __init__(self, staged: list[StagedFile]):
+        self.staged = staged
+
+    def commit(self) -> None:
+        """Rename every staged file into place, undoing all renames on failure."""
+        done: list[tuple[StagedFile, Path | None]] = []
+        try:
+            for staged in self.staged:
+                if not staged.changed:
+                    continue
+                if _stamp(staged.path) != staged.stamp:
+                    raise ValueError(f"{staged.path} changed while the edit was staged")
+                backup = self._backup(staged) if staged.original is not None else None
+                done.append((staged, backup))
+                if staged.content is not None:
+                    os.replace(staged.temp_path, staged.path)
+                    staged.temp_path = None
+        except BaseException:
+            for staged, backup in reversed(done):
+                if backup is None:
+                    staged.path.unlink(missing_ok=True)
+                else:
+                    os.replace(backup, staged.path)
+            self.discard()
+            raise
+        for staged, backup in done:
+            if backup is not None and staged.content is not None:
+                backup.unlink(missing_ok=True)
+
+    @staticmethod
+    def _backup(staged: StagedFile) -> Path:
+        path = staged.path
+        if staged.content is None:
+            # Deletes keep the file in the trash, like delete_file
+            trash_dir = path.parent / TRASH_DIR
+            trash_dir.mkdir(exist_ok=True)
+            backup = trash_dir / f"{path.name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+            os.rename(path, backup)
+            return backup
+        backup = path.with_name(f".{path.name}.{secrets.token_hex(4)}.bak")
+        try:
+            os.link(path, backup)
+        except OSError:
+            shutil.copy2(path, backup)
+        return backup
+
+    def discard(self) -> None:
+        for staged in self.staged:
+            staged.discard()
@@ -0,0 +1,234 @@
+"""Cached directory tree engine used by file_tree."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+# Filesystem timestamps are coarse, so a directory modified this close to a
+# snapshot build can change again without its mtime moving. Such snapshots are
+# treated as stale until the tree has been quiet for the whole window.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class TreeNode:
+    """Directory node of a path prefix tree."""
+
+    __slots__ = ("dirs", "files")
+
+    def __init__(self):
+        self.dirs: dict[str, TreeNode] = {}
+        self.files: set[str] = set()
+
+    def insert(self, rel_path: str) -> None:
+        """Insert a slash separated file path below this node."""
+        *parents, name = rel_path.split("/")
+        node = self
+        for part in parents:
+            child = node.dirs.get(part)
+            if child is None:
+                child = node.dirs[part] = TreeNode()
+            node = child
+        node.files.add(name)
+
+    def iter_files(self, prefix: str = "") -> Iterator[str]:
+        """Yield the slash separated path of every file below this node."""
+        for name in self.files:
+            yield prefix + name
+        for name, child in self.dirs.items():
+            yield from child.iter_files(f"{prefix}{name}/")
+
+    def render(self) -> tuple[str, int, int]:
+        """Render the tree in a single pass.
+
+        Returns:
+            Tuple of tree text, directory count and file count
+        """
+        lines: list[str] = []
+        dir_count, file_count = self._render("", lines)
+        return "\n".join(lines), dir_count, file_count
+
+    def _render(self, prefix: str, lines: list[str]) -> tuple[int, int]:
+        entries = [(name, self.dirs[name]) for name in sorted(self.dirs)]
+        entries.extend((name, None) for name in sorted(self.files))
+        dir_count = 0
+        file_count = 0
+        last = len(entries) - 1
+        for i, (name, child) in enumerate(entries):
+            lines.append(prefix + ("└── " if i == last else "├── ") + name)
+            if child is None:
+                file_count += 1
+                continue
+            sub_dirs, sub_files = child._render(prefix + ("    " if i == last else "│   "), lines)
+            dir_count += 1 + sub_dirs
+            file_count += sub_files
+        return dir_count, file_count
+
+
+class TreeSnapshot:
+    """Tree of a directory together with the stamps needed to validate it."""
+
+    def __init__(self, root: TreeNode, dir_mtimes: dict[str, int], file_mtimes: dict[str, int | None], built_ns: int):
+        self.root = root
+        self.dir_mtimes = dir_mtimes
+        self.file_mtimes = file_mtimes
+        self.built_ns = built_ns
+        self._rendered: tuple[str, int, int] | None = None
+
+    def watch(self, paths: Iterable[Path]) -> None:
+        """Also invalidate the snapshot when any of these files change."""
+        self.file_mtimes.update(_file_stamps(paths))
+
+    def render(self) -> tuple[str, int, int]:
+        if self._rendered is None:
+            self._rendered = self.root.render()
+        return self._rendered
+
+    def is_fresh(self) -> bool:
+        """Check that no watched directory or file changed since the build."""
+        racy_after = self.built_ns - RACY_WINDOW_NS
+        for path, mtime in self.dir_mtimes.items():
+            if _mtime_ns(path) != mtime or mtime > racy_after:
+                return False
+        for path, mtime in self.file_mtimes.items():
+            if _mtime_ns(path) != mtime or (mtime is not None and mtime > racy_after):
+                return False
+        return True
+
+
+class TreeCache:
+    """LRU cache of tree snapshots keyed by root directory."""
+
+    def __init__(self, max_roots: int = 16):
+        self.max_roots = max_roots
+        self._snapshots: OrderedDict[str, TreeSnapshot] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, root: str | Path) -> TreeSnapshot | None:
+        """Return the cached snapshot for root if it is still fresh."""
+        key = str(root)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                return None
+            if not snapshot.is_fresh():
+                del self._snapshots[key]
+                return None
+            self._snapshots.move_to_end(key)
+            return snapshot
+
+    def put(self, root: str | Path, snapshot: TreeSnapshot) -> None:
+        key = str(root)
+        with self._lock:
+            self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.max_roots:
+                self._snapshots.popitem(last=False)
+
+    def invalidate(self, root: str | Path | None = None) -> None:
+        """Drop the snapshot for root, or every snapshot if root is None."""
+        with self._lock:
+            if root is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(str(root), None)
+
+    def invalidate_where(self, predicate: Callable[[str], bool]) -> None:
+        """Drop the snapshots of every root the predicate holds for."""
+        with self._lock:
+            for key in [key for key in self._snapshots if predicate(key)]:
+                del self._snapshots[key]
+
+
+def build_tracked_tree(base: Path, tracked_files: Iterable[str], watch_files: Iterable[Path] = ()) -> TreeSnapshot:
+    """Build a snapshot from the tracked file set of a repository.
+
+    Tracked paths that no longer exist on disk are pruned, as are directories
+    left without any tracked file.
+
+    Args:
+        base: Repository root the tracked paths are relative to
+        tracked_files: Slash separated paths relative to base
+        watch_files: Extra files whose changes invalidate the snapshot
+
+    Returns:
+        Tree snapshot
+    """
+    built_ns = time.time_ns()
+    root = TreeNode()
+    for rel_path in tracked_files:
+        root.insert(rel_path)
+
+    dir_mtimes: dict[str, int] = {}
+
+    def prune(node: TreeNode, dir_path: str) -> bool:
+        try:
+            with os.scandir(dir_path) as it:
+                existing = {entry.name: entry.is_dir(follow_symlinks=False) for entry in it}
+            dir_mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return False
+        node.files = {name for name in node.files if existing.get(name) is False}
+        node.dirs = {name: child for name, child in node.dirs.items() if existing.get(name) and prune(child, os.path.join(dir_path, name))}
+        return bool(node.files or node.dirs)
+
+    prune(root, str(base))
+    return TreeSnapshot(root, dir_mtimes, _file_stamps(watch_files), built_ns)
+
+
+def build_walk_tree(base: Path, should_ignore: Callable[[str, bool], bool], watch_files: Iterable[Path] = ()) -> TreeSnapshot:
+    """Build a snapshot by walking the filesystem.
+
+    Args:
+        base: Root directory to walk
+        should_ignore: Predicate called with each slash separated path relative
+            to base and whether it is a directory. Ignored directories are not
+            descended into.
+        watch_files: Extra files whose changes invalidate the snapshot
+
+    Returns:
+        Tree snapshot
+    """
+    built_ns = time.time_ns()
+    dir_mtimes: dict[str, int] = {}
+
+    def walk(dir_path: str, rel_dir: str) -> TreeNode:
+        node = TreeNode()
+        dir_mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if should_ignore(rel_path, is_dir):
+                continue
+            if is_dir:
+                node.dirs[entry.name] = walk(entry.path, rel_path)
+            else:
+                node.files.add(entry.name)
+        return node
+
+    root = walk(str(base), "")
+    return TreeSnapshot(root, dir_mtimes, _file_stamps(watch_files), built_ns)
+
+
+def git_index_path(root: Path) -> Path:
+    """Locate the git index of a working tree, following gitdir files."""
+    dot_git = root / ".git"
+    if dot_git.is_file():
+        gitdir = dot_git.read_text().partition("gitdir:")[2].strip()
+        return root / gitdir / "index"
+    return dot_git / "index"
+
+
+def _file_stamps(paths: Iterable[Path]) -> dict[str, int | None]:
+    return {str(path): _mtime_ns(path) for path in paths}
+
+
+def _mtime_ns(path: str | Path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
@@ -0,0 +1,541 @@
+"""Filesystem watchers publishing changes to a shared invalidation bus."""
+
+import asyncio
+import errno
+import logging
+import os
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from mcp_server_code_assist.base_tools import get_executor
+
+logger = logging.getLogger(__name__)
+
+WATCH_BACKENDS = ("auto", "inotify", "poll", "off")
+DEFAULT_DEBOUNCE = 0.2
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_MAX_ROOTS = 16
+# Files inside .git whose changes matter to tools, everything else there is churn
+GIT_FILES = frozenset({"index", "HEAD"})
+# Dependency, cache and build output directories, whose contents are not watched
+UNWATCHED_DIRS = frozenset({"node_modules", ".venv", "venv", "__pycache__", ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache", "build", "dist", "target"})
+
+# inotify(7) flags
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+IN_ISDIR = 0x40000000
+STRUCTURE_EVENTS = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | STRUCTURE_EVENTS | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass(frozen=True)
+class Invalidation:
+    """Paths below a watched root that changed.
+
+    Attributes:
+        root: Watched root directory
+        paths: Absolute paths that changed, None if events were lost and
+            anything below root may have changed
+        structure_changed: Whether files or directories were created, deleted or moved
+    """
+
+    root: str
+    paths: frozenset[str] | None
+    structure_changed: bool
+
+    def touches(self, path: str) -> bool:
+        """Whether this change may affect path or anything below it."""
+        if self.paths is None:
+            return is_within(path, self.root) or is_within(self.root, path)
+        return any(is_within(changed, path) or is_within(path, changed) for changed in self.paths)
+
+
+def is_within(path: str, root: str) -> bool:
+    """Whether path is root or lies below it."""
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def is_unwatched(rel_path: str) -> bool:
+    """Whether a slash separated path lies below one of the UNWATCHED_DIRS."""
+    return any(part in UNWATCHED_DIRS for part in rel_path.split("/")[:-1])
+
+
+class InvalidationBus:
+    """Fans out filesystem changes to the caches that subscribed to them.
+
+    Callbacks run on the event loop thread of the publishing watcher and
+    must not block.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[str, Callable[[Invalidation], None]] = {}
+        self._watchers: list[Watcher] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, name: str, callback: Callable[[Invalidation], None]) -> None:
+        """Register callback under name, replacing an earlier one of the same name."""
+        with self._lock:
+            self._subscribers[name] = callback
+
+    def unsubscribe(self, name: str) -> None:
+        with self._lock:
+            self._subscribers.pop(name, None)
+
+    def publish(self, event: Invalidation) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for name, callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Invalidation subscriber %s failed", name)
+
+    def add_watcher(self, watcher: "Watcher") -> None:
+        with self._lock:
+            self._watchers.append(watcher)
+
+    def remove_watcher(self, watcher: "Watcher") -> None:
+        with self._lock:
+            if watcher in self._watchers:
+                self._watchers.remove(watcher)
+
+    def is_current(self, path: str) -> bool:
+        """Whether every change below path has already been published.
+
+        Only true while an exact watcher covers path, so callers may then skip
+        revalidating cached state that no published change touched.
+        """
+        with self._lock:
+            watchers = [watcher for watcher in self._watchers if is_within(path, watcher.root)]
+        return any(watcher.is_current() for watcher in watchers)
+
+
+_bus = InvalidationBus()
+
+
+def get_invalidation_bus() -> InvalidationBus:
+    """Get the bus shared by every watcher and cache."""
+    return _bus
+
+
+class Watcher:
+    """Watches one root and publishes debounced changes to the bus.
+
+    Changes are collected until none arrived for debounce seconds, but
+    published at least every 10 debounce periods while they keep coming.
+
+    Args:
+        root: Directory to watch
+        bus: Bus receiving the changes
+        debounce: Seconds of quiet before pending changes are published
+    """
+
+    # Whether the watcher sees every change as soon as it happens
+    exact = False
+
+    def __init__(self, root: str, bus: InvalidationBus, debounce: float = DEFAULT_DEBOUNCE):
+        self.root = root
+        self.bus = bus
+        self.debounce = debounce
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: set[str] = set()
+        self._structure_changed = False
+        self._overflow = False
+        self._first_pending: float | None = None
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._lock = threading.RLock()
+        self._closed = False
+
+    def start(self) -> None:
+        """Start watching, from the event loop thread.
+
+        Everything below root is reported as changed once, since nothing was
+        watched before.
+        """
+        self._loop = asyncio.get_running_loop()
+        self.bus.add_watcher(self)
+        self.bus.publish(Invalidation(self.root, None, True))
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+        self.bus.remove_watcher(self)
+
+    def is_current(self) -> bool:
+        """Whether no change is waiting to be published."""
+        with self._lock:
+            return self.exact and not self._closed and not self._pending and not self._overflow
+
+    def _note(self, path: str | None, structure_changed: bool) -> None:
+        """Record a change, None meaning anything may have changed."""
+        with self._lock:
+            if path is None:
+                self._overflow = True
+            else:
+                self._pending.add(path)
+            self._structure_changed |= structure_changed
+        self._loop.call_soon_threadsafe(self._schedule_flush)
+
+    def _schedule_flush(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            now = self._loop.time()
+            if self._first_pending is None:
+                self._first_pending = now
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+            delay = min(self.debounce, max(0.0, self._first_pending + 10 * self.debounce - now))
+            self._flush_handle = self._loop.call_later(delay, self.flush)
+
+    def flush(self) -> None:
+        """Publish pending changes now."""
+        # Publishing under the lock keeps is_current false until subscribers saw the change
+        with self._lock:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self._first_pending = None
+            if self._closed or not (self._pending or self._overflow):
+                return
+            event = Invalidation(self.root, None if self._overflow else frozenset(self._pending), self._structure_changed or self._overflow)
+            self._pending = set()
+            self._structure_changed = False
+            self._overflow = False
+            self.bus.publish(event)
+
+
+class InotifyWatcher(Watcher):
+    """Linux inotify watcher with one watch per directory below root.
+
+    Inside .git only the directory itself is watched, and only changes of
+    GIT_FILES are reported. UNWATCHED_DIRS are not descended into.
+
+    Directories are walked and watched on the worker pool, for the tree when
+    the watcher starts and for directories created later, so the event loop
+    never waits for a walk. The watcher is not current while a walk runs.
+
+    Attributes:
+        ready: Task of the initial walk, raising OSError if it failed
+    """
+
+    exact = True
+
+    def __init__(self, root: str, bus: InvalidationBus, debounce: float = DEFAULT_DEBOUNCE):
+        super().__init__(root, bus, debounce)
+        self._fd = -1
+        self._dirs: dict[int, str] = {}
+        self._reading = False
+        self._walks = 0
+        self.ready: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start watching in the background, from the event loop thread.
+
+        Changes are published, and the watcher is registered with the bus,
+        once every directory is watched.
+
+        Raises:
+            OSError: If inotify is unavailable
+        """
+        import ctypes
+
+        libc = _libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._loop = asyncio.get_running_loop()
+        self.ready = self._loop.create_task(self._watch_root())
+
+    async def _watch_root(self) -> None:
+        try:
+            await self._loop.run_in_executor(get_executor(), self._watch_tree, self.root)
+        except OSError:
+            self.close()
+            raise
+        with self._lock:
+            if self._closed:
+                return
+            self._loop.add_reader(self._fd, self._read_events)
+            self._reading = True
+        # Changes made before the last watch was added went unseen, so report everything
+        super().start()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd >= 0:
+                if self._reading:
+                    self._loop.remove_reader(self._fd)
+                os.close(self._fd)
+                self._fd = -1
+            self._closed = True
+        super().close()
+
+    def is_current(self) -> bool:
+        # Events of writes that already returned are queued, so read them first
+        self._read_events()
+        with self._lock:
+            return self._reading and not self._walks and super().is_current()
+
+    def _watch(self, path: str) -> None:
+        import ctypes
+
+        # Under the lock, so that close never frees the descriptor mid-call
+        with self._lock:
+            if self._fd < 0:
+                return
+            wd = _libc().inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    return
+                raise OSError(error, f"inotify_add_watch failed for {path}")
+            self._dirs[wd] = path
+
+    def _watch_tree(self, path: str) -> None:
+        """Watch path and the directories below it, run on the worker pool."""
+        for dir_path, dir_names, _ in os.walk(path):
+            if self._closed:
+                return
+            self._watch(dir_path)
+            if ".git" in dir_names:
+                dir_names.remove(".git")
+                self._watch(os.path.join(dir_path, ".git"))
+            dir_names[:] = [name for name in dir_names if name not in UNWATCHED_DIRS]
+
+    def _watch_new_dir(self, path: str) -> None:
+        """Watch a directory created below root on the worker pool, called with the lock held."""
+        self._walks += 1
+        get_executor().submit(self._watch_tree, path).add_done_callback(lambda future: self._new_dir_watched(path, future))
+
+    def _new_dir_watched(self, path: str, future: Future) -> None:
+        with self._lock:
+            self._walks -= 1
+            if self._closed:
+                return
+            error = future.exception()
+            if error is not None:
+                # Changes below path go unseen from now on, so stop vouching for the tree
+                logger.warning("Cannot watch %s, changes below it may be missed: %s", path, error)
+                self.exact = False
+        # Files created before their directory was watched are covered by reporting the directory
+        self._note(path if error is None else None, True)
+
+    def _read_events(self) -> None:
+        with self._lock:
+            while self._fd >= 0 and self._reading:
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    return
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                    name = os.fsdecode(data[offset + _EVENT_HEADER.size : offset + _EVENT_HEADER.size + length].rstrip(b"\0"))
+                    offset += _EVENT_HEADER.size + length
+                    self._handle_event(wd, mask, name)
+
+    def _handle_event(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self._note(None, True)
+            return
+        directory = self._dirs.get(wd)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            del self._dirs[wd]
+            return
+        if os.path.basename(directory) == ".git" and name not in GIT_FILES:
+            return
+        path = os.path.join(directory, name) if name else directory
+        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and name not in UNWATCHED_DIRS:
+            self._watch_new_dir(path)
+            return
+        self._note(path, bool(mask & STRUCTURE_EVENTS))
+
+
+class PollingWatcher(Watcher):
+    """Portable watcher comparing (mtime_ns, size) stamps of every file below root.
+
+    Args:
+        interval: Seconds between scans
+    """
+
+    def __init__(self, root: str, bus: InvalidationBus, debounce: float = DEFAULT_DEBOUNCE, interval: float = DEFAULT_POLL_INTERVAL):
+        super().__init__(root, bus, debounce)
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        super().start()
+        self._task = self._loop.create_task(self._run())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        super().close()
+
+    async def _run(self) -> None:
+        stamps = await self._loop.run_in_executor(get_executor(), scan_stamps, self.root)
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await self._loop.run_in_executor(get_executor(), scan_stamps, self.root)
+            for path in stamps.keys() ^ current.keys():
+                self._note(path, True)
+            for path, stamp in current.items():
+                if path in stamps and stamps[path] != stamp:
+                    self._note(path, False)
+            stamps = current
+
+
+def scan_stamps(root: str) -> dict[str, tuple[int, int]]:
+    """Stamp every file below root outside UNWATCHED_DIRS, and the GIT_FILES of .git directories."""
+    stamps = {}
+    for dir_path, dir_names, file_names in os.walk(root):
+        if ".git" in dir_names:
+            dir_names.remove(".git")
+            file_names = [*file_names, *(os.path.join(".git", name) for name in GIT_FILES)]
+        dir_names[:] = [name for name in dir_names if name not in UNWATCHED_DIRS]
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stamps[path] = (st.st_mtime_ns, st.st_size)
+    return stamps
+
+
+class WatchManager:
+    """Watchers of the most recently used workspace roots.
+
+    Args:
+        backend: One of WATCH_BACKENDS. auto uses inotify where available and
+            falls back to polling when it is not or runs out of watches
+        debounce: Seconds of quiet before changes are published
+        poll_interval: Seconds between scans of polling watchers
+        max_roots: Number of roots watched at once
+        bus: Bus receiving the changes
+    """
+
+    def __init__(
+        self,
+        backend: str = "auto",
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_roots: int = DEFAULT_MAX_ROOTS,
+        bus: InvalidationBus | None = None,
+    ):
+        if backend not in WATCH_BACKENDS:
+            raise ValueError(f"Unknown watch backend {backend!r}, expected one of {', '.join(WATCH_BACKENDS)}")
+        self.backend = backend
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.max_roots = max_roots
+        self.bus = bus or get_invalidation_bus()
+        self._watchers: OrderedDict[str, Watcher] = OrderedDict()
+
+    @property
+    def roots(self) -> list[str]:
+        return list(self._watchers)
+
+    def watch(self, root: str | os.PathLike) -> Watcher | None:
+        """Start watching root unless it or a parent is watched already. Call from the event loop thread.
+
+        Returns:
+            Watcher covering root, or None if root is not a directory or watching is off
+        """
+        if self.backend == "off":
+            return None
+        root = os.path.realpath(root)
+        for watched, watcher in self._watchers.items():
+            if is_within(root, watched):
+                self._watchers.move_to_end(watched)
+                return watcher
+        if not os.path.isdir(root):
+            return None
+
+        watcher = self._start(root)
+        self._watchers[root] = watcher
+        while len(self._watchers) > self.max_roots:
+            _, evicted = self._watchers.popitem(last=False)
+            evicted.close()
+        return watcher
+
+    def _start(self, root: str) -> Watcher:
+        if self.backend != "poll" and sys.platform.startswith("linux"):
+            watcher = InotifyWatcher(root, self.bus, self.debounce)
+            try:
+                watcher.start()
+            except OSError as e:
+                if self.backend == "inotify":
+                    raise
+                logger.warning("Cannot watch %s with inotify, polling instead: %s", root, e)
+            else:
+                watcher.ready.add_done_callback(lambda task: self._inotify_started(root, watcher, task))
+                return watcher
+        elif self.backend == "inotify":
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        return self._poll(root)
+
+    def _poll(self, root: str) -> Watcher:
+        watcher = PollingWatcher(root, self.bus, self.debounce, self.poll_interval)
+        watcher.start()
+        return watcher
+
+    def _inotify_started(self, root: str, watcher: InotifyWatcher, task: asyncio.Task) -> None:
+        """Poll instead once watching root with inotify failed, e.g. for lack of watches."""
+        error = None if task.cancelled() else task.exception()
+        if error is None or self._watchers.get(root) is not watcher:
+            return
+        if self.backend == "inotify":
+            logger.error("Cannot watch %s with inotify: %s", root, error)
+            del self._watchers[root]
+            return
+        logger.warning("Cannot watch %s with inotify, polling instead: %s", root, error)
+        self._watchers[root] = self._poll(root)
+
+    def close(self) -> None:
+        while self._watchers:
+            _, watcher = self._watchers.popitem()
+            watcher.close()
+
+
+_libc_handle = None
+
+
+def _libc():
+    """Load the C library for inotify, or return None where it has no inotify."""
+    import ctypes
+    import ctypes.util
+
+    global _libc_handle
+    if _libc_handle is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        except OSError:
+            return None
+        if not hasattr(libc, "inotify_init1"):
+            return None
+        _libc_handle = libc
+    return _libc_handle
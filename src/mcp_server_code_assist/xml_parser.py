@@ -1,23 +1,87 @@
+import functools
 import re
 import xml.etree.ElementTree as ET
+from collections.abc import Iterator
 from pathlib import Path
+from typing import IO, Any
 
-import xmlschema
+SCHEMA_PATH = Path(__file__).parent / "schema.xsd"
+# process_instruction type of each schema function
+INSTRUCTION_TYPES = {"create": "create_file", "delete": "delete_file", "modify": "modify_file", "rewrite": "rewrite_file"}
+
+
+@functools.cache
+def get_schema(schema_path: Path = SCHEMA_PATH) -> Any:
+    """Compile an XML schema once per process.
+
+    Args:
+        schema_path: Path to the .xsd file
+
+    Returns:
+        Compiled xmlschema.XMLSchema, shared by every XMLProcessor
+    """
+    import xmlschema
+
+    return xmlschema.XMLSchema(schema_path)
 
 
 class XMLProcessor:
     def __init__(self):
-        schema_path = Path(__file__).parent / "schema.xsd"
-        self.validator = xmlschema.XMLSchema(schema_path)
+        self.validator = get_schema()
 
     def _normalize_text(self, text: str) -> str:
         """Normalize whitespace in text content"""
         return re.sub(r"\s+", " ", text).strip()
 
     def parse(self, xml_str: str) -> dict[str, str | dict[str, str]]:
-        root = ET.fromstring(self._normalize_text(xml_str))
+        root = ET.fromstring(xml_str.lstrip())
         self.validator.validate(root)
+        return self._to_dict(root)
+
+    def iterparse(self, source: str | Path | IO) -> Iterator[dict[str, str | dict[str, str]]]:
+        """Stream the instructions of a document one at a time.
+
+        The document is either a single <instruction> or any root element
+        whose children are <instruction> elements. Each one is validated and
+        yielded as soon as its end tag is read, then dropped from the tree, so
+        memory use does not grow with the number of instructions.
+
+        Args:
+            source: Path or binary/text file object of the XML document
+
+        Yields:
+            Parsed instructions in document order, in the format of parse
+
+        Raises:
+            xml.etree.ElementTree.ParseError: If the document is not well formed
+            xmlschema.XMLSchemaValidationError: If an instruction does not match the schema
+        """
+        root = None
+        depth = 0
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            # Deeper elements named instruction are replacement keys, not instructions
+            if elem.tag == "instruction" and depth <= 1:
+                self.validator.validate(elem)
+                yield self._to_dict(elem)
+            if depth == 1 and root.tag != "instruction":
+                root.remove(elem)
+
+    def to_instruction(self, data: dict[str, str | dict[str, str]]) -> dict[str, Any]:
+        """Convert a parsed instruction into the input of process_instruction."""
+        instruction = {"type": INSTRUCTION_TYPES[data["function"]], "path": data["path"]}
+        if "content" in data:
+            instruction["content"] = data["content"]
+        if "replacements" in data:
+            instruction["replacements"] = data["replacements"]
+        return instruction
 
+    def _to_dict(self, root: ET.Element) -> dict[str, str | dict[str, str]]:
         result = {
             "function": self._normalize_text(root.find("function").text),
             "path": self._normalize_text(root.find("path").text),
@@ -1,7 +1,9 @@
+import asyncio
+import threading
 from pathlib import Path
 
 import pytest
-from mcp_server_code_assist.base_tools import BaseTools
+from mcp_server_code_assist.base_tools import BaseTools, configure_workers, shutdown_workers
 
 
 class ConcreteTools(BaseTools):
@@ -18,7 +20,7 @@ def test_path_validation(tmp_path):
     assert tools.validate_path(test_file) == test_file.resolve()
 
     # Invalid path
-    with pytest.raises(ValueError, match="not in allowed paths"):
+    with pytest.raises(ValueError, match="outside allowed directories"):
         tools.validate_path("/invalid/path")
 
 
@@ -40,3 +42,21 @@ def test_is_valid_operation(tmp_path):
 
     assert tools.is_valid_operation(test_file) is True
     assert tools.is_valid_operation(tmp_path / "nonexistent.txt") is False
+
+
+@pytest.mark.asyncio
+async def test_run_blocking_runs_concurrently():
+    configure_workers(2)
+    tools = ConcreteTools()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_peer():
+        barrier.wait()
+        return threading.current_thread().name
+
+    try:
+        names = await asyncio.gather(tools.run_blocking(wait_for_peer), tools.run_blocking(wait_for_peer))
+    finally:
+        configure_workers(None)
+        shutdown_workers()
+    assert all(name.startswith("code-assist") for name in names)
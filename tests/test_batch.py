@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from mcp_server_code_assist.batch import instruction_access, plan_dependencies, run_batch
+
+
+def plan(instructions, repo="/repo"):
+    return plan_dependencies([instruction_access(instruction, repo) for instruction in instructions])
+
+
+def test_reads_of_different_files_are_independent():
+    deps = plan([{"type": "read_file", "path": "/repo/a"}, {"type": "read_file", "path": "/repo/b"}, {"type": "read_multiple", "paths": ["/repo/a", "/repo/b"]}])
+    assert deps == [set(), set(), set()]
+
+
+def test_writes_to_a_path_stay_in_order():
+    deps = plan([
+        {"type": "read_file", "path": "/repo/a"},
+        {"type": "modify_file", "path": "/repo/a", "replacements": {}},
+        {"type": "rewrite_file", "path": "/repo/b", "content": ""},
+        {"type": "read_file", "path": "/repo/a"},
+        {"type": "delete_file", "path": "/repo/a"},
+    ])
+    assert deps == [set(), {0}, set(), {1}, {1, 3}]
+
+
+def test_tree_and_git_reads_wait_for_writes_below_them():
+    deps = plan([
+        {"type": "create_file", "path": "/repo/src/a.py", "content": ""},
+        {"type": "create_file", "path": "/other/b.py", "content": ""},
+        {"type": "file_tree", "path": "/repo/src"},
+        {"type": "git_status"},
+        {"type": "apply_edits", "edits": [{"op": "create", "path": "/repo/src/c.py"}]},
+        {"type": "list_directory", "path": "/repo/srcx"},
+    ])
+    assert deps == [set(), set(), {0}, {0}, {2, 3}, set()]
+
+
+def test_malformed_instructions_have_no_dependencies():
+    assert plan([{"type": "read_file"}, {"type": "unknown", "path": "/repo/a"}]) == [set(), set()]
+
+
+@pytest.mark.asyncio
+async def test_run_batch_runs_independent_instructions_concurrently():
+    running = 0
+    peak = 0
+
+    async def run(instruction):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"path": instruction["path"]}
+
+    instructions = [{"type": "read_file", "path": f"/repo/{i}"} for i in range(10)]
+    results = await run_batch(instructions, run, "/repo", max_concurrency=4)
+
+    assert [result["result"]["path"] for result in results] == [f"/repo/{i}" for i in range(10)]
+    assert peak == 4
+    assert all(result["seconds"] >= 0.01 for result in results)
+
+
+@pytest.mark.asyncio
+async def test_run_batch_orders_conflicting_instructions():
+    order = []
+
+    async def run(instruction):
+        await asyncio.sleep(instruction["delay"])
+        order.append(instruction["name"])
+        return {}
+
+    instructions = [
+        {"type": "create_file", "path": "/repo/a", "delay": 0.03, "name": "write"},
+        {"type": "read_file", "path": "/repo/a", "delay": 0, "name": "read"},
+        {"type": "read_file", "path": "/repo/b", "delay": 0, "name": "other"},
+    ]
+    await run_batch(instructions, run, "/repo")
+
+    assert order == ["other", "write", "read"]
@@ -0,0 +1,61 @@
+import subprocess
+
+import pytest
+from benchmarks.path_validation import measure
+from benchmarks.run import find_regressions, run_suite
+from benchmarks.startup import time_startup
+from benchmarks.symbols import measure as measure_symbols
+from benchmarks.synthetic import SCALES, file_path, make_repo
+
+
+def head(repo):
+    return subprocess.run(["git", "-C", str(repo), "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_make_repo_is_deterministic(tmp_path):
+    first = make_repo(tmp_path / "one", SCALES["tiny"], "deep")
+    second = make_repo(tmp_path / "two", SCALES["tiny"], "deep")
+
+    assert head(first) == head(second)
+    assert (first / file_path("deep", 7)).is_file()
+    assert subprocess.run(["git", "-C", str(first), "rev-list", "--count", "HEAD"], capture_output=True, text=True).stdout.strip() == "5"
+
+
+@pytest.mark.asyncio
+async def test_run_suite(tmp_path):
+    results = await run_suite("tiny", tmp_path, layouts=("wide",), repeat=1, only="file_tree")
+
+    assert set(results["results"]) == {"wide/file_tools.file_tree.cold", "wide/file_tools.file_tree.warm", "wide/call_tool.file_tree"}
+    assert all(result["runs"] == 1 for result in results["results"].values())
+
+
+def test_find_regressions():
+    baseline = {"results": {"a": {"median": 0.010}, "b": {"median": 0.010}, "noise": {"median": 0.0001}}}
+    current = {"results": {"a": {"median": 0.011}, "b": {"median": 0.030}, "noise": {"median": 0.0005}, "new": {"median": 1.0}}}
+
+    regressions = find_regressions(current, baseline, threshold=1.5)
+    assert [regression["name"] for regression in regressions] == ["b"]
+    assert regressions[0]["ratio"] == pytest.approx(3.0)
+
+
+def test_startup_keeps_heavy_modules_lazy():
+    result = time_startup(1)
+
+    assert result["runs"] == 1
+    assert result["median"] >= result["import_median"] > 0
+    assert result["eager_modules"] == []
+
+
+def test_path_validation_benchmark(tmp_path):
+    results = measure(tmp_path, (1, 50), calls=50)
+
+    assert [result["roots"] for result in results] == [1, 50]
+    assert results[1]["validator_us"] < results[1]["naive_us"]
+
+
+@pytest.mark.asyncio
+async def test_symbols_benchmark(tmp_path):
+    result = await measure_symbols(tmp_path, 5)
+
+    assert result["files_indexed"] == 5
+    assert result["cold_ms"] > 0 and result["warm_ms"] > 0 and result["after_edit_ms"] > 0
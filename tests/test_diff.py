@@ -0,0 +1,47 @@
+import difflib
+
+import pytest
+from mcp_server_code_assist.tools.diff import ENGINES, diff_stat, get_opcodes, myers_blocks, unified_diff
+
+
+def apply_opcodes(a, b, opcodes):
+    out = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            out.extend(a[i1:i2])
+        else:
+            out.extend(b[j1:j2])
+    return out
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+def test_opcodes_rebuild_target(engine):
+    a = list("abcabba") + [f"line {i}" for i in range(50)] + list("cbabac")
+    b = list("cbabac") + [f"line {i}" for i in range(0, 50, 2)] + list("abcabba")
+    assert apply_opcodes(a, b, get_opcodes(a, b, engine)) == b
+
+
+def test_myers_is_minimal():
+    a, b = list("abcabba"), list("cbabac")
+    assert sum(size for _, _, size in myers_blocks(a, b)) == 4
+
+
+@pytest.mark.parametrize("engine", list(ENGINES))
+def test_unified_diff_matches_difflib_format(engine):
+    original = "".join(f"line {i}\n" for i in range(20))
+    modified = original.replace("line 3\n", "line three\n").replace("line 15\n", "")
+    expected = "".join(difflib.unified_diff(original.splitlines(keepends=True), modified.splitlines(keepends=True), fromfile="original", tofile="modified"))
+    assert unified_diff(original, modified, engine=engine) == expected
+
+
+def test_identical_and_stat():
+    assert unified_diff("same\n", "same\n") == ""
+    assert diff_stat("same\n", "same\n") == {"hunks": 0, "added": 0, "removed": 0}
+
+    original = "".join(f"{i}\n" for i in range(30))
+    modified = original.replace("2\n", "two\n", 1).replace("25\n", "")
+    assert diff_stat(original, modified) == {"hunks": 2, "added": 1, "removed": 2}
+
+    with pytest.raises(ValueError):
+        unified_diff("a", "b", engine="unknown")
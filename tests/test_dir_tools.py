@@ -64,3 +64,40 @@ async def test_is_valid_operation(dir_tools, test_dir):
     file_path = test_dir / "test.txt"
     file_path.write_text("test")
     assert not dir_tools.is_valid_operation(file_path)
+
+
+@pytest.mark.asyncio
+async def test_scan_directory_structured(dir_tools, test_dir):
+    (test_dir / "small.txt").write_text("a")
+    (test_dir / "large.txt").write_text("a" * 100)
+    (test_dir / "subdir").mkdir()
+
+    listing = await dir_tools.scan_directory(str(test_dir))
+    assert [entry["name"] for entry in listing["entries"]] == ["large.txt", "small.txt", "subdir"]
+    assert listing["total"] == 3
+    entry = listing["entries"][0]
+    assert entry["type"] == "file"
+    assert entry["size"] == 100
+    assert entry["mode"].startswith("-")
+    assert listing["entries"][2]["type"] == "directory"
+
+    by_size = await dir_tools.scan_directory(str(test_dir), sort_by="size", reverse=True, pattern="*.txt")
+    assert by_size["entries"][0]["name"] == "large.txt"
+
+
+@pytest.mark.asyncio
+async def test_scan_directory_filter_and_paging(dir_tools, test_dir):
+    for i in range(10):
+        (test_dir / f"file{i}.py").write_text("")
+    (test_dir / "notes.md").write_text("")
+
+    listing = await dir_tools.scan_directory(str(test_dir), pattern="*.py", offset=2, limit=3)
+    assert [entry["name"] for entry in listing["entries"]] == ["file2.py", "file3.py", "file4.py"]
+    assert listing["total"] == 10
+
+    text = await dir_tools.list_directory(str(test_dir), pattern="*.py", offset=2, limit=3)
+    assert "file2.py" in text
+    assert "showing 3-5 of 10" in text
+
+    with pytest.raises(ValueError):
+        await dir_tools.scan_directory(str(test_dir), sort_by="color")
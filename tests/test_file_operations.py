@@ -86,6 +86,20 @@ async def test_modify_file(file_tools):
     assert "+Hello Python!" in diff
 
 
+@pytest.mark.asyncio
+async def test_modify_file_require_unique(file_tools):
+    test_file = TEST_DIR / "modify_unique.txt"
+    await file_tools.write_file(str(test_file), "x = 1\nx = 1\n")
+
+    with pytest.raises(ValueError):
+        await file_tools.modify_file(str(test_file), {"x = 1": "x = 2"}, require_unique=True)
+    assert await file_tools.read_file(str(test_file)) == "x = 1\nx = 1\n"
+
+    result = await file_tools.replace_in_file(str(test_file), {"x = 1": "x = 2", "y": "z"})
+    assert result["counts"] == {"x = 1": 2, "y": 0}
+    assert await file_tools.read_file(str(test_file)) == "x = 2\nx = 2\n"
+
+
 @pytest.mark.asyncio
 async def test_rewrite_file(file_tools):
     test_file = TEST_DIR / "rewrite.txt"
@@ -116,3 +130,91 @@ async def test_file_tree(file_tools):
     assert "file2.txt" in tree
     assert "subdir" in tree
     assert "file3.txt" in tree
+
+
+@pytest.mark.asyncio
+async def test_read_multiple_files(file_tools):
+    (TEST_DIR / "a.txt").write_text("alpha")
+    (TEST_DIR / "b.txt").write_text("beta")
+
+    paths = [str(TEST_DIR / "a.txt"), str(TEST_DIR / "missing.txt"), "/invalid/path/outside", str(TEST_DIR / "b.txt")]
+    results = await file_tools.read_multiple_files(paths, max_concurrency=2)
+
+    assert list(results) == paths
+    assert results[paths[0]] == {"content": "alpha"}
+    assert "FileNotFoundError" in results[paths[1]]["error"]
+    assert "outside allowed directories" in results[paths[2]]["error"]
+    assert results[paths[3]] == {"content": "beta"}
+
+
+@pytest.mark.asyncio
+async def test_read_multiple_files_byte_budget(file_tools):
+    for name in ["one.txt", "two.txt", "three.txt"]:
+        (TEST_DIR / name).write_text("x" * 10)
+
+    paths = [str(TEST_DIR / name) for name in ["one.txt", "two.txt", "three.txt"]]
+    results = await file_tools.read_multiple_files(paths, max_bytes=25)
+
+    assert sum("content" in result for result in results.values()) == 2
+    assert sum("budget" in result.get("error", "") for result in results.values()) == 1
+
+
+@pytest.mark.asyncio
+async def test_apply_edits(file_tools):
+    (TEST_DIR / "keep.txt").write_text("one\ntwo\n")
+    (TEST_DIR / "old.txt").write_text("obsolete\n")
+
+    result = await file_tools.apply_edits([
+        {"op": "modify", "path": str(TEST_DIR / "keep.txt"), "replacements": {"one": "1"}},
+        {"op": "create", "path": str(TEST_DIR / "pkg" / "new.txt"), "content": "fresh\n"},
+        {"op": "delete", "path": str(TEST_DIR / "old.txt")},
+        {"op": "modify", "path": str(TEST_DIR / "keep.txt"), "replacements": {"two": "2"}},
+    ])
+
+    assert (TEST_DIR / "keep.txt").read_text() == "1\n2\n"
+    assert (TEST_DIR / "pkg" / "new.txt").read_text() == "fresh\n"
+    assert not (TEST_DIR / "old.txt").exists()
+    assert len(result["changed"]) == 3
+    assert "+1\n" in result["diff"] and "+2\n" in result["diff"]
+    assert "--- /dev/null" in result["diff"] and "+++ /dev/null" in result["diff"]
+    assert not list(TEST_DIR.glob(".*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_apply_edits_rolls_back(file_tools):
+    (TEST_DIR / "a.txt").write_text("alpha\n")
+
+    with pytest.raises(ValueError):
+        await file_tools.apply_edits([
+            {"op": "rewrite", "path": str(TEST_DIR / "a.txt"), "content": "changed\n"},
+            {"op": "create", "path": str(TEST_DIR / "sub" / "b.txt"), "content": "beta\n"},
+            {"op": "modify", "path": str(TEST_DIR / "missing.txt"), "replacements": {"x": "y"}},
+        ])
+
+    assert (TEST_DIR / "a.txt").read_text() == "alpha\n"
+    assert not (TEST_DIR / "sub").exists()
+    assert sorted(path.name for path in TEST_DIR.iterdir()) == ["a.txt"]
+
+
+@pytest.mark.asyncio
+async def test_apply_edits_requires_op_fields(file_tools):
+    (TEST_DIR / "a.txt").write_text("alpha\n")
+
+    with pytest.raises(ValueError, match="modify edit of .* requires replacements"):
+        await file_tools.apply_edits([
+            {"op": "create", "path": str(TEST_DIR / "b.txt"), "content": "beta\n"},
+            {"op": "modify", "path": str(TEST_DIR / "a.txt")},
+        ])
+    with pytest.raises(ValueError, match="rewrite edit of .* requires content"):
+        await file_tools.apply_edits([{"op": "rewrite", "path": str(TEST_DIR / "a.txt")}])
+
+    assert sorted(path.name for path in TEST_DIR.iterdir()) == ["a.txt"]
+
+
+@pytest.mark.asyncio
+async def test_rewrite_file_stat_only(file_tools):
+    test_file = TEST_DIR / "stat.txt"
+    test_file.write_text("one\ntwo\nthree\n")
+
+    assert await file_tools.rewrite_file(str(test_file), "one\n2\nthree\nfour\n", stat_only=True) == "hunks: 1, added: 2, removed: 1"
+    assert await file_tools.rewrite_file(str(test_file), "one\n2\nthree\nfour\n") == ""
@@ -1,6 +1,8 @@
 import pytest
 from git import Repo
-from mcp_server_code_assist.tools.git_tools import GitTools
+from mcp_server_code_assist.tools import git_tools as git_tools_module
+from mcp_server_code_assist.tools.git_tools import GitTools, _take_page
+from mcp_server_code_assist.tools.result_cache import ResultCache
 
 
 @pytest.fixture
@@ -80,3 +82,151 @@ class TestGitTools:
         # Test showing HEAD (latest commit)
         head_output = await git_tools.show(str(repo_path))
         assert "modified commit" in head_output
+
+    @pytest.mark.asyncio
+    async def test_log_paging_and_filters(self, git_tools, repo_path):
+        repo = Repo(repo_path)
+        for i in range(5):
+            name = "a.txt" if i % 2 == 0 else "b.txt"
+            (repo_path / name).write_text(str(i))
+            repo.index.add([name])
+            repo.index.commit(f"commit {i}\n\nbody {i}")
+
+        first = await git_tools.log_page(str(repo_path), max_count=2)
+        assert [commit["subject"] for commit in first["commits"]] == ["commit 4", "commit 3"]
+        assert first["commits"][0]["message"].startswith("commit 4\n\nbody 4")
+
+        # New commits do not shift pages anchored by a cursor
+        (repo_path / "c.txt").write_text("new")
+        repo.index.add(["c.txt"])
+        repo.index.commit("commit 5")
+        second = await git_tools.log_page(str(repo_path), max_count=2, cursor=first["next_cursor"])
+        assert [commit["subject"] for commit in second["commits"]] == ["commit 2", "commit 1"]
+        last = await git_tools.log_page(str(repo_path), max_count=2, cursor=second["next_cursor"])
+        assert [commit["subject"] for commit in last["commits"]] == ["commit 0"]
+        assert last["next_cursor"] is None
+
+        by_path = await git_tools.log(str(repo_path), max_count=10, skip=1, paths=["b.txt"], log_format="oneline")
+        assert by_path.splitlines() == [f"{repo.commit('HEAD~4').hexsha[:12]} commit 1"]
+        assert await git_tools.log(str(repo_path), author="nobody") == ""
+        assert "commit 5" not in await git_tools.log(str(repo_path), until="2000-01-01")
+
+        with pytest.raises(ValueError):
+            await git_tools.log(str(repo_path), cursor="HEAD")
+
+    @pytest.mark.asyncio
+    async def test_diff_modes_and_paging(self, git_tools, repo_path):
+        repo = Repo(repo_path)
+        names = [f"f{i}.txt" for i in range(5)]
+        for name in names:
+            (repo_path / name).write_text("old\n")
+        repo.index.add(names)
+        first = repo.index.commit("first")
+        for name in names:
+            (repo_path / name).write_text("new\n" * 20)
+        repo.index.add(names)
+        second = repo.index.commit("second")
+        target = f"{first.hexsha}..{second.hexsha}"
+
+        stat = await git_tools.diff(str(repo_path), target, mode="stat")
+        assert stat.splitlines() == [f"{name} | +20 -1" for name in names]
+        assert await git_tools.diff(str(repo_path), target, mode="name_only") == "\n".join(names)
+        assert "+new" in await git_tools.diff(str(repo_path), target, paths=["f3.txt"])
+
+        full = await git_tools.diff(str(repo_path), target)
+        pages = []
+        cursor = None
+        while True:
+            page = await git_tools.diff_page(str(repo_path), target, max_bytes=100, cursor=cursor)
+            assert page["files"] == 5
+            assert len(page["content"].encode()) <= 100
+            pages.append(page["content"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(pages) > 10
+        assert "\n".join(pages) == full
+
+        truncated = await git_tools.diff(str(repo_path), target, max_bytes=300)
+        assert "continue with cursor=" in truncated.splitlines()[-1]
+        with pytest.raises(ValueError):
+            await git_tools.diff(str(repo_path), target, mode="words")
+
+    @pytest.mark.asyncio
+    async def test_paged_diff_matches_unpaged_diff(self, git_tools, repo_path):
+        repo = Repo(repo_path)
+        names = ["a.txt", "b c.txt", 'q"uote.txt', "é.txt"]
+        for name in names:
+            (repo_path / name).write_text(f"{name}\n" * 5)
+        repo.index.add(names)
+        first = repo.index.commit("first")
+        repo.index.move(["a.txt", "renamed.txt"])
+        for name in names[1:]:
+            (repo_path / name).write_text("changed\n")
+        repo.index.add(names[1:])
+        second = repo.index.commit("second")
+        target = f"{first.hexsha}..{second.hexsha}"
+
+        full = await git_tools.diff(str(repo_path), target)
+        page = await git_tools.diff_page(str(repo_path), target, max_bytes=1 << 20)
+        assert page["content"] == full
+        assert page["files"] == 5
+        assert "rename from" not in full
+        for name in names[1:]:
+            patch = await git_tools.diff_page(str(repo_path), target, paths=[name], max_bytes=1 << 20)
+            assert patch["files"] == 1 and "+changed" in patch["content"]
+
+    def test_take_page_never_splits_characters(self):
+        chunks, cursor = _take_page(["ééé"], 0, 0, 3)
+        assert chunks == ["é"]
+        assert cursor == "0:2"
+        assert _take_page(["ééé"], 0, 2, 10) == (["éé"], None)
+        assert _take_page(["a\n", "bb\n", "c\n"], 0, 0, 4) == (["a\n"], "1:0")
+
+    @pytest.mark.asyncio
+    async def test_blame(self, git_tools, repo_path):
+        repo = Repo(repo_path)
+        (repo_path / "test.txt").write_text("one\ntwo\nthree\n")
+        repo.index.add(["test.txt"])
+        first = repo.index.commit("first")
+        (repo_path / "test.txt").write_text("one\nTWO\nthree\n")
+        repo.index.add(["test.txt"])
+        second = repo.index.commit("second")
+
+        lines = await git_tools.blame(str(repo_path), "test.txt")
+        assert [(line["line"], line["content"], line["commit"]) for line in lines] == [
+            (1, "one", first.hexsha),
+            (2, "TWO", second.hexsha),
+            (3, "three", first.hexsha),
+        ]
+        assert lines[1]["summary"] == "second"
+        assert lines[1]["author"] == second.author.name
+
+        ranged = await git_tools.blame(str(repo_path), str(repo_path / "test.txt"), start_line=2, end_line=3)
+        assert [line["line"] for line in ranged] == [2, 3]
+
+        # Commits that leave the file alone reuse the cached blame
+        (repo_path / "other.txt").write_text("x")
+        repo.index.add(["other.txt"])
+        repo.index.commit("other")
+        assert await git_tools.blame(str(repo_path), "test.txt") is lines
+
+        hunks = [hunk async for hunk in git_tools.blame_incremental(str(repo_path), "test.txt", revision=first.hexsha)]
+        assert [(hunk["final_line"], hunk["lines"]) for hunk in hunks] == [(1, 3)]
+        with pytest.raises(ValueError):
+            await git_tools.blame(str(repo_path), "missing.txt")
+
+    @pytest.mark.asyncio
+    async def test_show_caches_full_shas(self, git_tools, repo_path, monkeypatch):
+        repo = Repo(repo_path)
+        (repo_path / "test.txt").write_text("content")
+        repo.index.add(["test.txt"])
+        commit = repo.index.commit("cached commit")
+        cache = ResultCache()
+        monkeypatch.setattr(git_tools_module, "get_result_cache", lambda: cache)
+
+        first = await git_tools.show(str(repo_path), commit.hexsha)
+        assert await git_tools.show(str(repo_path), commit.hexsha) == first
+        await git_tools.show(str(repo_path), "HEAD")
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["entries"] == 1
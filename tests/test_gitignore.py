@@ -0,0 +1,84 @@
+import os
+
+import pytest
+from mcp_server_code_assist.tools.file_tools import FileTools
+from mcp_server_code_assist.tools.gitignore import GitignoreMatcher, IgnoreRules
+
+
+@pytest.mark.parametrize(
+    "pattern, path, is_dir, expected",
+    [
+        ("*.log", "debug.log", False, True),
+        ("*.log", "logs/debug.log", False, True),
+        ("/build", "build", True, True),
+        ("/build", "src/build", True, None),
+        ("build/", "src/build", True, True),
+        ("build/", "src/build", False, None),
+        ("docs/*.md", "docs/a.md", False, True),
+        ("docs/*.md", "docs/sub/a.md", False, None),
+        ("**/cache", "a/b/cache", True, True),
+        ("a/**/b", "a/x/y/b", False, True),
+        ("a/**/b", "a/b", False, True),
+        ("out/**", "out/x/y", False, True),
+        ("file[0-9].txt", "file7.txt", False, True),
+        ("file[!0-9].txt", "file7.txt", False, None),
+        ("\\#hash", "#hash", False, True),
+        ("# comment", "# comment", False, None),
+    ],
+)
+def test_patterns(pattern, path, is_dir, expected):
+    assert IgnoreRules([pattern]).match(path, is_dir) is expected
+
+
+def test_negation_last_match_wins():
+    rules = IgnoreRules(["*.log", "!keep.log", "keep.log.d/", "!important.log"])
+    assert rules.match("debug.log", False) is True
+    assert rules.match("keep.log", False) is False
+    assert rules.match("important.log", False) is False
+
+
+def test_nested_ignore_files(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.tmp\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub/.gitignore").write_text("!keep.tmp\nlocal/\n")
+    (tmp_path / ".git/info").mkdir(parents=True)
+    (tmp_path / ".git/info/exclude").write_text("secret.txt\n")
+
+    matcher = GitignoreMatcher(tmp_path)
+    assert matcher.is_ignored("a.tmp")
+    assert matcher.is_ignored("sub/a.tmp")
+    assert not matcher.is_ignored("sub/keep.tmp")
+    assert matcher.is_ignored("keep.tmp")
+    assert matcher.is_ignored("sub/local/file.py")
+    assert matcher.is_ignored("sub/secret.txt")
+    assert not matcher.is_ignored("sub/main.py")
+
+
+def test_refresh_reloads_changed_rules(tmp_path):
+    ignore_file = tmp_path / ".gitignore"
+    ignore_file.write_text("*.tmp\n")
+    matcher = GitignoreMatcher(tmp_path)
+    assert matcher.is_ignored("a.tmp")
+
+    ignore_file.write_text("*.bak\n")
+    stat = ignore_file.stat()
+    os.utime(ignore_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    matcher.refresh()
+    assert not matcher.is_ignored("a.tmp")
+    assert matcher.is_ignored("a.bak")
+
+
+@pytest.mark.asyncio
+async def test_file_tree_respects_nested_ignores(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.tmp\n")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg/.gitignore").write_text("generated/\n!keep.tmp\n")
+    (tmp_path / "pkg/generated").mkdir()
+    (tmp_path / "pkg/generated/out.py").write_text("")
+    (tmp_path / "pkg/keep.tmp").write_text("")
+    (tmp_path / "pkg/drop.tmp").write_text("")
+
+    tree = await FileTools([str(tmp_path)]).file_tree(str(tmp_path))
+    assert "keep.tmp" in tree
+    assert "drop.tmp" not in tree
+    assert "generated" not in tree
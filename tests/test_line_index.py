@@ -0,0 +1,60 @@
+import pytest
+from mcp_server_code_assist.tools import line_index
+from mcp_server_code_assist.tools.file_tools import FileTools
+from mcp_server_code_assist.tools.line_index import read_range
+
+
+@pytest.fixture
+def big_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(line_index, "BLOCK_SIZE", 64)
+    path = tmp_path / "big.log"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 1001)))
+    return path
+
+
+def test_line_range(big_file):
+    result = read_range(big_file, start_line=500, end_line=502)
+    assert result["content"] == "line 500\nline 501\nline 502\n"
+    assert result["lines"] == 1000
+    assert result["size"] == big_file.stat().st_size
+    assert (result["start_line"], result["end_line"]) == (500, 502)
+
+
+def test_line_range_clamped_to_end(big_file):
+    result = read_range(big_file, start_line=999, end_line=5000)
+    assert result["content"] == "line 999\nline 1000\n"
+    assert result["end"] == result["size"]
+
+    assert read_range(big_file, start_line=2000)["content"] == ""
+
+
+def test_byte_range_reports_lines(big_file):
+    text = big_file.read_bytes()
+    start = text.index(b"line 10\n")
+    result = read_range(big_file, offset=start, length=len("line 10\nline 11\n"))
+    assert result["content"] == "line 10\nline 11\n"
+    assert (result["start_line"], result["end_line"]) == (10, 11)
+
+
+def test_index_refreshed_after_change(big_file):
+    assert read_range(big_file, start_line=1, end_line=1)["lines"] == 1000
+    big_file.write_text("only\nthree\nlines")
+    result = read_range(big_file, start_line=3)
+    assert result["content"] == "lines"
+    assert result["lines"] == 3
+
+
+def test_invalid_ranges(big_file):
+    with pytest.raises(ValueError):
+        read_range(big_file, offset=0, start_line=1)
+    with pytest.raises(ValueError):
+        read_range(big_file, start_line=0)
+
+
+@pytest.mark.asyncio
+async def test_read_file_range(tmp_path):
+    (tmp_path / "empty.txt").write_text("")
+    file_tools = FileTools([str(tmp_path)])
+    result = await file_tools.read_file_range(str(tmp_path / "empty.txt"), start_line=1)
+    assert result["content"] == ""
+    assert result["lines"] == 0
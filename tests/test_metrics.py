@@ -0,0 +1,85 @@
+import json
+import logging
+
+import pytest
+from git import Repo
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp_server_code_assist.metrics import Metrics, get_metrics
+from mcp_server_code_assist.server import STATS_URI, create_server, dump_metrics
+
+
+def test_record_and_snapshot():
+    metrics = Metrics(slow_call_seconds=None)
+    metrics.record("read_file", 0.002, response_bytes=100)
+    metrics.record("read_file", 0.2, response_bytes=300)
+    metrics.record("read_file", 0.004, error=True)
+
+    stats = metrics.snapshot()["tools"]["read_file"]
+    assert stats["calls"] == 3
+    assert stats["errors"] == 1
+    assert stats["response_bytes"] == 400
+    assert stats["max_response_bytes"] == 300
+    assert stats["max_seconds"] == pytest.approx(0.2)
+    assert stats["p50_seconds"] == 0.005
+    assert stats["p99_seconds"] == 0.25
+    assert stats["buckets"]["0.005"] == 2
+
+
+def test_slow_call_logging(caplog):
+    metrics = Metrics(slow_call_seconds=0.5)
+    with caplog.at_level(logging.WARNING, logger="mcp_server_code_assist.metrics"):
+        metrics.record("git_log", 0.1)
+        metrics.record("git_log", 0.75, response_bytes=10)
+
+    assert len(caplog.records) == 1
+    assert "git_log took 0.750s" in caplog.records[0].getMessage()
+
+
+def test_prometheus_buckets_are_cumulative():
+    metrics = Metrics(slow_call_seconds=None)
+    metrics.record("file_tree", 0.002)
+    metrics.record("file_tree", 20.0)
+
+    text = metrics.to_prometheus()
+    assert 'code_assist_tool_calls_total{tool="file_tree"} 2' in text
+    assert 'code_assist_tool_duration_seconds_bucket{tool="file_tree",le="0.005"} 1' in text
+    assert 'code_assist_tool_duration_seconds_bucket{tool="file_tree",le="10.0"} 1' in text
+    assert 'code_assist_tool_duration_seconds_bucket{tool="file_tree",le="+Inf"} 2' in text
+
+
+def test_dump(tmp_path):
+    metrics = Metrics(slow_call_seconds=None)
+    metrics.record("read_file", 0.01)
+    metrics.dump(tmp_path / "metrics.json")
+    metrics.dump(tmp_path / "metrics.prom", "prometheus")
+
+    assert json.loads((tmp_path / "metrics.json").read_text())["tools"]["read_file"]["calls"] == 1
+    assert (tmp_path / "metrics.prom").read_text().startswith("# HELP")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["metrics.json", "metrics.prom"]
+    with pytest.raises(ValueError):
+        metrics.dump(tmp_path / "metrics.txt", "xml")
+
+
+def test_dump_metrics_logs_write_errors(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING):
+        dump_metrics(tmp_path / "missing" / "metrics.json", "json")
+
+    assert "Could not write metrics" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_server_records_tool_calls(tmp_path):
+    Repo.init(tmp_path)
+    (tmp_path / "a.txt").write_text("hello")
+    get_metrics().reset()
+    async with create_connected_server_and_client_session(create_server(tmp_path)) as client:
+        await client.call_tool("read_file", {"path": str(tmp_path / "a.txt")})
+        await client.call_tool("read_file", {"path": str(tmp_path / "missing.txt")})
+        result = await client.call_tool("server_stats", {})
+        resource = await client.read_resource(STATS_URI)
+
+    stats = json.loads(result.content[0].text)["tools"]["read_file"]
+    assert stats["calls"] == 2
+    assert stats["errors"] == 1
+    assert stats["response_bytes"] == 5
+    assert json.loads(resource.contents[0].text)["tools"]["server_stats"]["calls"] == 1
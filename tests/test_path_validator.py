@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from mcp_server_code_assist.path_validator import PathValidator
+from mcp_server_code_assist.tools.file_tools import FileTools
+
+
+def test_sibling_with_common_prefix_is_rejected(tmp_path):
+    (tmp_path / "repo").mkdir()
+    (tmp_path / "repo2").mkdir()
+    validator = PathValidator([str(tmp_path / "repo")])
+
+    assert validator.validate(tmp_path / "repo" / "a.txt") == (tmp_path / "repo" / "a.txt").resolve()
+    assert validator.validate(tmp_path / "repo") == (tmp_path / "repo").resolve()
+    with pytest.raises(ValueError, match="outside allowed directories"):
+        validator.validate(tmp_path / "repo2" / "a.txt")
+    with pytest.raises(ValueError):
+        validator.validate(tmp_path / "repo" / ".." / "repo2")
+
+
+def test_symlinks_are_resolved(tmp_path):
+    root = tmp_path / "root"
+    outside = tmp_path / "outside"
+    root.mkdir()
+    outside.mkdir()
+    (outside / "secret.txt").write_text("x")
+    (root / "link_dir").symlink_to(outside)
+    (root / "link_file").symlink_to(outside / "secret.txt")
+    validator = PathValidator([str(root)])
+
+    with pytest.raises(ValueError):
+        validator.validate(root / "link_dir" / "secret.txt")
+    with pytest.raises(ValueError):
+        validator.validate(root / "link_file")
+
+
+def test_directory_replaced_by_symlink_is_noticed(tmp_path):
+    root = tmp_path / "root"
+    outside = tmp_path / "outside"
+    (root / "sub").mkdir(parents=True)
+    outside.mkdir()
+    validator = PathValidator([str(root)])
+    validator.validate(root / "sub" / "a.txt")
+
+    os.rmdir(root / "sub")
+    (root / "sub").symlink_to(outside)
+    with pytest.raises(ValueError):
+        validator.validate(root / "sub" / "a.txt")
+
+
+def test_many_roots_and_missing_paths(tmp_path):
+    roots = [tmp_path / f"root{i}" for i in range(100)]
+    validator = PathValidator([str(root) for root in roots])
+
+    assert validator.validate(roots[42] / "new" / "dir" / "file.txt") == roots[42].resolve() / "new" / "dir" / "file.txt"
+    with pytest.raises(ValueError):
+        validator.validate(tmp_path / "root100" / "file.txt")
+    with pytest.raises(ValueError):
+        PathValidator([]).validate(tmp_path)
+    assert PathValidator(["/"]).validate(tmp_path) == tmp_path.resolve()
+
+
+@pytest.mark.asyncio
+async def test_file_tools_reject_prefix_siblings(tmp_path):
+    (tmp_path / "repo").mkdir()
+    (tmp_path / "repo2").mkdir()
+    (tmp_path / "repo2" / "secret.txt").write_text("secret")
+    file_tools = FileTools([str(tmp_path / "repo")])
+
+    with pytest.raises(ValueError):
+        await file_tools.read_file(str(tmp_path / "repo2" / "secret.txt"))
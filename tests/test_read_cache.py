@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+from mcp_server_code_assist.tools import read_cache as read_cache_module
+from mcp_server_code_assist.tools.file_tools import FileTools
+from mcp_server_code_assist.tools.read_cache import ReadCache
+
+
+def write_old(path, content, age=60):
+    path.write_text(content)
+    then = time.time() - age
+    os.utime(path, (then, then))
+
+
+def test_unchanged_files_are_served_from_memory(tmp_path):
+    path = tmp_path / "a.txt"
+    write_old(path, "hello")
+    cache = ReadCache()
+
+    assert cache.read(path) == "hello"
+    assert cache.read(path) == "hello"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_external_edits_are_never_served_stale(tmp_path):
+    path = tmp_path / "a.txt"
+    write_old(path, "hello", age=120)
+    cache = ReadCache()
+    cache.read(path)
+
+    write_old(path, "jello", age=60)
+    assert cache.read(path) == "jello"
+
+
+def test_recently_modified_files_are_not_cached(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("fresh")
+    cache = ReadCache()
+    cache.read(path)
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_byte_budget(tmp_path):
+    cache = ReadCache(max_bytes=2500)
+    for name in "abc":
+        write_old(tmp_path / name, name * 1000)
+        cache.read(tmp_path / name)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= 2500
+    cache.read(tmp_path / "a")
+    assert cache.stats()["misses"] == 4
+
+
+@pytest.mark.asyncio
+async def test_file_tools_writes_invalidate(tmp_path, monkeypatch):
+    cache = ReadCache()
+    monkeypatch.setattr(read_cache_module, "_read_cache", cache)
+    file_tools = FileTools([str(tmp_path)])
+    path = tmp_path / "a.txt"
+    write_old(path, "one two")
+
+    assert await file_tools.read_file(str(path)) == "one two"
+    await file_tools.modify_file(str(path), {"one": "three"})
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["entries"] == 0
+    assert await file_tools.read_file(str(path)) == "three two"
+
+    write_old(path, "three two")
+    await file_tools.read_file(str(path))
+    await file_tools.delete_file(str(path))
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,38 @@
+import pytest
+from mcp_server_code_assist.tools.replace import compile_keys, replace_all
+
+
+def test_replace_all_single_pass():
+    content, counts = replace_all("a b a c", {"a": "b", "b": "a"})
+    assert content == "b a b c"
+    assert counts == {"a": 2, "b": 1}
+
+
+def test_replace_all_prefers_longest_key():
+    content, counts = replace_all("foobar foo", {"foo": "1", "foobar": "2", "bar": "3"})
+    assert content == "2 1"
+    assert counts == {"foo": 1, "foobar": 1, "bar": 0}
+
+
+def test_replace_all_special_characters():
+    keys = {"a.b": "x", "(c)": "y", "\n": " ", "$[": "z"}
+    content, _ = replace_all("a.b axb (c)\n$[", keys)
+    assert content == "x axb y z"
+
+
+def test_replace_all_require_unique():
+    assert replace_all("one two", {"one": "1"}, require_unique=True) == ("1 two", {"one": 1})
+
+    with pytest.raises(ValueError, match="'two' matched 2 times"):
+        replace_all("two two", {"two": "2"}, require_unique=True)
+    with pytest.raises(ValueError, match="'three' matched 0 times"):
+        replace_all("one", {"one": "1", "three": "3"}, require_unique=True)
+
+
+def test_compile_keys_many_keys():
+    keys = [f"name_{i}" for i in range(500)]
+    pattern = compile_keys(keys)
+    assert [m.group() for m in pattern.finditer("name_1 name_12 name_499 name_5000")] == ["name_1", "name_12", "name_499", "name_50"]
+
+    with pytest.raises(ValueError):
+        compile_keys([""])
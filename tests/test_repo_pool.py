@@ -0,0 +1,56 @@
+import pytest
+from git import Repo
+from git.exc import InvalidGitRepositoryError
+from mcp_server_code_assist.tools.repo_pool import RepoPool
+
+
+@pytest.fixture
+def repos(tmp_path):
+    paths = []
+    for name in ["a", "b", "c"]:
+        path = tmp_path / name
+        path.mkdir()
+        Repo.init(path)
+        paths.append(path)
+    return paths
+
+
+def test_lease_reuses_handle(repos):
+    pool = RepoPool()
+    with pool.lease(repos[0]) as first:
+        pass
+    with pool.lease(str(repos[0]) + "/.") as second:
+        pass
+    assert first is second
+    assert len(pool) == 1
+
+
+def test_lru_eviction_closes_handle(repos, monkeypatch):
+    pool = RepoPool(max_size=2)
+    closed = []
+
+    def lease(path):
+        with pool.lease(path) as repo:
+            if "close" not in vars(repo):
+                monkeypatch.setattr(repo, "close", lambda: closed.append(repo.working_tree_dir))
+
+    for path in repos[:2]:
+        lease(path)
+    lease(repos[0])
+    lease(repos[2])
+
+    assert repos[0] in pool
+    assert repos[1] not in pool
+    assert closed == [str(repos[1])]
+
+    pool.close()
+    assert len(pool) == 0
+    assert sorted(closed[1:]) == sorted([str(repos[0]), str(repos[2])])
+
+
+def test_invalid_repository(tmp_path):
+    pool = RepoPool()
+    with pytest.raises(InvalidGitRepositoryError):
+        with pool.lease(tmp_path):
+            pass
+    assert len(pool) == 0
@@ -0,0 +1,50 @@
+from mcp_server_code_assist.tools.result_cache import ResultCache, is_full_sha
+
+
+def test_is_full_sha():
+    assert is_full_sha("a" * 40)
+    assert is_full_sha("0123456789abcdef" * 4)
+    assert not is_full_sha("a" * 39)
+    assert not is_full_sha("HEAD")
+    assert not is_full_sha(None)
+
+
+def test_memory_budget_evicts_least_recently_used():
+    value = "x" * 1000
+    cache = ResultCache(max_bytes=2500)
+    cache.put(("show", "a"), value)
+    cache.put(("show", "b"), value)
+    assert cache.get(("show", "a")) == value
+    cache.put(("show", "c"), value)
+
+    assert cache.get(("show", "b")) is None
+    assert cache.get(("show", "a")) == value
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= 2500
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+    cache.put("huge", "x" * 5000)
+    assert cache.get("huge") is None
+
+
+def test_persistence(tmp_path):
+    path = tmp_path / "results.sqlite"
+    ResultCache(path=path).put(("show", "a"), "first")
+
+    restarted = ResultCache(path=path)
+    assert restarted.get(("show", "a")) == "first"
+    assert restarted.get(("show", "a")) == "first"
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.stats()["hits"] == 1
+
+
+def test_disk_budget(tmp_path):
+    cache = ResultCache(path=tmp_path / "results.sqlite", max_disk_bytes=250)
+    for key in "abc":
+        cache.put(key, key * 100)
+    cache.clear()
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "b" * 100
+    assert cache.get("c") == "c" * 100
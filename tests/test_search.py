@@ -0,0 +1,93 @@
+import pytest
+from mcp_server_code_assist.tools.file_tools import FileTools
+from mcp_server_code_assist.tools.search import compile_query, get_index, required_trigrams
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    (root / "src/app.py").write_text("def handle_request(request):\n    return Response(request)\n")
+    (root / "src/util.py").write_text("def helper():\n    pass\n")
+    (root / "build").mkdir()
+    (root / "build/app.py").write_text("def handle_request(): pass\n")
+    (root / ".gitignore").write_text("build/\n")
+    return root
+
+
+def test_required_trigrams():
+    assert required_trigrams(compile_query("abcd")) == required_trigrams(compile_query("ABCD", case_sensitive=False))
+    assert len(required_trigrams(compile_query("abcd"))) == 2
+    assert required_trigrams(compile_query("foo|bar", regex=True)) == set()
+    assert len(required_trigrams(compile_query("foo.*barbaz", regex=True))) == 5
+
+    with pytest.raises(ValueError):
+        compile_query("(", regex=True)
+
+
+def test_required_trigrams_ignores_unexpected_parse_output(monkeypatch):
+    import re._parser
+    from re._constants import LITERAL
+
+    monkeypatch.setattr(re._parser, "parse", lambda pattern, flags: [(LITERAL, "a")] * 4)
+    assert required_trigrams(compile_query("abcd")) == set()
+
+
+@pytest.mark.asyncio
+async def test_search_code_skips_index_by_default(project):
+    result = await FileTools([str(project)]).search_code(str(project), "handle_request")
+
+    assert result["candidates"] == 3
+    assert not (project.parent / "cache").exists()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_index", [True, False])
+async def test_search_code(project, use_index):
+    file_tools = FileTools([str(project)])
+    result = await file_tools.search_code(str(project), "handle_request", use_index=use_index)
+
+    assert [(match["path"], match["line"], match["column"]) for match in result["matches"]] == [("src/app.py", 1, 5)]
+    assert result["next_offset"] is None
+    if use_index:
+        assert result["candidates"] == 1
+
+    result = await file_tools.search_code(str(project), r"def \w+\(", regex=True, use_index=use_index)
+    assert [match["path"] for match in result["matches"]] == ["src/app.py", "src/util.py"]
+
+
+@pytest.mark.asyncio
+async def test_search_code_paging_and_caps(project):
+    (project / "src/many.py").write_text("".join(f"value_{i} = {i}\n" for i in range(50)))
+    file_tools = FileTools([str(project)])
+
+    result = await file_tools.search_code(str(project), "value_", max_matches_per_file=10, limit=4)
+    assert [match["line"] for match in result["matches"]] == [1, 2, 3, 4]
+    assert result["next_offset"] == 4
+
+    result = await file_tools.search_code(str(project), "value_", max_matches_per_file=10, offset=8, limit=4)
+    assert [match["line"] for match in result["matches"]] == [9, 10]
+    assert result["next_offset"] is None
+
+
+def test_index_tracks_changes(project, tmp_path):
+    index = get_index(project, tmp_path / "index")
+    files = ["src/app.py", "src/util.py"]
+    trigrams = required_trigrams(compile_query("helper"))
+    assert index.candidates(files, trigrams) == ["src/util.py"]
+
+    (project / "src/app.py").write_text("from util import helper\n")
+    assert index.candidates(files, trigrams) == ["src/app.py", "src/util.py"]
+
+    (project / "src/util.py").unlink()
+    assert index.candidates(files, trigrams) == ["src/app.py"]
+
+
+def test_index_rebuilds_after_many_changes(project, tmp_path):
+    index = get_index(project, tmp_path / "index")
+    files = ["src/app.py", "src/util.py"]
+    for i in range(70):
+        (project / "src/app.py").write_text("x" * i + " needle\n")
+        assert index.candidates(files, required_trigrams(compile_query("needle"))) == ["src/app.py"]
+    assert index.candidates(files, required_trigrams(compile_query("helper"))) == ["src/util.py"]
@@ -1,6 +1,7 @@
 import pytest
 from git import Repo
-from mcp_server_code_assist.server import process_instruction
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp_server_code_assist.server import CodeAssistTools, create_server, process_batch, process_instruction, tool_definitions
 
 
 @pytest.fixture
@@ -17,3 +18,70 @@ def test_repo(tmp_path):
 async def test_invalid_instruction(test_repo):
     response = await process_instruction({"type": "invalid"}, test_repo)
     assert response["error"] == "Unknown instruction type: invalid"
+
+
+def test_tool_definitions_are_built_once():
+    assert tool_definitions() is tool_definitions()
+    assert {tool.name for tool in tool_definitions()} == set(CodeAssistTools)
+
+
+@pytest.mark.asyncio
+async def test_process_batch(test_repo):
+    target = test_repo / "new.txt"
+    instructions = [
+        {"type": "create_file", "path": str(target), "content": "hello"},
+        {"type": "read_file", "path": str(target)},
+        {"type": "git_status"},
+        {"type": "read_file", "path": str(test_repo / "test.txt")},
+        {"type": "invalid"},
+    ]
+
+    results = await process_batch(instructions, test_repo)
+    assert results[1]["result"] == {"content": "hello"}
+    assert "new.txt" in results[2]["result"]["status"]
+    assert results[3]["result"] == {"content": "test"}
+    assert results[4]["result"]["error"] == "Unknown instruction type: invalid"
+    assert all(result["seconds"] >= 0 and result["waited_seconds"] >= 0 for result in results)
+
+
+@pytest.mark.asyncio
+async def test_git_log_tool_passes_filters(test_repo):
+    repo = Repo(test_repo)
+    repo.index.add(["test.txt"])
+    repo.index.commit("first")
+    repo.index.commit("second")
+
+    async with create_connected_server_and_client_session(create_server(test_repo)) as client:
+        result = await client.call_tool("git_log", {"repo_path": str(test_repo), "max_count": 1, "format": "oneline"})
+
+    lines = result.content[0].text.splitlines()
+    assert lines[0].endswith(" second")
+    assert lines[1].startswith("More commits available, continue with cursor=")
+
+
+@pytest.mark.asyncio
+async def test_git_show_tool_uses_revision(test_repo):
+    repo = Repo(test_repo)
+    repo.index.add(["test.txt"])
+    commit = repo.index.commit("shown")
+
+    async with create_connected_server_and_client_session(create_server(test_repo)) as client:
+        result = await client.call_tool("git_show", {"repo_path": str(test_repo), "revision": commit.hexsha})
+        stats = await client.call_tool("server_stats", {})
+
+    assert "shown" in result.content[0].text
+    assert "git_results" in stats.content[0].text
+    assert "shown" in (await process_instruction({"type": "git_show", "revision": commit.hexsha}, test_repo))["show"]
+
+
+@pytest.mark.asyncio
+async def test_symbol_tools(test_repo):
+    (test_repo / "app.py").write_text("class App:\n    def run(self):\n        pass\n")
+    Repo(test_repo).index.add(["app.py"])
+
+    async with create_connected_server_and_client_session(create_server(test_repo)) as client:
+        outline = await client.call_tool("code_outline", {"path": str(test_repo / "app.py")})
+        found = await client.call_tool("find_symbol", {"path": str(test_repo), "name": "App.run"})
+
+    assert outline.content[0].text == "class App 1-3\n    method run 2-3"
+    assert found.content[0].text == "app.py:2-3: method App.run"
@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+from mcp_server_code_assist.tools import symbols as symbols_module
+from mcp_server_code_assist.tools.file_tools import FileTools
+from mcp_server_code_assist.tools.symbols import SymbolIndex, outline_source
+
+SOURCE = """\
+import functools
+
+
+class Shape:
+    class Meta:
+        pass
+
+    @functools.cache
+    def area(self):
+        def helper():
+            return 1
+
+        return helper()
+
+
+if True:
+    async def load():
+        pass
+"""
+
+
+def write_old(path, content, age=60):
+    path.write_text(content)
+    then = time.time() - age
+    os.utime(path, (then, then))
+
+
+def test_outline_lists_nested_definitions_with_spans():
+    symbols = [(symbol.qualname, symbol.kind, symbol.line, symbol.end_line, symbol.depth) for symbol in outline_source(SOURCE)]
+
+    assert symbols == [
+        ("Shape", "class", 4, 13, 0),
+        ("Shape.Meta", "class", 5, 6, 1),
+        ("Shape.area", "method", 8, 13, 1),
+        ("Shape.area.helper", "function", 10, 11, 2),
+        ("load", "function", 17, 18, 0),
+    ]
+
+
+def test_index_reparses_only_changed_files(tmp_path):
+    write_old(tmp_path / "a.py", "def run():\n    pass\n")
+    write_old(tmp_path / "b.py", "class Runner:\n    def run(self):\n        pass\n")
+    index = SymbolIndex(tmp_path)
+
+    assert index.refresh(["a.py", "b.py"]) == 2
+    assert [(match["path"], match["qualname"]) for match in index.find("run")] == [("a.py", "run"), ("b.py", "Runner.run")]
+    assert index.refresh(["a.py", "b.py"]) == 0
+
+    write_old(tmp_path / "a.py", "def walk():\n    pass\n", age=30)
+    assert index.refresh(["a.py", "b.py"]) == 1
+    assert [match["qualname"] for match in index.find("run")] == ["Runner.run"]
+    assert [match["path"] for match in index.find("Runner.run", kind="method")] == ["b.py"]
+    assert index.find("Runner.run", kind="class") == []
+
+    index.refresh(["a.py"])
+    assert index.find("Runner") == []
+
+
+def test_index_parses_large_trees_in_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(symbols_module, "PARALLEL_PARSE_MIN", 1)
+    monkeypatch.setattr(symbols_module, "PARSE_CHUNK_SIZE", 2)
+    for i in range(5):
+        write_old(tmp_path / f"m{i}.py", f"def f{i}():\n    pass\n")
+    index = SymbolIndex(tmp_path)
+
+    try:
+        assert index.refresh(f"m{i}.py" for i in range(5)) == 5
+    finally:
+        symbols_module.shutdown_process_pool()
+    assert index.find("f3") == [{"path": "m3.py", "qualname": "f3", "name": "f3", "kind": "function", "line": 1, "end_line": 2, "depth": 0}]
+
+
+@pytest.mark.asyncio
+async def test_file_tools_find_symbol_and_outline(tmp_path):
+    write_old(tmp_path / "shapes.py", SOURCE)
+    write_old(tmp_path / "notes.txt", "def area(): pass\n")
+    (tmp_path / "broken.py").write_text("def area(:\n")
+    tools = FileTools([str(tmp_path)])
+
+    result = await tools.find_symbol(str(tmp_path), "area", limit=1)
+    assert [match["qualname"] for match in result["matches"]] == ["Shape.area"]
+    assert result["files_indexed"] == 2
+    assert result["next_offset"] is None
+
+    outline = await tools.code_outline(str(tmp_path / "shapes.py"))
+    assert [symbol["name"] for symbol in outline] == ["Shape", "Meta", "area", "helper", "load"]
+    with pytest.raises(ValueError, match="Cannot parse"):
+        await tools.code_outline(str(tmp_path / "broken.py"))
+    with pytest.raises(ValueError, match="Unknown symbol kind"):
+        await tools.find_symbol(str(tmp_path), "area", kind="module")
@@ -0,0 +1,39 @@
+import pytest
+from git import Repo
+from mcp_server_code_assist.tools.tools_manager import ToolRegistry, get_dir_tools, get_file_tools, get_git_tools
+
+
+def test_alternating_workspaces_reuse_tools(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    Repo.init(first)
+    Repo.init(second)
+    registry = ToolRegistry()
+
+    tools = {path: registry.workspace([str(path)]) for path in (first, second)}
+    git_tools = {path: workspace.git for path, workspace in tools.items()}
+    for _ in range(3):
+        for path in (first, second):
+            workspace = registry.workspace([str(path) + "/"])
+            assert workspace is tools[path]
+            assert workspace.git is git_tools[path]
+    assert registry.stats() == {"entries": 2, "max_entries": 16, "hits": 6, "misses": 2}
+
+
+def test_registry_drops_least_recently_used_workspace(tmp_path):
+    registry = ToolRegistry(max_workspaces=2)
+    a, b, c = (registry.workspace([str(tmp_path / name)]) for name in "abc")
+
+    assert registry.workspace([str(tmp_path / "c")]) is c
+    assert registry.workspace([str(tmp_path / "b")]) is b
+    assert registry.workspace([str(tmp_path / "a")]) is not a
+
+
+def test_git_tools_are_created_on_demand(tmp_path):
+    paths = [str(tmp_path)]
+
+    assert get_file_tools(paths).allowed_paths == paths
+    assert get_dir_tools(paths).allowed_paths == paths
+    with pytest.raises(ValueError, match="Invalid git repository"):
+        get_git_tools(paths)
+    Repo.init(tmp_path)
+    assert get_git_tools(paths) is get_git_tools(paths)
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+from mcp_server_code_assist.tools.transaction import StagedFile, Transaction, apply_edit
+
+
+def test_apply_edit():
+    assert apply_edit(None, {"op": "create", "path": "f", "content": "x"}) == "x"
+    assert apply_edit("a b", {"op": "modify", "path": "f", "replacements": {"a": "b", "b": "a"}}) == "b a"
+    assert apply_edit("x", {"op": "delete", "path": "f"}) is None
+
+    with pytest.raises(ValueError):
+        apply_edit("x", {"op": "create", "path": "f", "content": "y"})
+    with pytest.raises(ValueError):
+        apply_edit(None, {"op": "modify", "path": "f", "replacements": {}})
+
+
+def test_commit_rolls_back_renamed_files(tmp_path, monkeypatch):
+    first = tmp_path / "first.txt"
+    second = tmp_path / "second.txt"
+    first.write_text("first\n")
+    second.write_text("second\n")
+    staged = [StagedFile(first), StagedFile(second), StagedFile(tmp_path / "third.txt")]
+    staged[0].stage([{"op": "rewrite", "path": "first", "content": "1\n"}])
+    staged[1].stage([{"op": "delete", "path": "second"}])
+    staged[2].stage([{"op": "create", "path": "third", "content": "3\n"}])
+
+    real_replace = os.replace
+
+    def failing_replace(src, dst):
+        if str(dst).endswith("third.txt"):
+            raise OSError("disk full")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        Transaction(staged).commit()
+    monkeypatch.undo()
+
+    assert first.read_text() == "first\n"
+    assert second.read_text() == "second\n"
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_file()) == ["first.txt", "second.txt"]
+
+
+def test_commit_detects_concurrent_change(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("before\n")
+    staged = StagedFile(path)
+    staged.stage([{"op": "rewrite", "path": "file", "content": "after\n"}])
+    path.write_text("someone else\n")
+
+    with pytest.raises(ValueError, match="changed while"):
+        Transaction([staged]).commit()
+    assert path.read_text() == "someone else\n"
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+from git import Repo
+from mcp_server_code_assist.tools import tree_cache
+from mcp_server_code_assist.tools.file_tools import FileTools
+from mcp_server_code_assist.tools.tree_cache import TreeCache, TreeNode, build_tracked_tree, build_walk_tree
+
+
+def _age(*paths, seconds=60):
+    for path in paths:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def test_render_orders_dirs_before_files():
+    root = TreeNode()
+    for rel_path in ["b.txt", "a/z.txt", "a/b/c.txt", "c/d.txt"]:
+        root.insert(rel_path)
+
+    tree, dirs, files = root.render()
+    assert tree.splitlines() == ["├── a", "│   ├── b", "│   │   └── c.txt", "│   └── z.txt", "├── c", "│   └── d.txt", "└── b.txt"]
+    assert (dirs, files) == (3, 4)
+
+
+def test_tracked_tree_prunes_missing_paths(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src/main.py").write_text("")
+    (tmp_path / "untracked.txt").write_text("")
+
+    snapshot = build_tracked_tree(tmp_path, ["src/main.py", "gone/file.py", "src/deleted.py"])
+    tree, dirs, files = snapshot.render()
+    assert "main.py" in tree
+    assert "gone" not in tree
+    assert "deleted.py" not in tree
+    assert "untracked.txt" not in tree
+    assert (dirs, files) == (1, 1)
+
+
+def test_cache_hit_and_invalidation(tmp_path, monkeypatch):
+    monkeypatch.setattr(tree_cache, "RACY_WINDOW_NS", 0)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub/file.txt").write_text("")
+    _age(tmp_path, tmp_path / "sub")
+
+    cache = TreeCache()
+    snapshot = build_walk_tree(tmp_path, lambda rel_path, is_dir: False)
+    cache.put(tmp_path, snapshot)
+    assert cache.get(tmp_path) is snapshot
+
+    (tmp_path / "sub/new.txt").write_text("")
+    _age(tmp_path / "sub", seconds=30)
+    assert cache.get(tmp_path) is None
+
+
+def test_racy_snapshot_is_not_trusted(tmp_path):
+    (tmp_path / "file.txt").write_text("")
+    cache = TreeCache()
+    cache.put(tmp_path, build_walk_tree(tmp_path, lambda rel_path, is_dir: False))
+    assert cache.get(tmp_path) is None
+
+
+@pytest.mark.asyncio
+async def test_file_tree_tracked_files(tmp_path):
+    repo = Repo.init(tmp_path)
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg/module.py").write_text("")
+    (tmp_path / "scratch").mkdir()
+    (tmp_path / "scratch/notes.txt").write_text("")
+    repo.index.add(["pkg/module.py"])
+
+    file_tools = FileTools([str(tmp_path)])
+    tree = await file_tools.file_tree(str(tmp_path))
+    assert "module.py" in tree
+    assert "scratch" not in tree
+
+    repo.index.add(["scratch/notes.txt"])
+    repo.index.write()
+    tree = await file_tools.file_tree(str(tmp_path))
+    assert "notes.txt" in tree
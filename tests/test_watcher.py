@@ -0,0 +1,164 @@
+import asyncio
+import os
+import time
+
+import pytest
+from anyio import fail_after
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp.types import ServerNotification
+from mcp_server_code_assist.server import create_server
+from mcp_server_code_assist.tools import symbols as symbols_module
+from mcp_server_code_assist.tools.symbols import SymbolIndex
+from mcp_server_code_assist.watcher import Invalidation, InvalidationBus, InotifyWatcher, PollingWatcher, WatchManager
+from pydantic import AnyUrl
+
+
+def collect(bus):
+    events = []
+    bus.subscribe("test", events.append)
+    return events
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_bus_isolates_failing_subscribers():
+    bus = InvalidationBus()
+    bus.subscribe("broken", lambda event: 1 / 0)
+    events = collect(bus)
+    event = Invalidation("/repo", frozenset({"/repo/a.py"}), False)
+
+    bus.publish(event)
+
+    assert events == [event]
+    assert event.touches("/repo/a.py") and event.touches("/") and not event.touches("/repo/b.py")
+    assert Invalidation("/repo", None, True).touches("/repo/src")
+
+
+@pytest.mark.asyncio
+async def test_inotify_watcher_debounces_changes(tmp_path):
+    (tmp_path / ".git").mkdir()
+    (tmp_path / "src").mkdir()
+    bus = InvalidationBus()
+    events = collect(bus)
+    watcher = InotifyWatcher(str(tmp_path), bus, debounce=0.05)
+    watcher.start()
+    try:
+        assert events == [Invalidation(str(tmp_path), None, True)]
+        assert watcher.is_current()
+
+        (tmp_path / "src" / "a.py").write_text("x = 1\n")
+        (tmp_path / "src" / "a.py").write_text("x = 2\n")
+        (tmp_path / ".git" / "index.lock").write_text("")
+        (tmp_path / ".git" / "index").write_text("")
+        assert not watcher.is_current()
+        await wait_for(lambda: len(events) == 2)
+
+        assert events[1] == Invalidation(str(tmp_path), frozenset({str(tmp_path / "src" / "a.py"), str(tmp_path / ".git" / "index")}), True)
+        assert watcher.is_current()
+
+        (tmp_path / "src" / "pkg").mkdir()
+        await wait_for(lambda: len(events) == 3)
+        (tmp_path / "src" / "pkg" / "b.py").write_text("")
+        await wait_for(lambda: len(events) == 4)
+        assert events[3].paths == {str(tmp_path / "src" / "pkg" / "b.py")}
+    finally:
+        watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_polling_watcher_reports_changes(tmp_path):
+    (tmp_path / "a.txt").write_text("one")
+    bus = InvalidationBus()
+    events = collect(bus)
+    watcher = PollingWatcher(str(tmp_path), bus, debounce=0.01, interval=0.05)
+    watcher.start()
+    try:
+        await asyncio.sleep(0.1)
+        os.utime(tmp_path / "a.txt", (0, 0))
+        (tmp_path / "b.txt").write_text("two")
+        await wait_for(lambda: len(events) == 2)
+
+        assert events[1] == Invalidation(str(tmp_path), frozenset({str(tmp_path / "a.txt"), str(tmp_path / "b.txt")}), True)
+        assert not watcher.is_current()
+    finally:
+        watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_watch_manager_shares_and_evicts_watchers(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name / "sub").mkdir(parents=True)
+    bus = InvalidationBus()
+    manager = WatchManager(debounce=0.01, max_roots=2, bus=bus)
+    try:
+        first = manager.watch(tmp_path / "a")
+        assert manager.watch(tmp_path / "a" / "sub") is first
+        assert manager.watch(tmp_path / "missing") is None
+        manager.watch(tmp_path / "b")
+        manager.watch(tmp_path / "c")
+
+        assert manager.roots == [str(tmp_path / "b"), str(tmp_path / "c")]
+        assert not bus.is_current(str(tmp_path / "a"))
+        assert bus.is_current(str(tmp_path / "c" / "sub"))
+    finally:
+        manager.close()
+    assert WatchManager("off").watch(tmp_path) is None
+    with pytest.raises(ValueError, match="Unknown watch backend"):
+        WatchManager("fsevents")
+
+
+@pytest.mark.asyncio
+async def test_watched_symbol_index_only_checks_reported_files(tmp_path, monkeypatch):
+    then = time.time() - 60
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.py").write_text(f"def {name}():\n    pass\n")
+        os.utime(tmp_path / f"{name}.py", (then, then))
+    bus = InvalidationBus()
+    index = SymbolIndex(tmp_path)
+    bus.subscribe("symbols", index.invalidate)
+    watcher = InotifyWatcher(str(tmp_path), bus, debounce=0.01)
+    watcher.start()
+    stamped = []
+    real_stamp = symbols_module._stamp
+    monkeypatch.setattr(symbols_module, "_stamp", lambda path: stamped.append(path) or real_stamp(path))
+    try:
+        assert index.refresh(["a.py", "b.py"], verify=False) == 2
+        assert index.refresh(["a.py", "b.py"], verify=False) == 0
+        assert stamped == []
+
+        (tmp_path / "b.py").write_text("def c():\n    pass\n")
+        await wait_for(watcher.is_current)
+        assert index.refresh(["a.py", "b.py"], verify=False) == 1
+        assert stamped == [str(tmp_path / "b.py")]
+        assert index.find("c")[0]["path"] == "b.py"
+    finally:
+        watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_tree_subscribers_are_notified(tmp_path):
+    manager = WatchManager(debounce=0.01)
+    uri = f"tree://{tmp_path}"
+    try:
+        async with create_connected_server_and_client_session(create_server(tmp_path, manager)) as client:
+            await client.subscribe_resource(AnyUrl(uri))
+            resources = await client.list_resources()
+            assert uri in {str(resource.uri) for resource in resources.resources}
+
+            (tmp_path / "new.txt").write_text("hello")
+            with fail_after(5):
+                async for message in client.incoming_messages:
+                    if isinstance(message, ServerNotification):
+                        break
+            assert message.root.method == "notifications/resources/updated"
+            assert str(message.root.params.uri) == uri
+
+            tree = await client.read_resource(AnyUrl(uri))
+            assert "new.txt" in tree.contents[0].text
+    finally:
+        manager.close()
@@ -1,4 +1,11 @@
-from mcp_server_code_assist.xml_parser import XMLProcessor
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+import xmlschema
+from git import Repo
+from mcp_server_code_assist.server import process_xml_instructions
+from mcp_server_code_assist.xml_parser import XMLProcessor, get_schema
 
 
 def test_parse_create():
@@ -36,3 +43,53 @@ def test_generate():
 
     xml = XMLProcessor().generate(data)
     assert all(x in xml for x in ["create", "/tmp/test.txt", "test content"])
+
+
+def test_schema_is_compiled_once():
+    assert XMLProcessor().validator is XMLProcessor().validator is get_schema()
+
+
+def test_iterparse_streams_instructions(tmp_path):
+    count = 1000
+    body = "".join(f"<instruction><function>create</function><path>/tmp/{i}.txt</path><content>  line {i}\n  </content></instruction>" for i in range(count))
+    source = tmp_path / "batch.xml"
+    source.write_text(f'<?xml version="1.0"?>\n<instructions>{body}</instructions>')
+
+    results = list(XMLProcessor().iterparse(source))
+    assert len(results) == count
+    assert results[7] == {"function": "create", "path": "/tmp/7.txt", "content": "line 7"}
+
+
+def test_iterparse_single_instruction_with_nested_key():
+    xml = b"""<instruction>
+        <function>modify</function>
+        <path>/tmp/test.txt</path>
+        <replacements><instruction>step</instruction></replacements>
+    </instruction>"""
+
+    results = list(XMLProcessor().iterparse(io.BytesIO(xml)))
+    assert results == [{"function": "modify", "path": "/tmp/test.txt", "replacements": {"instruction": "step"}}]
+
+
+def test_iterparse_rejects_invalid_instruction():
+    xml = b"<instructions><instruction><function>move</function><path>/a</path></instruction></instructions>"
+
+    with pytest.raises(xmlschema.XMLSchemaValidationError):
+        list(XMLProcessor().iterparse(io.BytesIO(xml)))
+    with pytest.raises(ET.ParseError):
+        list(XMLProcessor().iterparse(io.BytesIO(b"<instructions><instruction>")))
+
+
+@pytest.mark.asyncio
+async def test_process_xml_instructions(tmp_path):
+    Repo.init(tmp_path)
+    target = tmp_path / "a.txt"
+    xml = f"""<instructions>
+        <instruction><function>create</function><path>{target}</path><content>hello world</content></instruction>
+        <instruction><function>modify</function><path>{target}</path><replacements><hello>goodbye</hello></replacements></instruction>
+    </instructions>"""
+
+    results = [result async for result in process_xml_instructions(io.StringIO(xml), tmp_path)]
+    assert len(results) == 2
+    assert "error" not in results[1]
+    assert target.read_text() == "goodbye world"